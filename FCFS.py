@@ -1,53 +1,187 @@
+from collections import deque
+from typing import Generator, Optional
 from input import Scheduler
-from output import SchedulerOutput
+from output import SchedulerOutput, EventSink, ARRIVED, SELECTED, FINISHED, IDLE
+from checkpoint import Checkpointer
+from policy import ArrivalSource, UNBOUNDED, run_policy
+from optional import optional_import
 
-def fcfs_scheduler(scheduler: Scheduler) -> SchedulerOutput:
-    # Initialize SchedulerOutput to keep track of events
-    output = SchedulerOutput(process_count=scheduler.processcount, algorithm=scheduler.use)
+# NumPy is optional: without it, or for workloads too small to repay importing it, FCFS is simulated event by event
+VECTORIZE_MIN_PROCESSES = 10000
 
+def fcfs_scheduler(scheduler: Scheduler, sink: Optional[EventSink] = None,
+                   checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    # Without preemption the whole schedule has a closed form, computed with array operations
+    if sink is None and checkpointer is None and len(scheduler.table) >= VECTORIZE_MIN_PROCESSES \
+            and optional_import('numpy') is not None:
+        return fcfs_vectorized_scheduler(scheduler)
+    return run_policy(fcfs_policy, scheduler, sink, checkpointer)
+
+def fcfs_policy(scheduler: Scheduler, source: ArrivalSource, output: SchedulerOutput,
+                checkpointer: Optional[Checkpointer] = None) -> Generator[None, None, None]:
+    """First-come first-served: each process runs to completion in arrival order (see policy.py)."""
     current_time = 0  # Track the current time in the system
-    ready_queue = []  # Queue for ready processes
-    last_event_time = 0  # Track the last event time
-    index = 0  # Track process arrival
+    ready_queue = deque()  # Queue for ready processes
+    iterations = dispatches = admitted = 0  # Instrumentation counters
+    arrivals, bursts, pending = source.arrivals, source.bursts, source.pending
 
-    processes = sorted(scheduler.processes, key=lambda p: p.arrival)  # Sort by arrival time for FCFS
+    # Continue from a snapshot of an earlier run if there is a valid one
+    state = checkpointer.resume_state(output) if checkpointer is not None else None
+    if state is not None:
+        current_time, admitted = state['time'], state['admitted']
+        source.skip(admitted)
+        ready_queue.extend(state['ready_queue'])
+        iterations, dispatches = state['iterations'], state['dispatches']
 
-    while current_time < scheduler.runfor or ready_queue:
+    while True:
+        while not source.known_through(current_time):
+            yield
+        if not (current_time < source.runfor or ready_queue):
+            break
+        if checkpointer is not None and checkpointer.due(current_time, source.runfor):
+            checkpointer.save(output, {'time': current_time, 'admitted': admitted, 'ready_queue': list(ready_queue),
+                                       'iterations': iterations, 'dispatches': dispatches})
+        iterations += 1
         # Add processes to the ready queue if they have arrived
-        while index < len(processes) and processes[index].arrival <= current_time:
-            process = processes[index]
+        while pending and arrivals[pending[0]] <= current_time:
+            process = pending.popleft()
             ready_queue.append(process)
-            output.add_event(process.arrival, f"{process.name} arrived")
-            index += 1
+            output.add_event(arrivals[process], ARRIVED, process)
+            admitted += 1
 
         if ready_queue:
-            process = ready_queue.pop(0)  # Select the first process in the queue (FCFS)
-
-            # If current time is before process arrival, move time forward
-            if current_time < process.arrival:
-                current_time = process.arrival
+            selected = ready_queue.popleft()  # Select the first process in the queue (FCFS)
+            dispatches += 1
+            arrival = arrivals[selected]
 
             # Track the start time and response time for the process
             start_time = current_time
-            response_time = start_time - process.arrival
-            output.add_event(current_time, f"{process.name} selected (burst {process.burst})")
+            response_time = start_time - arrival
+            output.add_event(current_time, SELECTED, selected, bursts[selected])
 
             # Simulate the process running
-            current_time += process.burst
-            turnaround_time = current_time - process.arrival
-            waiting_time = start_time - process.arrival
+            current_time += bursts[selected]
+            turnaround_time = current_time - arrival
+            waiting_time = start_time - arrival
 
             # Record process statistics: wait, turnaround, response
-            output.add_process_stats(process.name, wait=waiting_time, turnaround=turnaround_time, response=response_time)
-            output.add_event(current_time, f"{process.name} finished")
+            output.add_process_stats(selected, wait=waiting_time, turnaround=turnaround_time, response=response_time)
 
-            last_event_time = current_time  # Update last event time
+            # Admit the processes that arrived while it ran first, so events are recorded in time order
+            while not source.known_through(current_time):
+                yield
+            if current_time < source.runfor or ready_queue:
+                while pending and arrivals[pending[0]] <= current_time:
+                    process = pending.popleft()
+                    ready_queue.append(process)
+                    output.add_event(arrivals[process], ARRIVED, process)
+                    admitted += 1
+            output.add_event(current_time, FINISHED, selected)
         else:
-            # If no process is ready, the system is idle
-            output.add_event(current_time, "Idle")
-            current_time += 1
+            # If no process is ready, the system is idle until the next arrival (or the end of the run)
+            while not source.next_arrival_known(UNBOUNDED):
+                yield
+            next_time = source.runfor
+            if pending:
+                next_time = min(next_time, arrivals[pending[0]])
+            output.add_idle(current_time, next_time - current_time)
+            current_time = next_time
 
     # Once finished, record the last time tick and the end event
     output.set_last_time_tick(current_time)
-    
-    return output
\ No newline at end of file
+    # Every admitted process is queued once and dequeued once
+    output.record_counters(iterations, dispatches, queue_operations=admitted + dispatches, arrivals=admitted)
+
+def fcfs_vectorized_scheduler(scheduler: Scheduler) -> SchedulerOutput:
+    """
+    FCFS computed in closed form with NumPy instead of simulated; the output is identical to fcfs_scheduler.
+    In arrival order, each process starts at the later of its arrival and the previous finish time,
+    so finish times are a running maximum over the cumulative bursts:
+        finish[k] = C[k] + max(0, max over j <= k of (arrival[j] - C[j - 1])), with C the cumulative burst.
+
+    :param scheduler: The Scheduler to run.
+    :return: The SchedulerOutput of the run, with its event log built from the start and finish arrays.
+    """
+    np = optional_import('numpy')
+    table = scheduler.table
+    runfor = scheduler.runfor
+    output = SchedulerOutput(process_count=scheduler.processcount, algorithm=scheduler.use,
+                             process_names=table.names, sink=None)
+
+    # Arrival order, as table.arrival_order() gives it: a stable sort, skipped if already sorted
+    arrivals = np.asarray(table.arrivals, dtype=np.int64)
+    bursts = np.asarray(table.bursts, dtype=np.int64)
+    order = None
+    if np.any(arrivals[1:] < arrivals[:-1]):
+        order = np.argsort(arrivals, kind='stable')
+        arrivals, bursts = arrivals[order], bursts[order]
+
+    cumulative = np.cumsum(bursts)
+    finish = cumulative + np.maximum(np.maximum.accumulate(arrivals - (cumulative - bursts)), 0)
+    start = finish - bursts
+    previous_finish = np.concatenate(([0], finish[:-1]))
+
+    # A process runs if it was queued when its predecessor started, or if its predecessor
+    # finished before the end of the run and it arrives before the end of the run
+    if runfor > 0:
+        previous_start = np.concatenate(([np.iinfo(np.int64).min], start[:-1]))
+        runs = (arrivals <= previous_start) | ((previous_finish < runfor) & (arrivals < runfor))
+        stopped = np.flatnonzero(~runs)
+        count = int(stopped[0]) if len(stopped) else len(runs)
+    else:
+        count = 0
+    arrivals, bursts, start, finish = arrivals[:count], bursts[:count], start[:count], finish[:count]
+    previous_finish = previous_finish[:count]
+    processes = order[:count] if order is not None else np.arange(count, dtype=np.int64)
+
+    # Events other than arrivals are already in time order: [idle,] selected, finished for each process,
+    # then an idle stretch up to the end of the run
+    gap = start - previous_finish
+    idle_before = gap > 0
+    end_time = int(finish[-1]) if count else 0
+    final_idle = runfor - end_time if end_time < runfor else 0
+    selected_positions = 2 * np.arange(count, dtype=np.int64) + np.cumsum(idle_before)
+    idle_positions = selected_positions[idle_before] - 1
+    length = 2 * count + int(np.count_nonzero(idle_before)) + (1 if final_idle > 0 else 0)
+
+    ticks = np.empty(length, dtype=np.int64)
+    kinds = np.empty(length, dtype=np.int8)
+    event_processes = np.full(length, -1, dtype=np.intc)
+    event_args = np.zeros(length, dtype=np.int64)
+    ticks[selected_positions], kinds[selected_positions] = start, SELECTED
+    event_processes[selected_positions], event_args[selected_positions] = processes, bursts
+    ticks[selected_positions + 1], kinds[selected_positions + 1] = finish, FINISHED
+    event_processes[selected_positions + 1] = processes
+    ticks[idle_positions], kinds[idle_positions] = previous_finish[idle_before], IDLE
+    event_args[idle_positions] = gap[idle_before]
+    if final_idle > 0:
+        ticks[-1], kinds[-1], event_args[-1] = end_time, IDLE, final_idle
+
+    # Merge in the arrivals, which come first within their time tick
+    positions = np.searchsorted(ticks, arrivals, side='left') + np.arange(count, dtype=np.int64)
+    is_arrival = np.zeros(length + count, dtype=bool)
+    is_arrival[positions] = True
+    for column, values, arrival_values in [(output.event_ticks, ticks, arrivals),
+                                           (output.event_kinds, kinds, np.full(count, ARRIVED, dtype=np.int8)),
+                                           (output.event_processes, event_processes, processes.astype(np.intc)),
+                                           (output.event_args, event_args, np.zeros(count, dtype=np.int64))]:
+        merged = np.empty(length + count, dtype=values.dtype)
+        merged[is_arrival] = arrival_values
+        merged[~is_arrival] = values
+        column.frombytes(merged.tobytes())
+
+    # Statistics in the order the processes finish, as fcfs_scheduler records them
+    waits = start - arrivals
+    output.stat_processes.frombytes(processes.astype(np.intc).tobytes())
+    output.stat_waits.frombytes(waits.tobytes())
+    output.stat_turnarounds.frombytes((finish - arrivals).tobytes())
+    output.stat_responses.frombytes(waits.tobytes())
+    output.idle_time = int(gap.sum()) + final_idle
+    # The counts of fcfs_scheduler: a loop iteration per process run and per idle stretch, and every
+    # process run is queued once and dequeued once
+    idle_stretches = int(np.count_nonzero(idle_before)) + (1 if final_idle > 0 else 0)
+    output.record_counters(iterations=count + idle_stretches, dispatches=count, queue_operations=2 * count,
+                           arrivals=count)
+
+    output.set_last_time_tick(max(end_time, runfor) if runfor > 0 else 0)
+    return output
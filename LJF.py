@@ -1,55 +1,192 @@
+import heapq
+from typing import Dict, Generator, Optional
 from input import Scheduler
-from output import SchedulerOutput
+from output import SchedulerOutput, EventSink, ARRIVED, SELECTED, FINISHED
+from checkpoint import Checkpointer
+from policy import ArrivalSource, UNBOUNDED, run_policy
 
-def ljf_scheduler(scheduler: Scheduler) -> SchedulerOutput:
-    # Initialize SchedulerOutput to track events
-    output = SchedulerOutput(process_count=scheduler.processcount, algorithm="ljf")
-    
+def ljf_scheduler(scheduler: Scheduler, sink: Optional[EventSink] = None,
+                  checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    return run_policy(ljf_policy, scheduler, sink, checkpointer)
+
+def ljf_policy(scheduler: Scheduler, source: ArrivalSource, output: SchedulerOutput,
+               checkpointer: Optional[Checkpointer] = None) -> Generator[None, None, None]:
+    """Longest job first (see policy.py); the preemptive variant always runs the job with the longest remaining time."""
+    if scheduler.preemptive:
+        return longest_remaining_job_first_policy(scheduler, source, output, checkpointer)
+    return longest_job_first_policy(scheduler, source, output, checkpointer)
+
+def longest_job_first_policy(scheduler: Scheduler, source: ArrivalSource, output: SchedulerOutput,
+                             checkpointer: Optional[Checkpointer] = None) -> Generator[None, None, None]:
     current_time = 0  # Track the current time
-    ready_queue = []  # Queue for processes ready to run
-    index = 0  # Index to track arriving processes
-    last_event_time = -1  # Track the last event time
-    
-    # Sort processes by arrival time initially
-    processes = sorted(scheduler.processes, key=lambda p: p.arrival)
+    # Max-heap of ready processes as (-burst, arrival position, index); the position breaks ties
+    ready_heap = []
+    admitted = 0  # Processes taken from the pending ones, which is also the arrival position of the next
+    iterations = dispatches = 0  # Instrumentation counters
+    arrivals, bursts, pending = source.arrivals, source.bursts, source.pending
+
+    # Continue from a snapshot of an earlier run if there is a valid one
+    state = checkpointer.resume_state(output) if checkpointer is not None else None
+    if state is not None:
+        current_time, admitted, ready_heap = state['time'], state['admitted'], state['ready_heap']
+        source.skip(admitted)
+        iterations, dispatches = state['iterations'], state['dispatches']
 
     # Run until the scheduler run time or all processes have completed
-    while current_time < scheduler.runfor or ready_queue:
-        # Add processes to the ready queue if they have arrived
-        while index < len(processes) and processes[index].arrival <= current_time:
-            process = processes[index]
-            ready_queue.append(process)
-            output.add_event(process.arrival, f"{process.name} arrived")
-            index += 1
-
-        if ready_queue:
+    while True:
+        while not source.known_through(current_time):
+            yield
+        if not (current_time < source.runfor or ready_heap):
+            break
+        if checkpointer is not None and checkpointer.due(current_time, source.runfor):
+            checkpointer.save(output, {'time': current_time, 'admitted': admitted, 'ready_heap': list(ready_heap),
+                                       'iterations': iterations, 'dispatches': dispatches})
+        iterations += 1
+        # Add processes to the ready heap if they have arrived
+        while pending and arrivals[pending[0]] <= current_time:
+            process = pending.popleft()
+            heapq.heappush(ready_heap, (-bursts[process], admitted, process))
+            output.add_event(arrivals[process], ARRIVED, process)
+            admitted += 1
+
+        if ready_heap:
             # Select the process with the longest burst time (LJF)
-            process = max(ready_queue, key=lambda p: p.burst)
-            ready_queue.remove(process)
+            _, _, selected = heapq.heappop(ready_heap)
+            dispatches += 1
+            arrival = arrivals[selected]
 
             # Track the start time and response time
             start_time = current_time
-            response_time = start_time - process.arrival
-            output.add_event(current_time, f"{process.name} selected (burst {process.burst})")
-            
+            response_time = start_time - arrival
+            output.add_event(current_time, SELECTED, selected, bursts[selected])
+
             # Run the process for its burst time
-            current_time += process.burst
-            turnaround_time = current_time - process.arrival
-            waiting_time = start_time - process.arrival
+            current_time += bursts[selected]
+            turnaround_time = current_time - arrival
+            waiting_time = start_time - arrival
 
             # Record process statistics: wait, turnaround, response
-            output.add_process_stats(process.name, wait=waiting_time, turnaround=turnaround_time, response=response_time)
-            output.add_event(current_time, f"{process.name} finished")
+            output.add_process_stats(selected, wait=waiting_time, turnaround=turnaround_time, response=response_time)
 
-            # Update the last event time
-            last_event_time = current_time
+            # Admit the processes that arrived while it ran first, so events are recorded in time order
+            while not source.known_through(current_time):
+                yield
+            if current_time < source.runfor or ready_heap:
+                while pending and arrivals[pending[0]] <= current_time:
+                    process = pending.popleft()
+                    heapq.heappush(ready_heap, (-bursts[process], admitted, process))
+                    output.add_event(arrivals[process], ARRIVED, process)
+                    admitted += 1
+            output.add_event(current_time, FINISHED, selected)
         else:
-            # If no process is ready, system is idle
-            output.add_event(current_time, "Idle")
-            last_event_time = current_time
-            current_time += 1
+            # If no process is ready, system is idle until the next arrival (or the end of the run)
+            while not source.next_arrival_known(UNBOUNDED):
+                yield
+            next_time = source.runfor
+            if pending:
+                next_time = min(next_time, arrivals[pending[0]])
+            output.add_idle(current_time, next_time - current_time)
+            current_time = next_time
 
     # Once finished, record the final time
     output.set_last_time_tick(current_time)
+    output.record_counters(iterations, dispatches, queue_operations=admitted + dispatches, arrivals=admitted)
+
+def longest_remaining_job_first_policy(scheduler: Scheduler, source: ArrivalSource, output: SchedulerOutput,
+                                       checkpointer: Optional[Checkpointer] = None) -> Generator[None, None, None]:
+    arrivals, bursts, pending = source.arrivals, source.bursts, source.pending
+    # Remaining time and response time of the processes admitted and not finished
+    remaining: Dict[int, int] = {}
+    response: Dict[int, int] = {}
+
+    ready_heap = []  # Max-heap of (-remaining time, arrival position, index); the position breaks ties
+    current_time = 0
+    admitted = 0  # Processes taken from the pending ones, which is also the arrival position of the next
+    running = None  # Index of the process currently holding the CPU
+    running_position = 0  # Its arrival position
+    last_selected = None  # Process that held the CPU before this decision
+    iterations = dispatches = requeues = 0  # Instrumentation counters
+
+    # Continue from a snapshot of an earlier run if there is a valid one
+    state = checkpointer.resume_state(output) if checkpointer is not None else None
+    if state is not None:
+        current_time, admitted, running, last_selected = state['time'], state['admitted'], state['running'], state['last_selected']
+        source.skip(admitted)
+        running_position, ready_heap = state['running_position'], state['ready_heap']
+        remaining, response = state['remaining'], state['response']
+        iterations, dispatches, requeues = state['iterations'], state['dispatches'], state['requeues']
 
-    return output
\ No newline at end of file
+    # Jump from event to event: arrival, completion, a waiting job overtaking the running one,
+    # or the end of the run
+    while True:
+        while not source.known_through(current_time):
+            yield
+        if not current_time < source.runfor:
+            break
+        if checkpointer is not None and checkpointer.due(current_time, source.runfor):
+            checkpointer.save(output, {'time': current_time, 'admitted': admitted, 'running': running,
+                                       'running_position': running_position, 'last_selected': last_selected,
+                                       'ready_heap': list(ready_heap), 'remaining': dict(remaining),
+                                       'response': dict(response), 'iterations': iterations,
+                                       'dispatches': dispatches, 'requeues': requeues})
+        iterations += 1
+        # The running process goes back into the ready set so it competes with new arrivals
+        if running is not None:
+            heapq.heappush(ready_heap, (-remaining[running], running_position, running))
+            requeues += 1
+            running = None
+
+        # Add processes to the ready heap if they have arrived
+        while pending and arrivals[pending[0]] <= current_time:
+            process = pending.popleft()
+            remaining[process] = bursts[process]
+            heapq.heappush(ready_heap, (-bursts[process], admitted, process))
+            output.add_event(arrivals[process], ARRIVED, process)
+            admitted += 1
+
+        if ready_heap:
+            _, running_position, running = heapq.heappop(ready_heap)
+            dispatches += 1
+            if running != last_selected:
+                if running not in response:
+                    response[running] = current_time - arrivals[running]
+                output.add_event(current_time, SELECTED, running, remaining[running])
+            last_selected = running
+
+            # Run until the process finishes, or until the longest waiting job overtakes it (ties go
+            # to the earlier arrival) ...
+            next_time = current_time + remaining[running]
+            if ready_heap:
+                waiting_remaining, waiting_position = -ready_heap[0][0], ready_heap[0][1]
+                run_length = remaining[running] - waiting_remaining + (1 if running_position < waiting_position else 0)
+                next_time = min(next_time, current_time + run_length)
+            # ... the next arrival or the end of the run
+            while not source.next_arrival_known(next_time):
+                yield
+            next_time = min(next_time, source.runfor)
+            if pending:
+                next_time = min(next_time, arrivals[pending[0]])
+            remaining[running] -= next_time - current_time
+            current_time = next_time
+
+            if remaining[running] == 0:
+                turnaround_time = current_time - arrivals[running]
+                waiting_time = turnaround_time - bursts[running]
+                output.add_process_stats(running, wait=waiting_time, turnaround=turnaround_time,
+                                         response=response.pop(running))
+                output.add_event(current_time, FINISHED, running)
+                del remaining[running]
+                running = None
+                last_selected = None
+        else:
+            # Nothing is ready until the next arrival (or the end of the run)
+            while not source.next_arrival_known(UNBOUNDED):
+                yield
+            next_time = source.runfor
+            if pending:
+                next_time = min(next_time, arrivals[pending[0]])
+            output.add_idle(current_time, next_time - current_time)
+            current_time = next_time
+
+    output.set_last_time_tick(current_time)
+    output.record_counters(iterations, dispatches, queue_operations=admitted + requeues + dispatches, arrivals=admitted)
@@ -1,47 +1,107 @@
+import heapq
+from typing import Dict, Generator, Optional
 from input import Scheduler
-from output import SchedulerOutput
+from output import SchedulerOutput, EventSink, ARRIVED, SELECTED, FINISHED
+from checkpoint import Checkpointer
+from policy import ArrivalSource, UNBOUNDED, run_policy
 
-def sjf_scheduler(scheduler: Scheduler) -> SchedulerOutput:
-    output = SchedulerOutput(process_count=scheduler.processcount, algorithm=scheduler.use)
-    current_time = 0
-    ready_queue = []
-    index = 0
-    processes = sorted(scheduler.processes, key=lambda p: p.arrival)
+def sjf_scheduler(scheduler: Scheduler, sink: Optional[EventSink] = None,
+                  checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    return run_policy(sjf_policy, scheduler, sink, checkpointer)
+
+def sjf_policy(scheduler: Scheduler, source: ArrivalSource, output: SchedulerOutput,
+               checkpointer: Optional[Checkpointer] = None) -> Generator[None, None, None]:
+    """Shortest job first, preemptive: the process with the least remaining time runs (see policy.py)."""
+    arrivals, bursts, pending = source.arrivals, source.bursts, source.pending
+    # Remaining time and response time of the processes admitted and not finished
+    remaining: Dict[int, int] = {}
+    response: Dict[int, int] = {}
+
+    # Ready set as a heap of (remaining time, sequence, index). The sequence number records
+    # when a process took on its current remaining time, which reproduces the tie-breaking
+    # of a stable sort over the ready queue.
+    ready_heap = []
+    sequence = 0
 
+    current_time = 0
+    running = None  # Index of the process currently holding the CPU
     finished = False
-    while current_time < scheduler.runfor:
-        while index < len(processes) and processes[index].arrival <= current_time:
-            process = processes[index]
-            ready_queue.append(process)
-            output.add_event(process.arrival, f"{process.name} arrived")
-            index += 1
-
-        ready_queue = sorted(ready_queue, key=lambda p: p.remaining_time)
-
-        if ready_queue:
-            process = ready_queue[0]
-            if (process.start_time is None) or finished:
-                if process.start_time is None:
-                    process.start_time = current_time
-                    process.response_time = current_time - process.arrival
-                output.add_event(current_time, f"{process.name} selected (burst {process.remaining_time})")
-            
-            if finished:
-                finished = False
-
-            process.remaining_time -= 1
-            current_time += 1
-
-            if process.remaining_time == 0:
-                turnaround_time = current_time - process.arrival
-                waiting_time = turnaround_time - process.burst
-                output.add_process_stats(process.name, wait=waiting_time, turnaround=turnaround_time, response=process.response_time)
-                output.add_event(current_time, f"{process.name} finished")
-                ready_queue.pop(0)
+    iterations = dispatches = admitted = 0  # Instrumentation counters
+
+    # Continue from a snapshot of an earlier run if there is a valid one
+    state = checkpointer.resume_state(output) if checkpointer is not None else None
+    if state is not None:
+        current_time, admitted, running, finished = state['time'], state['admitted'], state['running'], state['finished']
+        source.skip(admitted)
+        ready_heap, sequence = state['ready_heap'], state['sequence']
+        remaining, response = state['remaining'], state['response']
+        iterations, dispatches = state['iterations'], state['dispatches']
+
+    # Jump from event to event (arrival, completion or end of run) instead of tick by tick
+    while True:
+        while not source.known_through(current_time):
+            yield
+        if not current_time < source.runfor:
+            break
+        if checkpointer is not None and checkpointer.due(current_time, source.runfor):
+            checkpointer.save(output, {'time': current_time, 'admitted': admitted, 'running': running, 'finished': finished,
+                                       'ready_heap': list(ready_heap), 'sequence': sequence,
+                                       'remaining': dict(remaining), 'response': dict(response),
+                                       'iterations': iterations, 'dispatches': dispatches})
+        iterations += 1
+        # The running process goes back into the ready set so it competes with new arrivals
+        if running is not None:
+            heapq.heappush(ready_heap, (remaining[running], sequence, running))
+            sequence += 1
+            running = None
+
+        # Add processes to the ready heap if they have arrived
+        while pending and arrivals[pending[0]] <= current_time:
+            process = pending.popleft()
+            remaining[process] = bursts[process]
+            heapq.heappush(ready_heap, (bursts[process], sequence, process))
+            sequence += 1
+            output.add_event(arrivals[process], ARRIVED, process)
+            admitted += 1
+
+        if ready_heap:
+            _, _, running = heapq.heappop(ready_heap)
+            dispatches += 1
+            if running not in response or finished:
+                if running not in response:
+                    response[running] = current_time - arrivals[running]
+                output.add_event(current_time, SELECTED, running, remaining[running])
+            finished = False
+
+            # Run until the process finishes, the next arrival or the end of the run
+            next_time = current_time + remaining[running]
+            while not source.next_arrival_known(next_time):
+                yield
+            next_time = min(next_time, source.runfor)
+            if pending:
+                next_time = min(next_time, arrivals[pending[0]])
+            remaining[running] -= next_time - current_time
+            current_time = next_time
+
+            if remaining[running] == 0:
+                turnaround_time = current_time - arrivals[running]
+                waiting_time = turnaround_time - bursts[running]
+                output.add_process_stats(running, wait=waiting_time, turnaround=turnaround_time,
+                                         response=response.pop(running))
+                output.add_event(current_time, FINISHED, running)
+                del remaining[running]
+                running = None
                 finished = True
         else:
-            output.add_event(current_time, "Idle")
-            current_time += 1
+            # Nothing is ready until the next arrival (or the end of the run)
+            while not source.next_arrival_known(UNBOUNDED):
+                yield
+            next_time = source.runfor
+            if pending:
+                next_time = min(next_time, arrivals[pending[0]])
+            output.add_idle(current_time, next_time - current_time)
+            current_time = next_time
 
     output.set_last_time_tick(current_time)
-    return output
+    # Every push takes a sequence number
+    output.record_counters(iterations, dispatches, queue_operations=sequence + dispatches, arrivals=admitted)
@@ -0,0 +1,165 @@
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple, TextIO
+from input import Scheduler
+from generator import generate_workload
+from runner import run_scheduler
+from registry import SCHEDULERS
+
+# Schedulers covered by the benchmark: (use, preemptive)
+BENCHMARK_ALGORITHMS = [('fcfs', False), ('sjf', False), ('rr', False), ('lottery', False), ('ljf', False), ('ljf', True),
+                        ('mlfq', False)]
+BENCHMARK_SIZES = [1000, 10000, 100000]
+BENCHMARK_QUANTUM = 4
+BENCHMARK_FORMAT_VERSION = 1
+
+def benchmark_name(use: str, preemptive: bool) -> str:
+    """Name of a scheduler in benchmark results, e.g. 'ljf' or 'ljf-preemptive'."""
+    return f"{use}-preemptive" if preemptive else use
+
+def parse_benchmark_algorithms(spec: str) -> List[Tuple[str, bool]]:
+    """Parse a comma-separated list of benchmark names, e.g. 'fcfs,rr,ljf-preemptive'."""
+    names = {benchmark_name(use, preemptive): (use, preemptive) for use, preemptive in BENCHMARK_ALGORITHMS}
+    algorithms = []
+    for name in spec.split(','):
+        if name.strip() not in names:
+            raise ValueError(f"Unknown scheduler '{name}'. Valid values: {', '.join(names)}")
+        algorithms.append(names[name.strip()])
+    return algorithms
+
+def benchmark_workload(use: str, preemptive: bool, count: int, seed: int) -> Scheduler:
+    """
+    The workload of one benchmark case: Poisson arrivals at 95% load with heavy-tailed (lognormal)
+    bursts, so ready queues grow long. Every scheduler of a size runs the same processes.
+    """
+    return generate_workload(count, seed=seed, arrivals='poisson', rate=0.95 / 8, bursts='lognormal', mean_burst=8,
+                             use=use, quantum=BENCHMARK_QUANTUM if SCHEDULERS[use].quantum else None, preemptive=preemptive)
+
+def benchmark_case(use: str, preemptive: bool, count: int, seed: int = 1, repeat: int = 3,
+                   measure_memory: bool = True) -> Dict[str, object]:
+    """
+    Benchmark one scheduler on one workload size.
+
+    :param use: The algorithm.
+    :param preemptive: Use its preemptive variant.
+    :param count: Number of processes in the workload.
+    :param seed: Seed of the generated workload.
+    :param repeat: Number of timed runs; the fastest is kept.
+    :param measure_memory: Also run once under tracemalloc to record the peak memory allocated by the run.
+    :return: The result record: scheduler, processes, events, seconds, events per second, peak memory in bytes.
+    """
+    scheduler = benchmark_workload(use, preemptive, count, seed)
+    seconds = None
+    events = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        output = run_scheduler(scheduler)
+        elapsed = time.perf_counter() - start
+        events = output.event_count()
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+        del output
+
+    peak_memory = None
+    if measure_memory:
+        # Tracing slows the run down, so memory is measured separately from time
+        gc.collect()
+        tracemalloc.start()
+        output = run_scheduler(scheduler)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del output
+
+    return {
+        'scheduler': benchmark_name(use, preemptive),
+        'processes': count,
+        'events': events,
+        'seconds': seconds,
+        'events_per_second': events / seconds if seconds else 0.0,
+        'peak_memory_bytes': peak_memory,
+    }
+
+def run_benchmarks(sizes: List[int], algorithms: List[Tuple[str, bool]], seed: int = 1, repeat: int = 3,
+                   measure_memory: bool = True, progress: Optional[TextIO] = None) -> List[Dict[str, object]]:
+    """
+    Benchmark every scheduler over a ladder of workload sizes.
+
+    :param sizes: Numbers of processes, smallest first.
+    :param algorithms: The schedulers, as (use, preemptive).
+    :param seed: Seed of the generated workloads.
+    :param repeat: Number of timed runs of each case.
+    :param measure_memory: Record the peak memory of each case.
+    :param progress: If given, a line is written here as each case finishes.
+    :return: One result record per (scheduler, size).
+    """
+    results = []
+    for use, preemptive in algorithms:
+        for count in sizes:
+            result = benchmark_case(use, preemptive, count, seed, repeat, measure_memory)
+            results.append(result)
+            if progress is not None:
+                progress.write(f"{result['scheduler']:<15} {count:>9} processes  {result['seconds']:.3f}s\n")
+                progress.flush()
+    return results
+
+def write_benchmark_results(results: List[Dict[str, object]], file_path: str, seed: int):
+    """Write benchmark results as JSON, with the environment they were measured in."""
+    document = {
+        'version': BENCHMARK_FORMAT_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'results': results,
+    }
+    with open(file_path, 'w') as file:
+        json.dump(document, file, indent=2)
+        file.write("\n")
+
+def read_benchmark_results(file_path: str) -> List[Dict[str, object]]:
+    """Read the results written by write_benchmark_results."""
+    with open(file_path, 'r') as file:
+        document = json.load(file)
+    if document.get('version') != BENCHMARK_FORMAT_VERSION:
+        raise ValueError(f"Unsupported benchmark results version in {file_path}.")
+    return document['results']
+
+def compare_benchmarks(results: List[Dict[str, object]], baseline: List[Dict[str, object]],
+                       time_threshold: float = 0.25, memory_threshold: float = 0.25) -> List[str]:
+    """
+    Compare results against a baseline.
+
+    :param results: The new results.
+    :param baseline: The baseline results; cases missing from either side are ignored.
+    :param time_threshold: Allowed relative slowdown, e.g. 0.25 for 25% slower.
+    :param memory_threshold: Allowed relative growth of the peak memory.
+    :return: A description of each regression (empty if there are none).
+    """
+    previous = {(result['scheduler'], result['processes']): result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = previous.get((result['scheduler'], result['processes']))
+        if reference is None:
+            continue
+        case = f"{result['scheduler']} with {result['processes']} processes"
+        if reference['seconds'] and result['seconds'] > reference['seconds'] * (1 + time_threshold):
+            regressions.append(f"{case}: {result['seconds']:.3f}s, baseline {reference['seconds']:.3f}s "
+                               f"(+{result['seconds'] / reference['seconds'] - 1:.0%})")
+        if reference.get('peak_memory_bytes') and result.get('peak_memory_bytes') and \
+                result['peak_memory_bytes'] > reference['peak_memory_bytes'] * (1 + memory_threshold):
+            regressions.append(f"{case}: peak memory {result['peak_memory_bytes']} bytes, "
+                               f"baseline {reference['peak_memory_bytes']} bytes "
+                               f"(+{result['peak_memory_bytes'] / reference['peak_memory_bytes'] - 1:.0%})")
+    return regressions
+
+def print_benchmark_table(results: List[Dict[str, object]], file: Optional[TextIO] = None):
+    """Print one row per benchmark case."""
+    file = file or sys.stdout
+    file.write(f"{'Scheduler':<15} {'Processes':>10} {'Events':>10} {'Time (s)':>10} {'Events/s':>12} {'Peak MiB':>9}\n")
+    for result in results:
+        memory = f"{result['peak_memory_bytes'] / (1 << 20):9.1f}" if result['peak_memory_bytes'] is not None else f"{'-':>9}"
+        file.write(f"{result['scheduler']:<15} {result['processes']:>10} {result['events']:>10} "
+                   f"{result['seconds']:>10.3f} {result['events_per_second']:>12.0f} {memory}\n")
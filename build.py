@@ -1,6 +1,10 @@
 import os
 import ast
 from collections import defaultdict, deque
+from registry import engine_modules
+
+# File whose __main__ block runs the program; it comes after every module it may call into
+ENTRY_POINT = 'exec.py'
 
 def parse_imports(file_path):
     """Parse a Python file to extract import statements."""
@@ -77,6 +81,11 @@ def concatenate_scripts(output_file):
     files = [f for f in os.listdir(current_dir) if f.endswith('.py') and f not in (os.path.basename(__file__), output_file)]
     
     graph = build_dependency_graph(files)
+    # Engines are loaded through the registry instead of being imported, so nothing else orders them:
+    # define them before the entry point, where the registry finds them in the bundle's namespace
+    for module in engine_modules():
+        if f"{module}.py" in files:
+            graph[f"{module}.py"].add(ENTRY_POINT)
     sorted_files = topological_sort(graph)
 
     included_files = {file for file in sorted_files}
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Callable, Optional
+from input import Scheduler
+from output import SchedulerOutput
+
+# Bump whenever a change to an engine or to SchedulerOutput changes the results of a run,
+# so results computed by the previous code are no longer found
+ENGINE_VERSION = 4
+
+# Serialized result: magic, format version, metadata length; then the zlib-compressed
+# JSON metadata followed by the raw bytes of each column
+RESULT_MAGIC = b'SCHEDRES'
+RESULT_VERSION = 1
+RESULT_HEADER = struct.Struct('<8sII')
+
+# Typecodes of the SchedulerOutput columns, in the order they are stored
+RESULT_COLUMNS = [('event_ticks', 'q'), ('event_kinds', 'b'), ('event_processes', 'i'), ('event_args', 'q'),
+                  ('event_cpus', 'h'), ('stat_processes', 'i'), ('stat_waits', 'q'), ('stat_turnarounds', 'q'),
+                  ('stat_responses', 'q')]
+
+DEFAULT_CACHE_SIZE = 256 << 20
+
+def little_endian_bytes(column) -> bytes:
+    """Bytes of an integer column (array or memoryview) in little-endian order, whatever the host."""
+    if sys.byteorder == 'little' and isinstance(column, (array, memoryview)):
+        return column.tobytes()
+    column = array(getattr(column, 'typecode', None) or getattr(column, 'format', 'q'), column)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column.tobytes()
+
+def scheduler_cache_key(scheduler: Scheduler, mode: str = 'full') -> str:
+    """
+    Content hash of everything that determines the result of a run: the algorithm settings,
+    every process, the engine version and the kind of result kept.
+
+    :param scheduler: The Scheduler to run.
+    :param mode: 'full' for a result with its event log, 'summary' for one without (a --summary run).
+    :return: A hex digest identifying the result.
+    """
+    table = scheduler.table
+    digest = hashlib.sha256()
+    settings = {'engine': ENGINE_VERSION, 'mode': mode, 'processcount': scheduler.processcount,
+                'runfor': scheduler.runfor, 'use': scheduler.use, 'preemptive': scheduler.preemptive,
+                'quantum': scheduler.quantum, 'quanta': scheduler.quanta, 'boost': scheduler.boost,
+                'aging': scheduler.aging, 'cpus': scheduler.cpus, 'steal': scheduler.steal, 'seed': scheduler.seed,
+                'count': len(table)}
+    digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+    for column in [table.arrivals, table.bursts, table.tickets, table.priorities]:
+        digest.update(little_endian_bytes(column))
+    digest.update('\0'.join(table.names).encode('utf-8'))
+    return digest.hexdigest()
+
+def serialize_output(output: SchedulerOutput) -> bytes:
+    """Encode a finished SchedulerOutput (without its process names, which come from the workload)."""
+    metadata = {
+        'process_count': output.process_count, 'algorithm': output.algorithm, 'quantum': output.quantum,
+        'quanta': output.quanta, 'boost': output.boost, 'aging': output.aging, 'preemptive': output.preemptive, 'last_time_tick': output.last_time_tick,
+        'cpus': output.cpus, 'steal': output.steal, 'cpu_busy': output.cpu_busy,
+        'incomplete_processes': output.incomplete_processes, 'idle_time': output.idle_time,
+        'counters': output.counters, 'lengths': [len(getattr(output, name)) for name, _ in RESULT_COLUMNS],
+    }
+    encoded = json.dumps(metadata).encode('utf-8')
+    body = [encoded] + [little_endian_bytes(getattr(output, name)) for name, _ in RESULT_COLUMNS]
+    return RESULT_HEADER.pack(RESULT_MAGIC, RESULT_VERSION, len(encoded)) + zlib.compress(b''.join(body), 6)
+
+def deserialize_output(data: bytes, scheduler: Scheduler) -> SchedulerOutput:
+    """Decode a result written by serialize_output, taking the process names from `scheduler`."""
+    magic, version, metadata_length = RESULT_HEADER.unpack_from(data)
+    if magic != RESULT_MAGIC or version != RESULT_VERSION:
+        raise ValueError("Not a cached scheduler result.")
+    body = zlib.decompress(data[RESULT_HEADER.size:])
+    metadata = json.loads(body[:metadata_length])
+
+    output = SchedulerOutput(process_count=metadata['process_count'], algorithm=metadata['algorithm'],
+                             quantum=metadata['quantum'], preemptive=metadata['preemptive'],
+                             process_names=scheduler.table.names, quanta=metadata['quanta'], boost=metadata['boost'],
+                             aging=metadata['aging'], cpus=metadata['cpus'], steal=metadata['steal'])
+    offset = metadata_length
+    for (name, typecode), length in zip(RESULT_COLUMNS, metadata['lengths']):
+        column = array(typecode)
+        size = length * column.itemsize
+        column.frombytes(body[offset:offset + size])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        setattr(output, name, column)
+        offset += size
+    output.last_time_tick = metadata['last_time_tick']
+    output.incomplete_processes = metadata['incomplete_processes']
+    output.idle_time = metadata['idle_time']
+    output.cpu_busy = metadata['cpu_busy']
+    output.counters = metadata['counters']
+    return output
+
+class ResultCache:
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_SIZE):
+        """
+        On-disk cache of finished runs, keyed by scheduler_cache_key. When the cache grows past
+        `max_bytes`, the least recently used results are evicted (a hit counts as a use).
+
+        :param directory: Directory holding the cached results (created if needed).
+        :param max_bytes: Maximum total size of the cached results.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def cacheable(scheduler: Scheduler) -> bool:
+        """Only reproducible runs are cached: lottery needs a fixed seed."""
+        return scheduler.use != 'lottery' or scheduler.seed is not None
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.result')
+
+    def run(self, scheduler: Scheduler, run: Callable[[], SchedulerOutput], mode: str = 'full') -> SchedulerOutput:
+        """
+        Return the cached result of running `scheduler`, or call `run` and cache what it returns.
+
+        :param scheduler: The Scheduler to run.
+        :param run: Runs the scheduler; only called on a cache miss.
+        :param mode: The kind of result `run` produces (see scheduler_cache_key).
+        :return: The SchedulerOutput, cached or new.
+        """
+        if not self.cacheable(scheduler):
+            return run()
+        key = scheduler_cache_key(scheduler, mode)
+        output = self.load(key, scheduler)
+        if output is None:
+            output = run()
+            self.store(key, output)
+        return output
+
+    def load(self, key: str, scheduler: Scheduler) -> Optional[SchedulerOutput]:
+        """
+        Look up a result.
+
+        :param key: The scheduler_cache_key of the run.
+        :param scheduler: The Scheduler of the run, which provides the process names.
+        :return: The stored SchedulerOutput, or None if it is not cached.
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            output = deserialize_output(data, scheduler)
+        except (OSError, ValueError, KeyError, zlib.error, struct.error):
+            return None
+        # Mark the result as recently used
+        os.utime(path)
+        return output
+
+    def store(self, key: str, output: SchedulerOutput):
+        """Store a result under its scheduler_cache_key, then evict old results if the cache is too large."""
+        path = self.path(key)
+        # Write to a temporary file first so concurrent readers never see a partial result
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(serialize_output(output))
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used results until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.result'):
+                status = entry.stat()
+                entries.append((status.st_mtime, status.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,189 @@
+import bisect
+import os
+from array import array
+from typing import Dict, List, Optional, Sequence
+from input import Scheduler, ProcessTable
+from output import SchedulerOutput
+
+# Checkpoint files are zlib-compressed pickles written by write_checkpoint (local, trusted files only).
+# The modules they need are imported when a checkpoint is read or written, so that the engines,
+# which all import this module, do not pay for them at startup.
+CHECKPOINT_VERSION = 4
+
+CHECKPOINT_KEEP = 8  # Snapshots kept per run; the latest ones are the most useful when a trace grows
+CHECKPOINT_INTERVALS = 32  # Snapshots taken over a run by default
+
+def default_checkpoint_interval(scheduler: Scheduler) -> int:
+    """Ticks between snapshots when none is given: CHECKPOINT_INTERVALS snapshots over the run."""
+    return max(1, scheduler.runfor // CHECKPOINT_INTERVALS)
+
+class Checkpointer:
+    def __init__(self, every: int, keep: int = CHECKPOINT_KEEP, resume: Optional[dict] = None,
+                 resume_output: Optional[SchedulerOutput] = None, resume_engine_state: Optional[dict] = None,
+                 snapshots: Optional[List[dict]] = None):
+        """
+        Takes snapshots of an engine's state while it runs, and hands a saved snapshot back to
+        the engine so a run can continue from it instead of starting at time 0.
+
+        A snapshot is taken at the top of the engine's main loop, once `every` ticks have passed
+        since the previous one, and holds the engine's local state (ready queue, remaining times,
+        first-run times, RNG state, counters) plus the length of the output recorded so far.
+
+        :param every: Simulated ticks between snapshots.
+        :param keep: Number of snapshots kept (the most recent ones).
+        :param resume: The snapshot to continue from, or None to start at time 0.
+        :param resume_output: The output of the run the snapshot was taken from.
+        :param resume_engine_state: A copy of the snapshot's engine state, which the engine is free to modify.
+        :param snapshots: Earlier snapshots that are still valid, kept in the next checkpoint file.
+        """
+        self.every = max(1, every)
+        self.keep = keep
+        self.resume = resume
+        self.resume_output = resume_output
+        self.resume_engine_state = resume_engine_state
+        self.snapshots: List[dict] = list(snapshots or [])
+        self.next_due = resume['state']['time'] + self.every if resume is not None else self.every
+
+    def due(self, time_tick: int, runfor: int) -> bool:
+        """Tell the engine whether to save a snapshot at the top of this loop iteration."""
+        return self.next_due <= time_tick < runfor
+
+    def save(self, output: SchedulerOutput, state: dict):
+        """
+        Record a snapshot. `state` must hold copies of the engine's mutable containers, and its
+        'time' entry is the current time.
+        """
+        self.snapshots.append({
+            'state': state,
+            'events': output.event_count(),
+            'last_event_arg': output.event_args[-1] if len(output.event_args) else 0,
+            'stats': len(output.stat_processes),
+            'idle_time': output.idle_time,
+        })
+        del self.snapshots[:-self.keep]
+        self.next_due = state['time'] + self.every
+
+    def resume_state(self, output: SchedulerOutput) -> Optional[dict]:
+        """
+        If there is a snapshot to continue from, restore the output recorded up to it into
+        `output` and return the engine state to continue with; otherwise return None.
+        """
+        if self.resume is None:
+            return None
+        snapshot, saved = self.resume, self.resume_output
+        events, stats = snapshot['events'], snapshot['stats']
+        output.event_ticks = saved.event_ticks[:events]
+        output.event_kinds = saved.event_kinds[:events]
+        output.event_processes = saved.event_processes[:events]
+        output.event_args = saved.event_args[:events]
+        output.event_cpus = saved.event_cpus[:events]
+        if events:
+            # An idle stretch at the end may have been extended after the snapshot
+            output.event_args[-1] = snapshot['last_event_arg']
+        output.stat_processes = saved.stat_processes[:stats]
+        output.stat_waits = saved.stat_waits[:stats]
+        output.stat_turnarounds = saved.stat_turnarounds[:stats]
+        output.stat_responses = saved.stat_responses[:stats]
+        output.idle_time = snapshot['idle_time']
+        return self.resume_engine_state
+
+def arrival_prefix_digests(table: ProcessTable, order: Sequence[int], counts: List[int]) -> List[str]:
+    """
+    Fingerprints of the first processes in arrival order, for each of `counts` (ascending): the
+    table index and every field of each process. Computed in one pass over the longest prefix.
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    digests = []
+    start = 0
+    for count in counts:
+        positions = order[start:count]
+        digest.update(array('q', positions).tobytes())
+        for column in [table.arrivals, table.bursts, table.tickets, table.priorities]:
+            digest.update(array('q', map(column.__getitem__, positions)).tobytes())
+        digest.update('\0'.join(map(table.names.__getitem__, positions)).encode('utf-8') + b'\0')
+        digests.append(digest.copy().hexdigest())
+        start = count
+    return digests
+
+def checkpoint_settings(scheduler: Scheduler) -> Dict[str, object]:
+    """The settings a checkpoint depends on, besides the processes."""
+    from cache import ENGINE_VERSION
+    return {'use': scheduler.use, 'preemptive': scheduler.preemptive, 'quantum': scheduler.quantum,
+            'quanta': scheduler.quanta, 'boost': scheduler.boost, 'aging': scheduler.aging, 'cpus': scheduler.cpus,
+            'steal': scheduler.steal, 'seed': scheduler.seed, 'engine': ENGINE_VERSION}
+
+def arrived_by(table: ProcessTable, order: Sequence[int], time_tick: int) -> int:
+    """Number of processes arriving at or before `time_tick`."""
+    return bisect.bisect_right(order, time_tick, key=table.arrivals.__getitem__)
+
+def write_checkpoint(file_path: str, scheduler: Scheduler, output: SchedulerOutput, checkpointer: Checkpointer):
+    """
+    Write the snapshots of a finished run, with its output, to a checkpoint file.
+
+    Each snapshot at time T records a fingerprint of the processes arriving at or before T: the
+    engine state at T depends on those processes only, so the snapshot stays valid for any
+    workload that keeps them unchanged (processes arriving after T may be added or changed).
+
+    :param file_path: Path of the checkpoint file.
+    :param scheduler: The Scheduler of the run.
+    :param output: The output of the run (with its event log).
+    :param checkpointer: The Checkpointer that took the snapshots.
+    """
+    import pickle
+    import zlib
+    from cache import serialize_output
+    table = scheduler.table
+    order = table.arrival_order()
+    snapshots = sorted(checkpointer.snapshots, key=lambda snapshot: snapshot['state']['time'])
+    counts = [arrived_by(table, order, snapshot['state']['time']) for snapshot in snapshots]
+    for snapshot, count, digest in zip(snapshots, counts, arrival_prefix_digests(table, order, counts)):
+        snapshot['arrived'] = count
+        snapshot['digest'] = digest
+
+    document = {'version': CHECKPOINT_VERSION, 'settings': checkpoint_settings(scheduler),
+                'output': serialize_output(output), 'snapshots': snapshots}
+    temporary = f"{file_path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(zlib.compress(pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL), 6))
+    os.replace(temporary, file_path)
+
+def load_checkpoint(file_path: str, scheduler: Scheduler, every: int) -> Checkpointer:
+    """
+    Prepare a run of `scheduler`, continuing from the latest snapshot of a checkpoint file that is
+    still valid for it: same algorithm settings and engine version, a time before the new runfor,
+    and the same processes arriving up to that time.
+
+    Warning: checkpoint files are pickles, and unpickling runs whatever code the file says, so only
+    load checkpoint files this program wrote for you; never one from an untrusted source.
+
+    :param file_path: Path of the checkpoint file (it may not exist).
+    :param scheduler: The Scheduler about to run.
+    :param every: Simulated ticks between new snapshots.
+    :return: A Checkpointer, resuming from a snapshot if one is valid.
+    """
+    import pickle
+    import zlib
+    from cache import deserialize_output
+    try:
+        with open(file_path, 'rb') as file:
+            document = pickle.loads(zlib.decompress(file.read()))
+    except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+        return Checkpointer(every)
+    if document.get('version') != CHECKPOINT_VERSION or document['settings'] != checkpoint_settings(scheduler):
+        return Checkpointer(every)
+
+    table = scheduler.table
+    order = table.arrival_order()
+    candidates = [snapshot for snapshot in document['snapshots']
+                  if snapshot['state']['time'] < scheduler.runfor
+                  and arrived_by(table, order, snapshot['state']['time']) == snapshot['arrived']]
+    digests = arrival_prefix_digests(table, order, [snapshot['arrived'] for snapshot in candidates])
+    valid = [snapshot for snapshot, digest in zip(candidates, digests) if snapshot['digest'] == digest]
+    if not valid:
+        return Checkpointer(every)
+
+    # The engine modifies the state it resumes with; the snapshot itself stays in the next checkpoint file
+    state = pickle.loads(pickle.dumps(valid[-1]['state'], protocol=pickle.HIGHEST_PROTOCOL))
+    return Checkpointer(every, resume=valid[-1], resume_output=deserialize_output(document['output'], scheduler),
+                        resume_engine_state=state, snapshots=valid)
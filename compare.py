@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple, TextIO
+from input import Scheduler
+from output import NullSink
+from runner import run_scheduler
+from tracefile import trace_chunks, decode_trace
+from metrics import run_metrics, METRIC_NAMES
+from registry import SCHEDULERS
+
+# Workload shared by the runs of a comparison. Worker processes map the binary trace from shared
+# memory instead of receiving a pickled copy, and keep the mapping open while they run.
+COMPARE_WORKLOAD: Optional[Scheduler] = None
+COMPARE_MEMORY: Optional[shared_memory.SharedMemory] = None
+
+# Quantum of the algorithms that need one when the workload has none
+COMPARE_QUANTUM = 4
+
+# Aggregates of each per-process metric shown in the comparison table
+COMPARE_AGGREGATES = ['mean', 'p95', 'max']
+
+def compare_name(use: str, preemptive: bool) -> str:
+    """Name of an algorithm in a comparison, e.g. 'ljf' or 'ljf-preemptive'."""
+    return f"{use}-preemptive" if preemptive else use
+
+def compare_algorithms(cpus: int = 1) -> List[Tuple[str, bool]]:
+    """
+    Every registered algorithm and preemptive variant, as (use, preemptive), that can run on `cpus` CPUs.
+    """
+    algorithms = []
+    for name, spec in SCHEDULERS.items():
+        if cpus > 1 and not spec.multicore:
+            continue
+        algorithms.append((name, False))
+        if spec.preemptive == 'optional':
+            algorithms.append((name, True))
+    return algorithms
+
+def parse_compare_algorithms(spec: str) -> List[Tuple[str, bool]]:
+    """Parse a comma-separated list of algorithm names, e.g. 'fcfs,rr,ljf-preemptive'."""
+    names = {compare_name(use, preemptive): (use, preemptive) for use, preemptive in compare_algorithms()}
+    algorithms = []
+    for name in spec.split(','):
+        if name.strip() not in names:
+            raise ValueError(f"Error: Unknown algorithm '{name}'. Valid values: {', '.join(names)}")
+        algorithms.append(names[name.strip()])
+    return list(dict.fromkeys(algorithms))
+
+def share_workload(scheduler: Scheduler) -> shared_memory.SharedMemory:
+    """
+    Copy a workload into a new block of shared memory, in the binary trace format. The caller
+    closes and unlinks the block once the workers are done.
+    """
+    chunks = trace_chunks(scheduler)
+    memory = shared_memory.SharedMemory(create=True, size=max(1, sum(map(len, chunks))))
+    offset = 0
+    for chunk in chunks:
+        memory.buf[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+    return memory
+
+def attach_compare_workload(name: str):
+    """Pool initializer: map the shared trace of the comparison, read-only, in the worker process."""
+    global COMPARE_WORKLOAD, COMPARE_MEMORY
+    COMPARE_MEMORY = shared_memory.SharedMemory(name=name)
+    COMPARE_WORKLOAD = decode_trace(COMPARE_MEMORY.buf.toreadonly(), f"shared memory {name}")
+
+def set_compare_workload(scheduler: Scheduler):
+    """Use a workload already loaded in this process, for comparisons without worker processes."""
+    global COMPARE_WORKLOAD
+    COMPARE_WORKLOAD = scheduler
+
+def compare_scheduler(workload: Scheduler, use: str, preemptive: bool) -> Scheduler:
+    """
+    The run of one algorithm over a workload: the same processes (shared, not copied), with the
+    workload's own settings kept where they apply to the algorithm.
+    Raises ValueError if the algorithm cannot run the workload (e.g. on several CPUs).
+    """
+    spec = SCHEDULERS[use]
+    quantum = (workload.quantum or COMPARE_QUANTUM) if spec.quantum else None
+    return Scheduler(processcount=workload.processcount, runfor=workload.runfor, use=use, quantum=quantum,
+                     seed=workload.seed, preemptive=preemptive, table=workload.table,
+                     quanta=workload.quanta if spec.feedback else None, boost=workload.boost if spec.feedback else None,
+                     aging=workload.aging if spec.aging else None, cpus=workload.cpus, steal=workload.steal)
+
+def run_compare_algorithm(algorithm: Tuple[str, bool]) -> Tuple[str, Dict[str, object], float]:
+    """
+    Run one algorithm over the comparison workload. Every run keeps its own state, so the runs
+    never see each other's changes.
+
+    :param algorithm: The algorithm, as (use, preemptive).
+    :return: The name of the algorithm, the metrics of the run (see run_metrics) and the time it took, in seconds.
+    """
+    use, preemptive = algorithm
+    scheduler = compare_scheduler(COMPARE_WORKLOAD, use, preemptive)
+    start = time.perf_counter()
+    output = run_scheduler(scheduler, NullSink())
+    seconds = time.perf_counter() - start
+    return compare_name(use, preemptive), run_metrics(output), seconds
+
+def compare_schedulers(scheduler: Scheduler, algorithms: List[Tuple[str, bool]],
+                       workers: Optional[int] = None) -> List[Tuple[str, Dict[str, object], float]]:
+    """
+    Run several algorithms over one workload, in parallel. The workload is parsed once by the
+    caller and placed in shared memory once, where every worker process reads it in place.
+
+    :param scheduler: The workload.
+    :param algorithms: The algorithms to run, as (use, preemptive).
+    :param workers: Number of worker processes (None for one per CPU, 1 to run in this process).
+    :return: The result of run_compare_algorithm for each algorithm, in the order of `algorithms`.
+    """
+    # Report settings an algorithm cannot run with before starting any worker
+    for use, preemptive in algorithms:
+        compare_scheduler(scheduler, use, preemptive)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(algorithms), 1))
+    if workers == 1:
+        set_compare_workload(scheduler)
+        return [run_compare_algorithm(algorithm) for algorithm in algorithms]
+
+    memory = share_workload(scheduler)
+    try:
+        with multiprocessing.Pool(workers, initializer=attach_compare_workload, initargs=(memory.name,)) as pool:
+            return pool.map(run_compare_algorithm, algorithms, 1)
+    finally:
+        memory.close()
+        memory.unlink()
+
+def print_compare_table(results: List[Tuple[str, Dict[str, object], float]], process_count: int,
+                        file: Optional[TextIO] = None):
+    """
+    Print the metrics of each algorithm side by side: one column per algorithm, one row per metric.
+
+    :param results: The results returned by compare_schedulers.
+    :param process_count: Number of processes in the workload.
+    :param file: Where to print the table (standard output by default).
+    """
+    file = file or sys.stdout
+    rows = [('Completed', [f"{metrics['completed']}/{process_count}" for _, metrics, _ in results]),
+            ('Finished at', [str(metrics['elapsed']) for _, metrics, _ in results]),
+            ('Utilization', [f"{metrics['utilization']:.2%}" for _, metrics, _ in results]),
+            ('Throughput', [f"{metrics['throughput']:.4f}" for _, metrics, _ in results])]
+    for metric in METRIC_NAMES:
+        for aggregate in COMPARE_AGGREGATES:
+            rows.append((f"{metric} {aggregate}", [f"{metrics[metric][aggregate]:.2f}" if aggregate == 'mean'
+                                                   else str(metrics[metric][aggregate]) for _, metrics, _ in results]))
+    rows.append(('Time (s)', [f"{seconds:.3f}" for _, _, seconds in results]))
+
+    label_width = max(len(label) for label, _ in rows)
+    widths = [max(len(name), *(len(cells[column]) for _, cells in rows)) for column, (name, _, _) in enumerate(results)]
+    file.write(f"{'':<{label_width}}" + "".join(f"  {name:>{width}}" for (name, _, _), width in zip(results, widths)) + "\n")
+    for label, cells in rows:
+        file.write(f"{label:<{label_width}}" + "".join(f"  {cell:>{width}}" for cell, width in zip(cells, widths)) + "\n")
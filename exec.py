@@ -1,79 +1,367 @@
 import argparse
-import os
 import sys
-from input import parse_scheduler_file
-from output import SchedulerOutput
+import time
+from typing import List, Optional
+from tracefile import load_scheduler, convert_trace, write_trace, write_text_trace
+from output import SchedulerOutput, TextSink, JsonlSink, NullSink
 from rendering import print_scheduler_output
-from lottery import lottery_scheduler
-from roundrobin import round_robin_scheduler
-from FCFS import fcfs_scheduler
-from LJF import ljf_scheduler
-from SJF import sjf_scheduler
+from instrumentation import PROFILERS, RunProfile, CountingSink, profile_phase, run_profiled
+from runner import run_scheduler, write_scheduler_output_to_file, remove_file_extension, find_workload_files, run_batch, print_batch_summary
+
+# Only what scheduling a single file needs is imported up front: exec.py is started once per
+# workload by batch jobs, so the modules of the sub-commands and options are imported when used
+
+# Sub-commands; anything else on the command line is the file to schedule
+COMMANDS = ['convert', 'batch', 'sweep', 'compare', 'query', 'generate', 'benchmark', 'online']
+
+def get_arguments_from_command_line(argv: List[str]) -> argparse.Namespace:
+    if argv and argv[0] in COMMANDS:
+        return get_command_arguments(argv)
 
-def get_file_from_command_line() -> str:
     # Create an ArgumentParser object
     parser = argparse.ArgumentParser(description="Process a file path from the command line.")
 
     # Add an argument for the file path
     parser.add_argument('file', type=str, help="Path to the file")
 
+    # Streaming mode writes events as they happen instead of keeping them all in memory
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--stream', choices=['text', 'jsonl', 'null'],
+                       help="Stream events to a sink while simulating: the text output format, JSON lines, or nowhere (for benchmarking)")
+
+    # Compact text output: long idle stretches and lottery runs are written as one line
+    parser.add_argument('--compact', action='store_true',
+                        help="Write each idle stretch and each run of lottery wins on one line, e.g. 'Process A selected (Lottery, 12 ticks)', instead of one line per tick")
+
+    # Instrumentation: phase timings and engine counters, or a full profile of the run
+    parser.add_argument('--counters', action='store_true',
+                        help="Print the time spent in each phase (parse, simulate, sort, format, write, report) and the engine counters to standard error")
+    parser.add_argument('--profile', choices=PROFILERS,
+                        help="Run under cProfile or tracemalloc and write a report to '<name>.prof' or '<name>.tracemalloc.txt'")
+    parser.add_argument('--profile-output', type=str, default=None, help="Where to write the --profile report")
+
+    # Result cache: a run already done with the same workload and settings is rendered from the cache
+    parser.add_argument('--cache', type=str, default=None, metavar='DIR',
+                        help="Cache results in this directory and reuse them instead of simulating again (not with --stream; lottery only with a seed)")
+    parser.add_argument('--cache-size', type=int, default=None, metavar='MB',
+                        help="Maximum size of the cache; least recently used results are evicted (default: 256)")
+
+    # Checkpoints: snapshots of the engine state, so a run of a grown trace resumes instead of starting over
+    parser.add_argument('--checkpoint', action='store_true',
+                        help="Resume from '<name>.checkpoint' if it is still valid for the workload, and write the snapshots of this run to it (not with --stream or --summary)")
+    parser.add_argument('--checkpoint-every', type=int, default=None, metavar='TICKS',
+                        help="Simulated ticks between snapshots (default: runfor / 32)")
+
+    # Summary mode keeps no event log and prints aggregate metrics instead of the per-process listing
+    modes.add_argument('--summary', action='store_true',
+                       help="Print only summary metrics (mean, median, p95, p99, max, utilization, throughput); no output file is written")
+
     # Parse the arguments from the command line
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.checkpoint and (args.stream or args.summary):
+        parser.error("--checkpoint needs the in-memory event log; it cannot be used with --stream or --summary")
+    args.command = None
+    return args
+
+def get_command_arguments(argv: List[str]) -> argparse.Namespace:
+    from generator import ARRIVAL_PATTERNS, BURST_DISTRIBUTIONS
+    from benchmark import BENCHMARK_ALGORITHMS, BENCHMARK_SIZES, benchmark_name
+
+    parser = argparse.ArgumentParser(description="Scheduler tools.")
+    commands = parser.add_subparsers(dest='command', required=True)
 
-    # Get the file path from the parsed arguments
-    file_path = args.file
-    return file_path
+    convert = commands.add_parser('convert', help="Convert a workload between the text format and the binary trace format")
+    convert.add_argument('source', type=str, help="Workload to convert (text or binary trace)")
+    convert.add_argument('destination', type=str, help="Converted workload; binary if it ends in '.trace', text otherwise")
 
-def write_scheduler_output_to_file(scheduler_output: SchedulerOutput, file_path: str):
+    batch = commands.add_parser('batch', help="Schedule many workloads in parallel and compare each output to its .out file")
+    batch.add_argument('paths', type=str, nargs='+', help="Workload files, directories (their .in and .trace files) or glob patterns")
+    batch.add_argument('--workers', type=int, default=None,
+                       help="Number of worker processes (default: one per CPU; 1 runs everything in this process)")
+
+    sweep = commands.add_parser('sweep', help="Run round robin over several quanta and compare their statistics")
+    sweep.add_argument('file', type=str, help="Workload to schedule (any 'use'; it is run with round robin)")
+    sweep.add_argument('--quanta', type=str, required=True,
+                       help="Quanta to evaluate: values and inclusive ranges, e.g. '1-10', '1,2,4,8' or '2-20:2'")
+    sweep.add_argument('--workers', type=int, default=None,
+                       help="Number of worker processes (default: one per CPU; 1 runs everything in this process)")
+    sweep.add_argument('--events', action='store_true',
+                       help="Also write the full output of each run to '<name>.q<quantum>.out.test'")
+
+    compare = commands.add_parser('compare', help="Run several algorithms over one workload and compare their metrics side by side")
+    compare.add_argument('file', type=str, help="Workload to schedule; its 'use' is ignored, its other settings are kept where they apply")
+    compare.add_argument('--algorithms', type=str, default=None,
+                         help="Comma-separated algorithms, e.g. 'fcfs,rr,ljf-preemptive' (default: every algorithm that runs on the workload's CPUs)")
+    compare.add_argument('--workers', type=int, default=None,
+                         help="Number of worker processes (default: one per CPU; 1 runs everything in this process)")
+
+    query = commands.add_parser('query', help="Schedule a workload, then answer questions about what happened at any time of the run")
+    query.add_argument('file', type=str, help="Workload to schedule")
+    query.add_argument('--query', '-q', type=str, action='append', default=None,
+                       help="Query to answer, e.g. 'at 120' or 'slices 100 200' (repeatable; default: read queries from standard input, 'help' lists them)")
+    query.add_argument('--cache', type=str, default=None, metavar='DIR',
+                       help="Take the run from this result cache if it is there, and store it otherwise")
+
+    generate = commands.add_parser('generate', help="Generate a synthetic workload")
+    generate.add_argument('destination', type=str, help="Workload to write; binary if it ends in '.trace', text otherwise")
+    generate.add_argument('--count', type=int, required=True, help="Number of processes")
+    generate.add_argument('--seed', type=int, default=None, help="Seed of the generator (also used as the lottery seed)")
+    generate.add_argument('--arrivals', choices=ARRIVAL_PATTERNS, default='poisson', help="Arrival process (default: poisson)")
+    generate.add_argument('--rate', type=float, default=0.1, help="Average arrivals per tick (default: 0.1)")
+    generate.add_argument('--burst-size', type=float, default=10.0, help="Average processes per group of bursty arrivals (default: 10)")
+    generate.add_argument('--bursts', choices=BURST_DISTRIBUTIONS, default='exponential', help="Burst time distribution (default: exponential)")
+    generate.add_argument('--mean-burst', type=float, default=8.0, help="Mean burst time (default: 8)")
+    generate.add_argument('--shape', type=float, default=None, help="Pareto alpha or lognormal sigma (default: 1.5)")
+    generate.add_argument('--max-tickets', type=int, default=1, help="Give each process 1 to N lottery tickets (default: 1)")
+    generate.add_argument('--priorities', type=int, default=1, help="Give each process a priority from 0 to N-1 (default: 1, all 0)")
+    generate.add_argument('--runfor', type=int, default=None, help="Ticks to run (default: until every process can finish)")
+    generate.add_argument('--use', type=str, default='fcfs', help="Algorithm named in the workload (default: fcfs); add ' preemptive' for the preemptive variant")
+    generate.add_argument('--quantum', type=int, default=None, help="Quantum, for 'rr' (the top level quantum for 'mlfq')")
+    generate.add_argument('--cpus', type=int, default=1, help="Number of CPUs (default: 1)")
+    generate.add_argument('--steal', action='store_true', help="Let idle CPUs steal work from the others (with --cpus)")
+
+    benchmark = commands.add_parser('benchmark', help="Benchmark every scheduler over a ladder of generated workloads")
+    benchmark.add_argument('--sizes', type=str, default=",".join(map(str, BENCHMARK_SIZES)),
+                           help="Comma-separated numbers of processes (default: %(default)s)")
+    benchmark.add_argument('--algorithms', type=str,
+                           default=",".join(benchmark_name(use, preemptive) for use, preemptive in BENCHMARK_ALGORITHMS),
+                           help="Comma-separated schedulers (default: %(default)s)")
+    benchmark.add_argument('--seed', type=int, default=1, help="Seed of the generated workloads (default: 1)")
+    benchmark.add_argument('--repeat', type=int, default=3, help="Timed runs per case; the fastest is kept (default: 3)")
+    benchmark.add_argument('--no-memory', action='store_true', help="Do not measure peak memory (saves one run per case)")
+    benchmark.add_argument('--output', type=str, default=None, help="Write the results to this JSON file")
+    benchmark.add_argument('--baseline', type=str, default=None, help="Compare against results written earlier with --output")
+    benchmark.add_argument('--time-threshold', type=float, default=0.25, help="Allowed slowdown against the baseline (default: 0.25 = 25%%)")
+    benchmark.add_argument('--memory-threshold', type=float, default=0.25, help="Allowed peak memory growth against the baseline (default: 0.25)")
+
+    online = commands.add_parser('online', help="Schedule processes as their records arrive, emitting events as soon as they are known")
+    online.add_argument('input', type=str, nargs='?', default=None,
+                        help="Named pipe or file to read records from (default: standard input); records use the workload format, in arrival order")
+    sources = online.add_mutually_exclusive_group()
+    sources.add_argument('--socket', type=str, default=None, metavar='PATH',
+                         help="Listen on a Unix socket instead; clients send records, a record 'end' ends the run")
+    sources.add_argument('--port', type=int, default=None, help="Listen on this TCP port of localhost instead")
+    online.add_argument('--use', type=str, default=None, help="Algorithm (fcfs, sjf, rr, ljf; add ' preemptive' for preemptive ljf); overrides the 'use' directive")
+    online.add_argument('--quantum', type=int, default=None, help="Quantum, for 'rr'; overrides the 'quantum' directive")
+    online.add_argument('--runfor', type=int, default=None,
+                        help="Ticks to run; overrides the 'runfor' directive (default: until the input ends and every process is done)")
+    online.add_argument('--format', choices=['text', 'jsonl'], default='text', help="Output format (default: text)")
+    online.add_argument('--output', type=str, default=None, help="Write the events to this file (default: standard output)")
+
+    return parser.parse_args(argv)
+
+def stream_scheduler_output_to_file(scheduler, stream_format: str, file_path: Optional[str],
+                                    profile: Optional[RunProfile] = None, expand: bool = True) -> SchedulerOutput:
     """
-    Write the SchedulerOutput details to a specified file by redirecting print_output method output to a file.
+    Run the scheduler in streaming mode, writing events to a file while the simulation runs.
 
-    :param scheduler_output: The SchedulerOutput object to be written to the file.
-    :param file_path: The path to the file where the output should be written.
+    :param scheduler: The Scheduler to run.
+    :param stream_format: 'text' for the .out format, 'jsonl' for JSON lines, or 'null' to discard events.
+    :param file_path: The path to the file where the output should be written (unused for 'null').
+    :param profile: If given, the events are counted and the run is timed (simulating and writing are one phase).
+    :param expand: Write idle stretches and lottery runs one line per tick in the text format (False: one line each).
+    :return: The SchedulerOutput of the run, without an event log.
     """
-    # Redirect standard output to a file
-    with open(file_path, 'w') as file:
-        # Save the original stdout
-        original_stdout = sys.stdout
-        sys.stdout = file
-        
-        # Call the print_output method to write to the file
-        scheduler_output.print_output()
-        
-        # Restore the original stdout
-        sys.stdout = original_stdout
-
-def remove_file_extension(file_path: str) -> str:
+    if stream_format == 'null':
+        sink = NullSink()
+        with profile_phase(profile, 'simulate'):
+            output = run_scheduler(scheduler, CountingSink(sink, profile) if profile else sink)
+            sink.finish(output)
+        print(f"{sink.event_count} events")
+        return output
+
+    with open(file_path, 'w', buffering=1 << 20) as file:
+        sink = TextSink(file, expand=expand) if stream_format == 'text' else JsonlSink(file)
+        with profile_phase(profile, 'simulate'):
+            output = run_scheduler(scheduler, CountingSink(sink, profile) if profile else sink)
+            sink.finish(output)
+    print(f"Output written to {file_path}")
+    return output
+
+def main(argv: List[str]):
+    args = get_arguments_from_command_line(argv)
+
+    if args.command == 'convert':
+        convert_trace(args.source, args.destination)
+        print(f"Converted {args.source} to {args.destination}")
+        return
+
+    if args.command == 'generate':
+        from generator import generate_workload
+        use, _, variant = args.use.partition(' ')
+        scheduler = generate_workload(args.count, seed=args.seed, arrivals=args.arrivals, rate=args.rate,
+                                      bursts=args.bursts, mean_burst=args.mean_burst, shape=args.shape,
+                                      burst_size=args.burst_size, max_tickets=args.max_tickets, runfor=args.runfor,
+                                      use=use, quantum=args.quantum, preemptive=variant.strip() == 'preemptive',
+                                      max_priority=args.priorities, cpus=args.cpus, steal=args.steal)
+        if args.destination.endswith('.trace'):
+            write_trace(scheduler, args.destination)
+        else:
+            write_text_trace(scheduler, args.destination)
+        print(f"Generated {args.count} processes in {args.destination}")
+        return
+
+    if args.command == 'benchmark':
+        from benchmark import parse_benchmark_algorithms, run_benchmarks, write_benchmark_results, read_benchmark_results, compare_benchmarks, print_benchmark_table
+        results = run_benchmarks([int(size) for size in args.sizes.split(',')], parse_benchmark_algorithms(args.algorithms),
+                                 seed=args.seed, repeat=args.repeat, measure_memory=not args.no_memory, progress=sys.stderr)
+        print_benchmark_table(results)
+        if args.output:
+            write_benchmark_results(results, args.output, args.seed)
+            print(f"Results written to {args.output}")
+        if args.baseline:
+            regressions = compare_benchmarks(results, read_benchmark_results(args.baseline),
+                                             args.time_threshold, args.memory_threshold)
+            for regression in regressions:
+                print(f"Regression: {regression}")
+            if regressions:
+                sys.exit(1)
+            print(f"No regressions against {args.baseline}")
+        return
+
+    if args.command == 'online':
+        import asyncio
+        from online import OnlineSession, run_online
+        if args.input is not None and (args.socket is not None or args.port is not None):
+            print("Error: give an input file or a socket, not both")
+            sys.exit(2)
+        settings = {name: str(value) for name, value in [('use', args.use), ('quantum', args.quantum), ('runfor', args.runfor)]
+                    if value is not None}
+        file = open(args.output, 'w') if args.output else sys.stdout
+        try:
+            asyncio.run(run_online(OnlineSession(file, args.format, settings), args.input, args.socket, args.port))
+        except ValueError as error:
+            print(f"Error: {error}", file=sys.stderr)
+            sys.exit(2)
+        finally:
+            if args.output:
+                file.close()
+        return
+
+    if args.command in ['batch', 'sweep', 'compare'] and args.workers is not None and args.workers < 1:
+        print("Error: --workers must be at least 1")
+        sys.exit(2)
+
+    if args.command == 'sweep':
+        from sweep import parse_quanta, sweep_quanta, print_sweep_table
+        scheduler = load_scheduler(args.file)
+        events_root = remove_file_extension(args.file) if args.events else None
+        results = sweep_quanta(scheduler, parse_quanta(args.quanta), args.workers, events_root)
+        print_sweep_table(results, len(scheduler.table))
+        return
+
+    if args.command == 'compare':
+        from compare import compare_algorithms, parse_compare_algorithms, compare_schedulers, print_compare_table
+        scheduler = load_scheduler(args.file)
+        try:
+            algorithms = parse_compare_algorithms(args.algorithms) if args.algorithms else compare_algorithms(scheduler.cpus)
+            results = compare_schedulers(scheduler, algorithms, args.workers)
+        except ValueError as error:
+            print(error)
+            sys.exit(2)
+        print_compare_table(results, len(scheduler.table))
+        return
+
+    if args.command == 'query':
+        from timeline import Timeline, run_queries
+        scheduler = load_scheduler(args.file)
+        run = lambda: run_scheduler(scheduler)
+        if args.cache:
+            from cache import ResultCache, DEFAULT_CACHE_SIZE
+            output = ResultCache(args.cache, DEFAULT_CACHE_SIZE).run(scheduler, run)
+        else:
+            output = run()
+        timeline = Timeline(output, scheduler.table.arrivals)
+        # Queries typed at a terminal get a prompt; the index is built once for all of them
+        prompt = "> " if args.query is None and sys.stdin.isatty() else ""
+        failed = run_queries(timeline, args.query if args.query is not None else sys.stdin, sys.stdout, prompt)
+        if failed and args.query is not None:
+            sys.exit(2)
+        return
+
+    if args.command == 'batch':
+        start = time.perf_counter()
+        results = run_batch(find_workload_files(args.paths), args.workers)
+        print_batch_summary(results, time.perf_counter() - start)
+        # Any difference or error fails the batch, so it can gate a regression run
+        if any(status != 'same' and status != 'no .out' for _, _, status in results):
+            sys.exit(1)
+        return
+
+    profile = RunProfile() if args.counters else None
+    if args.profile:
+        extension = ".prof" if args.profile == 'cprofile' else ".tracemalloc.txt"
+        report_path = args.profile_output or remove_file_extension(args.file) + extension
+        output = run_profiled(lambda: schedule_file(args, profile), args.profile, report_path)
+    else:
+        output = schedule_file(args, profile)
+
+    if profile is not None:
+        profile.print_report(output)
+
+def schedule_file(args: argparse.Namespace, profile: Optional[RunProfile] = None) -> SchedulerOutput:
     """
-    Remove the file extension from a file path, if present.
+    Schedule the file given on the command line and write or print its output as the options ask.
 
-    :param file_path: The path of the file from which the extension should be removed.
-    :return: The file path without the extension.
+    :param args: The parsed command line.
+    :param profile: If given, each phase of the run is timed.
+    :return: The SchedulerOutput of the run.
     """
-    # Split the file path into root and extension
-    root, _ = os.path.splitext(file_path)
-    return root
-    
-file = get_file_from_command_line()
-
-scheduler = parse_scheduler_file(file)
-
-match scheduler.use:
-    case 'sjf':
-        output = sjf_scheduler(scheduler)
-    case 'fcfs':
-        output = fcfs_scheduler(scheduler)
-    case 'rr':
-        output = round_robin_scheduler(scheduler)
-    case 'lottery':
-        output = lottery_scheduler(scheduler)
-    case 'ljf':
-        output = ljf_scheduler(scheduler)
-    case _:
-        print("Unknown algorithm!")
-        exit(1)
-
-destination = remove_file_extension(file) + ".out.test"
-write_scheduler_output_to_file(output, destination)
-
-print_scheduler_output(output)
+    file = args.file
+
+    # Text input files and binary traces are both accepted
+    with profile_phase(profile, 'parse'):
+        scheduler = load_scheduler(file)
+
+    cache = None
+    if args.cache:
+        from cache import ResultCache, DEFAULT_CACHE_SIZE
+        cache = ResultCache(args.cache, args.cache_size << 20 if args.cache_size is not None else DEFAULT_CACHE_SIZE)
+
+    if args.summary:
+        from metrics import print_metrics_summary
+        sink = NullSink()
+        with profile_phase(profile, 'simulate'):
+            run = lambda: run_scheduler(scheduler, CountingSink(sink, profile) if profile else sink)
+            output = cache.run(scheduler, run, mode='summary') if cache else run()
+        with profile_phase(profile, 'report'):
+            print_metrics_summary(output)
+    elif args.stream:
+        extension = ".jsonl" if args.stream == 'jsonl' else ".out.test"
+        output = stream_scheduler_output_to_file(scheduler, args.stream, remove_file_extension(file) + extension, profile,
+                                                 expand=not args.compact)
+    else:
+        with profile_phase(profile, 'simulate'):
+            if args.checkpoint:
+                run = lambda: run_checkpointed(scheduler, remove_file_extension(file) + ".checkpoint", args.checkpoint_every)
+            else:
+                run = lambda: run_scheduler(scheduler)
+            output = cache.run(scheduler, run) if cache else run()
+
+        destination = remove_file_extension(file) + ".out.test"
+        write_scheduler_output_to_file(output, destination, profile, expand=not args.compact)
+
+        with profile_phase(profile, 'report'):
+            print_scheduler_output(output)
+    return output
+
+def run_checkpointed(scheduler, file_path: str, every: Optional[int] = None) -> SchedulerOutput:
+    """
+    Run the scheduler from the latest valid snapshot of a checkpoint file (or from the start), then
+    write this run's snapshots back to the file.
+
+    :param scheduler: The Scheduler to run.
+    :param file_path: Path of the checkpoint file.
+    :param every: Simulated ticks between snapshots (default: default_checkpoint_interval).
+    :return: The SchedulerOutput of the run, identical to that of a run from the start.
+    """
+    from checkpoint import default_checkpoint_interval, load_checkpoint, write_checkpoint
+    checkpointer = load_checkpoint(file_path, scheduler, every or default_checkpoint_interval(scheduler))
+    if checkpointer.resume is not None:
+        print(f"Resuming from the checkpoint at time {checkpointer.resume['state']['time']}")
+    output = run_scheduler(scheduler, checkpointer=checkpointer)
+    write_checkpoint(file_path, scheduler, output, checkpointer)
+    return output
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,94 @@
+import math
+import random
+from typing import Optional
+from input import Scheduler, ProcessTable
+
+# Arrival processes and burst distributions understood by generate_workload
+ARRIVAL_PATTERNS = ['poisson', 'bursty']
+BURST_DISTRIBUTIONS = ['exponential', 'pareto', 'lognormal']
+
+def draw_burst(rng: random.Random, distribution: str, mean: float, shape: float) -> float:
+    """
+    Draw one burst time (before rounding) with the given mean.
+
+    :param rng: The random number generator.
+    :param distribution: 'exponential', or a heavy-tailed 'pareto' or 'lognormal'.
+    :param mean: Mean of the distribution.
+    :param shape: Pareto shape (alpha, > 1; smaller is heavier) or lognormal sigma.
+    """
+    match distribution:
+        case 'exponential':
+            return rng.expovariate(1 / mean)
+        case 'pareto':
+            # paretovariate has minimum 1 and mean alpha / (alpha - 1)
+            return mean * (shape - 1) / shape * rng.paretovariate(shape)
+        case 'lognormal':
+            return rng.lognormvariate(math.log(mean) - shape * shape / 2, shape)
+        case _:
+            raise ValueError(f"Unknown burst distribution '{distribution}'. Valid values: {', '.join(BURST_DISTRIBUTIONS)}")
+
+def generate_workload(count: int, seed: Optional[int] = None, arrivals: str = 'poisson', rate: float = 0.1,
+                      bursts: str = 'exponential', mean_burst: float = 8.0, shape: Optional[float] = None,
+                      burst_size: float = 10.0, max_tickets: int = 1, runfor: Optional[int] = None,
+                      use: str = 'fcfs', quantum: Optional[int] = None, preemptive: bool = False,
+                      max_priority: int = 1, cpus: int = 1, steal: bool = False) -> Scheduler:
+    """
+    Generate a synthetic workload.
+
+    :param count: Number of processes.
+    :param seed: Seed of the generator; the same seed and parameters always give the same workload.
+    :param arrivals: 'poisson' (exponential gaps between arrivals) or 'bursty' (groups of arrivals at
+                     nearly the same time, with longer gaps between groups; same average rate).
+    :param rate: Average number of arrivals per tick.
+    :param bursts: Burst time distribution: 'exponential', 'pareto' or 'lognormal' (heavy-tailed).
+    :param mean_burst: Mean burst time; every burst is at least 1.
+    :param shape: Pareto alpha (default 1.5) or lognormal sigma (default 1.5); ignored for 'exponential'.
+    :param burst_size: Average number of processes per group for 'bursty' arrivals.
+    :param max_tickets: Each process gets between 1 and max_tickets lottery tickets.
+    :param runfor: Number of ticks to run (default: just long enough for every process to finish).
+    :param use: Algorithm named in the workload.
+    :param quantum: Quantum for 'rr' (the top level quantum for 'mlfq').
+    :param preemptive: Use the preemptive variant of the algorithm.
+    :param max_priority: Each process gets a priority between 0 and max_priority - 1.
+    :param cpus: Number of CPUs the workload runs on.
+    :param steal: Idle CPUs steal work from the others.
+    :return: A Scheduler populated with the generated processes.
+    """
+    if arrivals not in ARRIVAL_PATTERNS:
+        raise ValueError(f"Unknown arrival pattern '{arrivals}'. Valid values: {', '.join(ARRIVAL_PATTERNS)}")
+    if rate <= 0 or mean_burst <= 0:
+        raise ValueError("The arrival rate and the mean burst must be positive.")
+    if shape is None:
+        shape = 1.5
+    if bursts == 'pareto' and shape <= 1:
+        raise ValueError("The Pareto shape must be greater than 1 for the mean burst to exist.")
+
+    rng = random.Random(seed)
+    table = ProcessTable()
+    width = len(str(count - 1)) if count > 1 else 1
+    time = 0.0
+    group_left = 0  # Processes left in the current group of bursty arrivals
+    for index in range(count):
+        if arrivals == 'poisson':
+            time += rng.expovariate(rate)
+        elif group_left > 0:
+            # Within a group, arrivals are a tick or so apart
+            time += rng.expovariate(1.0)
+            group_left -= 1
+        else:
+            # Gaps between groups keep roughly the average rate: burst_size arrivals every burst_size / rate ticks
+            time += rng.expovariate(rate / burst_size)
+            group_left = max(0, round(rng.expovariate(1 / burst_size)) - 1)
+        burst = max(1, round(draw_burst(rng, bursts, mean_burst, shape)))
+        tickets = rng.randint(1, max_tickets) if max_tickets > 1 else 1
+        priority = rng.randrange(max_priority) if max_priority > 1 else 0
+        table.append(f"P{index:0{width}d}", int(time), burst, tickets, priority)
+
+    if runfor is None:
+        # Every algorithm keeps the CPU busy while work is waiting, so all of them finish when FCFS does
+        runfor = 0
+        for arrival, burst in zip(table.arrivals, table.bursts):
+            runfor = max(runfor, arrival) + burst
+
+    return Scheduler(processcount=count, runfor=runfor, use=use, quantum=quantum, seed=seed if use == 'lottery' else None,
+                     preemptive=preemptive, table=table, cpus=cpus, steal=steal)
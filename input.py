@@ -1,53 +1,173 @@
-from typing import List, Optional
+import re
+import sys
+from array import array
+from typing import List, Optional, Dict, Tuple, Sequence
+from registry import SCHEDULERS, get_scheduler_spec
+
+DEFAULT_LEVELS = 3  # Priority levels of a feedback algorithm ('mlfq') when "levels" is not given
 
 class Process:
-    def __init__(self, name: str, arrival: int, burst: int):
+    def __init__(self, name: str, arrival: int, burst: int, tickets: int = 1, priority: int = 0):
         """
         Initialize a Process with a name, arrival time, and burst time.
         
         :param name: The name of the process.
         :param arrival: The arrival time of the process.
         :param burst: The total burst time of the process.
+        :param tickets: Number of lottery tickets held by the process (weight in lottery scheduling).
+        :param priority: Priority of the process in priority scheduling; lower values run first.
         """
         self.name = name
         self.arrival = arrival
         self.burst = burst
-        self.remaining_time = burst  # Initialize remaining time as the total burst time
-        self.start_time = None       # Track start time for response calculation
-        self.response_time = None    # Response time
-        
+        self.tickets = tickets
+        self.priority = priority
+
     def __repr__(self):
         """
         Provide a string representation of the Process for easy debugging and display.
         
         :return: A string representing the Process.
         """
-        return f"Process(name='{self.name}', arrival={self.arrival}, burst={self.burst})"
+        return (f"Process(name='{self.name}', arrival={self.arrival}, burst={self.burst}, tickets={self.tickets}, "
+                f"priority={self.priority})")
+
+class ProcessTable:
+    def __init__(self, names: Optional[Sequence[str]] = None, arrivals: Optional[Sequence[int]] = None,
+                 bursts: Optional[Sequence[int]] = None, tickets: Optional[Sequence[int]] = None,
+                 priorities: Optional[Sequence[int]] = None):
+        """
+        Column-oriented list of processes: one typed array per field, addressed by process index.
+        The columns can also be read-only views, e.g. over a memory-mapped binary trace.
+
+        The table only describes the workload. Engines never modify it; each run keeps its own
+        state (remaining time, first run, ...) in separate arrays indexed the same way, so one
+        table can be shared by any number of runs.
+
+        :param names: Process names.
+        :param arrivals: Arrival times.
+        :param bursts: Burst times.
+        :param tickets: Lottery tickets held by each process.
+        :param priorities: Priority of each process (lower values run first); all 0 if not given.
+        """
+        self.names = names if names is not None else []
+        self.arrivals = arrivals if arrivals is not None else array('q')
+        self.bursts = bursts if bursts is not None else array('q')
+        self.tickets = tickets if tickets is not None else array('q')
+        self.priorities = priorities if priorities is not None else array('q', bytes(8 * len(self.arrivals)))
+
+    def __len__(self):
+        return len(self.arrivals)
+
+    def append(self, name: str, arrival: int, burst: int, tickets: int = 1, priority: int = 0):
+        """Add a row while the workload is being loaded."""
+        self.names.append(sys.intern(name))
+        self.arrivals.append(arrival)
+        self.bursts.append(burst)
+        self.tickets.append(tickets)
+        self.priorities.append(priority)
+
+    def process(self, index: int) -> Process:
+        """Create a Process object for the row at `index`."""
+        return Process(name=self.names[index], arrival=self.arrivals[index], burst=self.bursts[index],
+                       tickets=self.tickets[index], priority=self.priorities[index])
+
+    def arrival_order(self) -> Sequence[int]:
+        """Return the process indices sorted by arrival time (ties keep their order in the table)."""
+        arrivals = self.arrivals
+        if all(arrivals[i] <= arrivals[i + 1] for i in range(len(arrivals) - 1)):
+            return range(len(arrivals))
+        return sorted(range(len(arrivals)), key=arrivals.__getitem__)
 
 class Scheduler:
-    def __init__(self, processcount: int, runfor: int, use: str, quantum: Optional[int] = None, end: str = "EOF"):
+    def __init__(self, processcount: int, runfor: int, use: str, quantum: Optional[int] = None, end: str = "EOF",
+                 seed: Optional[int] = None, preemptive: bool = False, table: Optional[ProcessTable] = None,
+                 levels: Optional[int] = None, quanta: Optional[Sequence[int]] = None, boost: Optional[int] = None,
+                 aging: Optional[int] = None, cpus: int = 1, steal: bool = False):
         """
         Initialize the Scheduler with given parameters.
 
         :param processcount: Number of processes in the list.
         :param runfor: Total number of time ticks to run.
-        :param use: Scheduling algorithm to use ('fcfs', 'sjf', 'rr', 'lottery').
-        :param quantum: Time quantum for round-robin scheduling (required if 'use' is 'rr').
+        :param use: Scheduling algorithm to use, one of the registered algorithms ('fcfs', 'sjf', 'rr', 'lottery', 'ljf', ...).
+        :param quantum: Time quantum, for the algorithms that use one (required by 'rr'; the top level quantum of 'mlfq').
         :param end: End-of-file marker.
+        :param seed: Seed for the random number generator used by lottery scheduling (None for a random seed).
+        :param preemptive: Use the preemptive variant of the algorithm (only for algorithms that have one, e.g. 'ljf').
+        :param table: The processes, if already loaded.
+        :param levels: Number of priority levels of a feedback algorithm ('mlfq'); DEFAULT_LEVELS if not given.
+        :param quanta: Quantum of each level of a feedback algorithm, from the highest priority down. If not
+                       given, the quantum doubles at each level, starting from `quantum`.
+        :param boost: Period, in ticks, at which a feedback algorithm moves every process back to the highest
+                      priority level (None: never).
+        :param aging: For an aging algorithm ('priority'), the ticks of waiting that improve a ready process's
+                      priority by one (None: priorities are static).
+        :param cpus: Number of CPUs; more than one is only supported by the multicore algorithms.
+        :param steal: With several CPUs, a CPU whose run queue is empty takes a process queued on another one.
         """
         self.processcount = processcount
         self.runfor = runfor
         self.use = use
         self.quantum = quantum
-        self.processes: List[Process] = []
+        self.seed = seed
+        self.preemptive = preemptive
+        self.table = table if table is not None else ProcessTable()
         self.end = end
+        self.quanta = list(quanta) if quanta is not None else None
+        self.boost = boost
+        self.aging = aging
+        self.cpus = cpus
+        self.steal = steal
 
         # Validation for the algorithm type and quantum requirement
-        if self.use not in ['fcfs', 'sjf', 'rr', 'lottery', 'ljf']:
-            raise ValueError("Invalid algorithm specified. Valid values: 'fcfs', 'sjf', 'rr', 'lottery', 'ljf'")
+        spec = get_scheduler_spec(self.use)
+
+        # The per-level quanta of a feedback algorithm also give its (top level) quantum
+        if spec.feedback and self.quanta and self.quantum is None:
+            self.quantum = self.quanta[0]
+
+        if spec.quantum and self.quantum is None:
+            raise ValueError(f"Error: Missing quantum parameter when use is '{self.use}'")
+
+        if self.preemptive and spec.preemptive != 'optional':
+            variants = ", ".join(f"'{name}'" for name, other in SCHEDULERS.items() if other.preemptive == 'optional')
+            raise ValueError(f"Error: Only {variants} has a preemptive variant")
+
+        if spec.feedback:
+            if self.quanta is None:
+                self.quanta = [self.quantum << level for level in range(levels if levels is not None else DEFAULT_LEVELS)]
+            elif levels is not None and levels != len(self.quanta):
+                raise ValueError(f"Error: {levels} levels but {len(self.quanta)} quanta given")
+            if not self.quanta or min(self.quanta) < 1:
+                raise ValueError("Error: A feedback algorithm needs at least one level, and every quantum must be at least 1")
+            self.quantum = self.quanta[0]
+            if self.boost is not None and self.boost < 1:
+                raise ValueError("Error: The priority boost period must be at least 1")
+        elif levels is not None or self.quanta is not None or self.boost is not None:
+            algorithms = ", ".join(f"'{name}'" for name, other in SCHEDULERS.items() if other.feedback)
+            raise ValueError(f"Error: Levels, per-level quanta and boost are only used by {algorithms}")
 
-        if self.use == 'rr' and self.quantum is None:
-            raise ValueError("Error: Missing quantum parameter when use is 'rr'")
+        if self.aging is not None:
+            if not spec.aging:
+                algorithms = ", ".join(f"'{name}'" for name, other in SCHEDULERS.items() if other.aging)
+                raise ValueError(f"Error: Aging is only used by {algorithms}")
+            if self.aging < 1:
+                raise ValueError("Error: The aging period must be at least 1")
+
+        if self.cpus < 1:
+            raise ValueError("Error: There must be at least one CPU")
+        if self.cpus > 1 and not spec.multicore:
+            algorithms = ", ".join(f"'{name}'" for name, other in SCHEDULERS.items() if other.multicore)
+            raise ValueError(f"Error: Only {algorithms} can run on more than one CPU")
+        if self.steal and self.cpus == 1:
+            raise ValueError("Error: Work stealing needs more than one CPU")
+
+    @property
+    def processes(self) -> List[Process]:
+        """
+        The processes as Process objects, created on access. Engines read `table` instead.
+        """
+        return [self.table.process(index) for index in range(len(self.table))]
 
     def add_process(self, process: Process):
         """
@@ -55,7 +175,7 @@ class Scheduler:
         
         :param process: The Process object to be added.
         """
-        self.processes.append(process)
+        self.table.append(process.name, process.arrival, process.burst, process.tickets, process.priority)
 
     def __repr__(self):
         """
@@ -64,50 +184,119 @@ class Scheduler:
         :return: A string representing the Scheduler.
         """
         return (f"Scheduler(processcount={self.processcount}, runfor={self.runfor}, "
-                f"use='{self.use}', quantum={self.quantum}, processes={self.processes}, end='{self.end}')")
+                f"use='{self.use}', preemptive={self.preemptive}, quantum={self.quantum}, quanta={self.quanta}, "
+                f"boost={self.boost}, aging={self.aging}, cpus={self.cpus}, steal={self.steal}, seed={self.seed}, processes={self.processes}, end='{self.end}')")
 
-def parse_scheduler_file(file_path: str) -> Scheduler:
+# A process line: "process name <name> arrival <time> burst <time>", optionally followed by "tickets <n>"
+# and then by "priority <n>"
+PROCESS_LINE = re.compile(r'^[ \t]*process[ \t]+name[ \t]+(\S+)[ \t]+arrival[ \t]+(-?\d+)[ \t]+burst[ \t]+(-?\d+)'
+                          r'(?:[ \t]+tickets[ \t]+(-?\d+))?(?:[ \t]+priority[ \t]+(-?\d+))?', re.MULTILINE)
+# Any other directive, with its arguments up to an optional comment
+DIRECTIVE_LINE = re.compile(r'^[ \t]*(processcount|runfor|use|quantum|levels|boost|aging|cpus|seed|end)([^\n#]*)', re.MULTILINE)
+
+def parse_scheduler_columns(file_path: str, chunk_size: int = 1 << 22) -> Tuple[Dict[str, str], Optional[ProcessTable]]:
     """
-    Parses a file to create a Scheduler object with its processes.
-    Reports an error if a quantum is provided for a non-round-robin algorithm.
+    Read a scheduler input file in large chunks into its directives and a column-oriented ProcessTable.
 
     :param file_path: Path to the input file.
-    :return: A Scheduler object populated with data from the file.
+    :param chunk_size: Number of characters read at a time.
+    :return: The directives (name -> arguments) and the processes, or (directives, None) if there is no "end" line.
     """
-    scheduler = None
-    processes = []
-    quantum = None
+    directives: Dict[str, str] = {}
+    table = ProcessTable()
+    ticket_counts = []
+    priority_values = []
 
     with open(file_path, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith('processcount'):
-                processcount = int(line.split()[1])
-            elif line.startswith('runfor'):
-                runfor = int(line.split()[1])
-            elif line.startswith('use'):
-                use = line.split()[1]
-            elif line.startswith('quantum'):
-                quantum = int(line.split()[1])
-            elif line.startswith('process name'):
-                # Extract process details
-                parts = line.split()
-                name = parts[2]
-                arrival = int(parts[4])
-                burst = int(parts[6])
-                # Create and store the process
-                processes.append(Process(name=name, arrival=arrival, burst=burst))
-            elif line.startswith('end'):
-                end = 'EOF'
-                # Validation: Check if quantum is provided for a non-round-robin algorithm
-                if use != 'rr' and quantum is not None:
-                    raise ValueError("Quantum should only be provided for round-robin ('rr') scheduling algorithm.")
-                # Create the Scheduler object when "end" is encountered
-                scheduler = Scheduler(processcount=processcount, runfor=runfor, use=use, quantum=quantum)
-                # Add all the processes to the Scheduler
-                for process in processes:
-                    scheduler.add_process(process)
-                scheduler.end = end
+        leftover = ''
+        while True:
+            data = file.read(chunk_size)
+            chunk = leftover + data
+            # Only parse whole lines; the partial last line is carried over to the next chunk
+            if data:
+                cut = chunk.rfind('\n') + 1
+                chunk, leftover = chunk[:cut], chunk[cut:]
+
+            # Directives are rare; the position of "end" tells where the process list stops
+            end = len(chunk)
+            found_end = False
+            for match in DIRECTIVE_LINE.finditer(chunk):
+                if match.group(1) == 'end':
+                    end = match.start()
+                    found_end = True
+                    break
+                directives[match.group(1)] = match.group(2).strip()
+
+            rows = PROCESS_LINE.findall(chunk, 0, end)
+            table.names.extend([sys.intern(row[0]) for row in rows])
+            table.arrivals.extend([int(row[1]) for row in rows])
+            table.bursts.extend([int(row[2]) for row in rows])
+            ticket_counts.extend([row[3] for row in rows])
+            priority_values.extend([row[4] for row in rows])
+
+            if found_end:
                 break
+            if not data:
+                return directives, None
+
+    # Most processes hold the default single ticket
+    table.tickets.extend([int(tickets) if tickets else 1 for tickets in ticket_counts])
+    table.priorities.extend([int(priority) if priority else 0 for priority in priority_values])
+    for index, tickets in enumerate(table.tickets):
+        if tickets < 1:
+            raise ValueError(f"Process {table.names[index]} must hold at least one lottery ticket.")
+
+    return directives, table
+
+def scheduler_from_columns(directives: Dict[str, str], table: ProcessTable) -> Scheduler:
+    """
+    Create a Scheduler from the directives and processes read by parse_scheduler_columns (or a binary trace).
+    Reports an error if a quantum is provided for an algorithm that does not use one.
+
+    :param directives: Directive name -> arguments, e.g. {'use': 'ljf preemptive', 'runfor': '20'}.
+    :param table: The processes.
+    :return: A Scheduler object populated with the processes.
+    """
+    for directive in ['processcount', 'runfor', 'use']:
+        if directive not in directives:
+            raise ValueError(f"Missing '{directive}' in the scheduler input.")
+
+    # "use ljf preemptive" selects the preemptive variant of an algorithm
+    parts = directives['use'].split()
+    use = parts[0]
+    preemptive = 'preemptive' in parts[1:]
+    quantum = int(directives['quantum'].split()[0]) if 'quantum' in directives else None
+    seed = int(directives['seed'].split()[0]) if 'seed' in directives else None
+    # "quantum 2 4 8" gives each level of a feedback algorithm its own quantum
+    quanta = [int(value) for value in directives['quantum'].split()] if 'quantum' in directives else []
+    levels = int(directives['levels'].split()[0]) if 'levels' in directives else None
+    boost = int(directives['boost'].split()[0]) if 'boost' in directives else None
+    aging = int(directives['aging'].split()[0]) if 'aging' in directives else None
+    # "cpus 4 steal" runs on 4 CPUs with work stealing
+    cpus = directives['cpus'].split() if 'cpus' in directives else ['1']
+
+    # Validation: Check if quantum is provided for an algorithm without one
+    if use in SCHEDULERS and not SCHEDULERS[use].quantum and quantum is not None:
+        valid = ", ".join(f"'{spec.name}'" for spec in SCHEDULERS.values() if spec.quantum)
+        raise ValueError(f"Quantum should only be provided for the scheduling algorithms that use one: {valid}.")
 
+    scheduler = Scheduler(processcount=int(directives['processcount'].split()[0]),
+                          runfor=int(directives['runfor'].split()[0]), use=use, quantum=quantum, seed=seed,
+                          preemptive=preemptive, table=table, levels=levels,
+                          quanta=quanta if len(quanta) > 1 else None, boost=boost, aging=aging,
+                          cpus=int(cpus[0]), steal='steal' in cpus[1:])
+    scheduler.end = 'EOF'
     return scheduler
+
+def parse_scheduler_file(file_path: str) -> Scheduler:
+    """
+    Parses a file to create a Scheduler object with its processes.
+    Reports an error if a quantum is provided for an algorithm that does not use one.
+
+    :param file_path: Path to the input file.
+    :return: A Scheduler object populated with data from the file, or None if the file has no "end" line.
+    """
+    directives, table = parse_scheduler_columns(file_path)
+    if table is None:
+        return None
+    return scheduler_from_columns(directives, table)
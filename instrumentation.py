@@ -0,0 +1,111 @@
+import io
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Optional, TextIO
+from output import SchedulerOutput, EventSink
+
+# Ways to wrap a run for the --profile option
+PROFILERS = ['cprofile', 'tracemalloc']
+
+class RunProfile:
+    def __init__(self):
+        """
+        Phase timings and counters of one run. Only created when instrumentation is requested;
+        without one, the run does nothing beyond the few counters each engine records at the end.
+        """
+        self.phases: Dict[str, float] = {}  # Phase name -> seconds, in the order the phases ran
+        self.events: Optional[int] = None  # Events counted by a CountingSink; None if the run kept its log
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as `name` (parse, simulate, sort, format, write, ...)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def print_report(self, output: SchedulerOutput, file: Optional[TextIO] = None):
+        """
+        Print the phase timings and the counters of the run.
+
+        :param output: The SchedulerOutput of the run.
+        :param file: Where to print the report (standard error by default, so it does not mix with the output).
+        """
+        file = file or sys.stderr
+        lines = ["Phases:\n"]
+        for name, seconds in self.phases.items():
+            lines.append(f"  {name:<10} {seconds * 1000:12.3f} ms\n")
+        lines.append(f"  {'total':<10} {sum(self.phases.values()) * 1000:12.3f} ms\n")
+        lines.append("Counters:\n")
+        counters = {'ticks': output.last_time_tick or 0, **output.counters, 'events': self.events if self.events is not None else output.event_count()}
+        for name, value in counters.items():
+            lines.append(f"  {name:<17} {value:12}\n")
+        file.write("".join(lines))
+
+def profile_phase(profile: Optional[RunProfile], name: str):
+    """Time a block as phase `name` of `profile`, or do nothing if there is no profile."""
+    return profile.phase(name) if profile is not None else nullcontext()
+
+class CountingSink(EventSink):
+    """Forwards events to another sink and counts them, for runs whose events are not kept in memory."""
+    def __init__(self, sink: EventSink, profile: RunProfile):
+        self.sink = sink
+        self.profile = profile
+        profile.events = 0
+
+    def begin(self, output: SchedulerOutput):
+        self.sink.begin(output)
+
+    def event(self, time_tick: int, kind: int, process: int = -1, arg: int = 0, cpu: int = -1):
+        self.profile.events += 1
+        self.sink.event(time_tick, kind, process, arg, cpu)
+
+    def finish(self, output: SchedulerOutput):
+        self.sink.finish(output)
+
+def run_profiled(function: Callable[[], object], profiler: str, report_path: str, file: Optional[TextIO] = None):
+    """
+    Run `function` under cProfile or tracemalloc and dump a report.
+
+    :param function: The work to profile (called without arguments).
+    :param profiler: 'cprofile' (the report is a pstats dump, readable with `python -m pstats`) or
+                     'tracemalloc' (the report gives the peak and lists the lines holding the most memory
+                     at the end of the run).
+    :param report_path: Where to write the report.
+    :param file: Where to print a short summary (standard error by default).
+    :return: What `function` returned.
+    """
+    file = file or sys.stderr
+    # The profilers are imported here so that runs without --profile do not pay for them
+    if profiler == 'cprofile':
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        result = profile.runcall(function)
+        profile.dump_stats(report_path)
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(15)
+        file.write(summary.getvalue())
+        file.write(f"cProfile statistics written to {report_path}\n")
+        return result
+
+    if profiler == 'tracemalloc':
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            result = function()
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        top = snapshot.statistics('lineno')
+        with open(report_path, 'w') as report:
+            report.write(f"Peak traced memory: {peak} bytes; still allocated at the end: {current} bytes\n\n")
+            for statistic in top[:50]:
+                report.write(f"{statistic}\n")
+        file.write(f"Peak traced memory {peak / (1 << 20):.1f} MiB; allocation report written to {report_path}\n")
+        return result
+
+    raise ValueError(f"Unknown profiler '{profiler}'. Valid values: {', '.join(PROFILERS)}")
@@ -1,79 +1,165 @@
 import random
-from typing import List, Dict, Optional
+from typing import Optional
 from input import Scheduler
-from output import SchedulerOutput
+from output import SchedulerOutput, EventSink, LOTTERY_COMPLETED
+from checkpoint import Checkpointer
+
+class TicketTree:
+    def __init__(self, size: int):
+        """
+        Fenwick (binary indexed) tree over the ticket counts of `size` processes.
+        Adding or removing tickets and drawing a winner are all O(log n).
+
+        :param size: Number of processes indexed by the tree.
+        """
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.total = 0
+        # Largest power of two not above size, used to walk the tree top-down when drawing
+        self.top_step = 1 << (size.bit_length() - 1) if size else 0
+
+    def add(self, index: int, tickets: int):
+        """Add (or, with a negative count, remove) tickets for the process at `index`."""
+        self.total += tickets
+        position = index + 1
+        while position <= self.size:
+            self.tree[position] += tickets
+            position += position & -position
+
+    def find(self, ticket: int) -> int:
+        """Return the index of the process holding `ticket` (1-based, at most `total`)."""
+        position = 0
+        step = self.top_step
+        while step:
+            next_position = position + step
+            if next_position <= self.size and self.tree[next_position] < ticket:
+                position = next_position
+                ticket -= self.tree[next_position]
+            step >>= 1
+        return position
+
+def lottery_scheduler(scheduler: Scheduler, sink: Optional[EventSink] = None,
+                      checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    # A fixed seed makes the draws (and so the whole run) reproducible
+    rng = random.Random(scheduler.seed)
 
-def lottery_scheduler(scheduler: Scheduler) -> SchedulerOutput:
     # Initialize SchedulerOutput with the given algorithm as 'lottery'
+    table = scheduler.table
     output = SchedulerOutput(
         process_count=scheduler.processcount,
-        algorithm='lottery'
+        algorithm='lottery',
+        process_names=table.names,
+        sink=sink
     )
-    
-    # Initialize a list of processes and their states
-    processes = scheduler.processes
+
+    # Visit processes in arrival order and keep this run's state in index-addressed lists
+    arrivals, bursts, process_tickets = table.arrivals, table.bursts, table.tickets
+    order = table.arrival_order()
+    count = len(order)
+    remaining_burst = list(bursts)
+    first_run_time = [None] * count  # Track first run time
+    completed = [False] * count
+    completed_count = 0
+
+    tickets = TicketTree(count)  # Tickets of the processes that are ready to run
+    index = 0  # Next process to arrive
     current_time = 0
-    process_queue = [process for process in processes if process.arrival <= current_time]
-    remaining_burst = {process.name: process.burst for process in processes}
-    process_tickets = {process.name: 1 for process in processes}  # Initial tickets count (1 per process)
-    completed_processes = set()
-    first_run_time = {process.name: None for process in processes}  # Track first run time
-    
-    while current_time < scheduler.runfor and len(completed_processes) < scheduler.processcount:
-        # Update the queue with newly arrived processes
-        for process in processes:
-            if process.arrival <= current_time and process.name not in process_queue:
-                process_queue.append(process)
-        
-        # Filter out completed processes from the queue
-        process_queue = [process for process in process_queue if process.name not in completed_processes]
-        
-        # If no process is in the queue, time passes until the next arrival
-        if not process_queue:
-            current_time += 1
+    iterations = draws = 0  # Instrumentation counters
+    # Consecutive wins by the same process are logged as one run, recorded once it ends
+    run_process = -1  # Winner of the current run, or -1 if there is none
+    run_start = run_length = 0
+
+    # Continue from a snapshot of an earlier run if there is a valid one. The snapshot holds the
+    # state of the processes that had arrived, by process; the others, wherever they are in the
+    # table now, have not arrived yet and start from their initial state
+    state = checkpointer.resume_state(output) if checkpointer is not None else None
+    if state is not None:
+        current_time, index, completed_count = state['time'], state['index'], state['completed_count']
+        for process in order[:index]:
+            completed[process] = True
+        for process, left in state['remaining_burst'].items():
+            remaining_burst[process] = left
+            completed[process] = False
+        for process, first_run in state['first_run_time'].items():
+            first_run_time[process] = first_run
+        rng.setstate(state['rng'])
+        iterations, draws = state['iterations'], state['draws']
+        run_process, run_start, run_length = state['run']
+        # The ticket tree is rebuilt from the processes that had arrived and not completed
+        for process in state['remaining_burst']:
+            tickets.add(process, process_tickets[process])
+
+    while current_time < scheduler.runfor and completed_count < count:
+        if checkpointer is not None and checkpointer.due(current_time, scheduler.runfor):
+            checkpointer.save(output, {'time': current_time, 'index': index, 'completed_count': completed_count,
+                                       'remaining_burst': {process: remaining_burst[process]
+                                                           for process in order[:index] if not completed[process]},
+                                       'first_run_time': {process: first_run_time[process] for process in order[:index]
+                                                          if not completed[process] and first_run_time[process] is not None},
+                                       'rng': rng.getstate(),
+                                       'iterations': iterations, 'draws': draws,
+                                       'run': (run_process, run_start, run_length)})
+        iterations += 1
+        # Newly arrived processes enter the draw with their tickets
+        while index < count and arrivals[order[index]] <= current_time:
+            tickets.add(order[index], process_tickets[order[index]])
+            index += 1
+
+        # If no process is ready, time passes until the next arrival
+        if tickets.total == 0:
+            next_arrival = arrivals[order[index]] if index < count else scheduler.runfor
+            next_time = min(next_arrival, scheduler.runfor)
+            # Idle time is not part of the lottery log, but it counts against CPU utilization
+            output.idle_time += next_time - current_time
+            current_time = next_time
             continue
-        
-        # Allocate lottery tickets and select a winner
-        total_tickets = sum(process_tickets[process.name] for process in process_queue)
-        winning_ticket = random.randint(1, total_tickets)
-        
-        # Determine which process won the lottery
-        ticket_sum = 0
-        selected_process = None
-        for process in process_queue:
-            ticket_sum += process_tickets[process.name]
-            if ticket_sum >= winning_ticket:
-                selected_process = process
-                break
-        
+
+        # Draw a winning ticket and find the process holding it
+        selected = tickets.find(rng.randint(1, tickets.total))
+        draws += 1
+
         # Track the first run time for response time calculation
-        if first_run_time[selected_process.name] is None:
-            first_run_time[selected_process.name] = current_time
-        
-        # Simulate the execution of the selected process for one time tick
-        output.add_event(current_time, f"Process {selected_process.name} selected (Lottery)")
-        remaining_burst[selected_process.name] -= 1
-        
+        if first_run_time[selected] is None:
+            first_run_time[selected] = current_time
+
+        # Simulate the execution of the selected process for one time tick. A process only stops
+        # winning when another one wins or it completes, so a run never spans an idle stretch.
+        if selected != run_process:
+            if run_process >= 0:
+                output.add_lottery_run(run_start, run_process, run_length)
+            run_process, run_start, run_length = selected, current_time, 0
+        run_length += 1
+        remaining_burst[selected] -= 1
+
         # If the process completes its execution
-        if remaining_burst[selected_process.name] == 0:
-            completed_processes.add(selected_process.name)
-            process_queue.remove(selected_process)
+        if remaining_burst[selected] == 0:
+            completed[selected] = True
+            completed_count += 1
+            tickets.add(selected, -process_tickets[selected])
             finish_time = current_time + 1
-            turnaround_time = finish_time - selected_process.arrival
-            wait_time = turnaround_time - selected_process.burst  # Recalculate wait time
-            response_time = first_run_time[selected_process.name] - selected_process.arrival
-            output.add_process_stats(selected_process.name, wait_time, turnaround_time, response_time)
-            output.add_event(current_time + 1, f"Process {selected_process.name} completes")
-        
-        # Update the process list and time
+            turnaround_time = finish_time - arrivals[selected]
+            wait_time = turnaround_time - bursts[selected]  # Recalculate wait time
+            response_time = first_run_time[selected] - arrivals[selected]
+            output.add_process_stats(selected, wait_time, turnaround_time, response_time)
+            output.add_lottery_run(run_start, selected, run_length)
+            run_process = -1
+            output.add_event(finish_time, LOTTERY_COMPLETED, selected)
+
+        # Update the time
         current_time += 1
 
+    # The run still going when time runs out
+    if run_process >= 0:
+        output.add_lottery_run(run_start, run_process, run_length)
+
     # Set the last time tick to the current time after all processes are scheduled
     output.set_last_time_tick(current_time)
-    
+    # Ticket tree updates: one when a process arrives, one when it completes
+    output.record_counters(iterations, draws, queue_operations=index + completed_count, arrivals=index)
+
     # Check for incomplete processes and log them
-    for process in processes:
-        if process.name not in completed_processes:
-            output.add_incomplete_process(process.name)
-    
-    return output
\ No newline at end of file
+    for process in order:
+        if not completed[process]:
+            output.add_incomplete_process(table.names[process])
+
+    return output
@@ -0,0 +1,94 @@
+import math
+import sys
+from typing import Dict, List, Optional, Sequence, TextIO
+from output import SchedulerOutput
+from optional import optional_import
+
+# NumPy is optional: without it, or for short columns, the aggregates are computed with sorted lists
+NUMPY_MIN_VALUES = 10000
+
+# Per-process statistics summarized by run_metrics, and the aggregates reported for each
+METRIC_NAMES = ['wait', 'turnaround', 'response']
+AGGREGATE_NAMES = ['mean', 'median', 'p95', 'p99', 'max']
+
+def percentile(sorted_values: Sequence[int], percent: float) -> int:
+    """Nearest-rank percentile of an ascending sequence of values (0 if there are none)."""
+    if not len(sorted_values):
+        return 0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize_values(values: Sequence[int]) -> Dict[str, float]:
+    """
+    Aggregate a column of per-process values.
+
+    :param values: The values, e.g. a statistics column of a SchedulerOutput.
+    :return: The mean and median (floats), 95th and 99th percentile (nearest rank) and maximum; all 0 if there are no values.
+    """
+    if not len(values):
+        return {'mean': 0.0, 'median': 0.0, 'p95': 0, 'p99': 0, 'max': 0}
+
+    np = optional_import('numpy') if len(values) >= NUMPY_MIN_VALUES else None
+    if np is not None:
+        column = np.sort(np.asarray(values, dtype=np.int64))
+        mean = float(column.mean())
+        middle = len(column) // 2
+        median = float(column[middle]) if len(column) % 2 else (int(column[middle - 1]) + int(column[middle])) / 2.0
+        return {'mean': mean, 'median': median, 'p95': int(percentile(column, 95)),
+                'p99': int(percentile(column, 99)), 'max': int(column[-1])}
+
+    column = sorted(values)
+    middle = len(column) // 2
+    median = float(column[middle]) if len(column) % 2 else (column[middle - 1] + column[middle]) / 2.0
+    return {'mean': sum(column) / len(column), 'median': median, 'p95': percentile(column, 95),
+            'p99': percentile(column, 99), 'max': column[-1]}
+
+def run_metrics(output: SchedulerOutput) -> Dict[str, object]:
+    """
+    Compute the summary metrics of a run from its statistics columns (no per-process objects are created).
+
+    :param output: The SchedulerOutput of the run; its event log is not needed, so streaming runs work too.
+    :return: Completed and incomplete process counts, elapsed and busy time (summed over the CPUs), CPU
+             utilization (busy / (elapsed * CPUs)),
+             throughput (completed processes per tick), and the aggregates of each of METRIC_NAMES.
+    """
+    elapsed = output.last_time_tick or 0
+    busy = max(elapsed * output.cpus - output.idle_time, 0)
+    completed = len(output.stat_processes)
+    metrics = {
+        'completed': completed,
+        'incomplete': len(output.process_names) - completed,
+        'elapsed': elapsed,
+        'busy': busy,
+        'utilization': busy / (elapsed * output.cpus) if elapsed else 0.0,
+        'throughput': completed / elapsed if elapsed else 0.0,
+    }
+    for name, column in zip(METRIC_NAMES, [output.stat_waits, output.stat_turnarounds, output.stat_responses]):
+        metrics[name] = summarize_values(column)
+    return metrics
+
+def print_metrics_summary(output: SchedulerOutput, file: Optional[TextIO] = None):
+    """
+    Print the summary metrics of a run instead of its event log and per-process listing.
+
+    :param output: The SchedulerOutput of the run.
+    :param file: Where to print the summary (standard output by default).
+    """
+    file = file or sys.stdout
+    metrics = run_metrics(output)
+    lines: List[str] = [
+        f"{output.process_count} processes\n",
+        f"{output.algorithm_title()}\n",
+    ]
+    lines.extend(f"{line}\n" for line in output.setting_lines())
+    lines.append(f"Finished at time {metrics['elapsed']}\n")
+    lines.append(f"Completed {metrics['completed']}, incomplete {metrics['incomplete']}\n")
+    lines.append(f"CPU utilization {metrics['utilization']:.2%} ({metrics['busy']} busy ticks)\n")
+    lines.append(f"Throughput {metrics['throughput']:.4f} processes per tick\n\n")
+
+    lines.append(f"{'':<10}" + "".join(f"{name:>12}" for name in AGGREGATE_NAMES) + "\n")
+    for name in METRIC_NAMES:
+        aggregates = metrics[name]
+        lines.append(f"{name:<10}{aggregates['mean']:>12.2f}{aggregates['median']:>12.1f}"
+                     f"{aggregates['p95']:>12}{aggregates['p99']:>12}{aggregates['max']:>12}\n")
+    file.write("".join(lines))
@@ -0,0 +1,160 @@
+from typing import Dict, Generator, Optional
+from input import Scheduler
+from output import SchedulerOutput, EventSink, ARRIVED, SELECTED, FINISHED
+from collections import deque
+from checkpoint import Checkpointer
+from policy import ArrivalSource, UNBOUNDED, run_policy
+
+def mlfq_scheduler(scheduler: Scheduler, sink: Optional[EventSink] = None,
+                   checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    return run_policy(mlfq_policy, scheduler, sink, checkpointer)
+
+def mlfq_policy(scheduler: Scheduler, source: ArrivalSource, output: SchedulerOutput,
+                checkpointer: Optional[Checkpointer] = None) -> Generator[None, None, None]:
+    """
+    Multi-level feedback queue. Arriving processes enter the highest priority level (0); a process
+    that uses up the quantum of its level without finishing moves one level down. The highest
+    non-empty level runs round robin, and an arrival preempts a process running on a lower level
+    (the preempted process keeps what is left of its quantum and resumes first on its level).
+    Every `boost` ticks all processes move back to the top level.
+
+    The ready levels are deques, and a bitmap with one bit per non-empty level finds the highest
+    one in O(1). Time advances from event to event (end of a slice, arrival, idle stretch); see policy.py.
+    """
+    arrivals, bursts, pending = source.arrivals, source.bursts, source.pending
+    quanta = scheduler.quanta
+    levels = len(quanta)
+    boost = scheduler.boost
+
+    queues = [deque() for _ in range(levels)]  # Ready processes of each level, highest priority first
+    ready_levels = 0  # Bit `level` is set when queues[level] is not empty
+    used = {}  # Ticks of its quantum already used by each preempted process
+    time = 0  # Global time tracker
+    # Per-process state of this run, for the processes admitted and not finished
+    remaining_time: Dict[int, int] = {}
+    start_time: Dict[int, int] = {}
+    admitted = 0  # Processes taken from the pending ones, in arrival order
+    next_boost = boost if boost is not None else None
+    iterations = dispatches = requeues = boosted = 0  # Instrumentation counters
+
+    # Continue from a snapshot of an earlier run if there is a valid one
+    state = checkpointer.resume_state(output) if checkpointer is not None else None
+    if state is not None:
+        time, admitted, next_boost = state['time'], state['admitted'], state['next_boost']
+        source.skip(admitted)
+        for level, queued in enumerate(state['queues']):
+            queues[level].extend(queued)
+            if queued:
+                ready_levels |= 1 << level
+        used.update(state['used'])
+        remaining_time, start_time = state['remaining_time'], state['start_time']
+        iterations, dispatches, requeues, boosted = \
+            state['iterations'], state['dispatches'], state['requeues'], state['boosted']
+
+    # Arrived processes enter the top level, in arrival order. The caller first waits until the
+    # source knows the arrivals up to `time`.
+    def add_arrived_processes():
+        nonlocal admitted, ready_levels
+        top = queues[0]
+        while pending and arrivals[pending[0]] <= time:
+            process = pending.popleft()
+            remaining_time[process] = bursts[process]
+            output.add_event(arrivals[process], ARRIVED, process)
+            top.append(process)
+            admitted += 1
+        if top:
+            ready_levels |= 1
+
+    while True:
+        while not source.known_through(time):
+            yield
+        if not time < source.runfor:
+            break
+        if checkpointer is not None and checkpointer.due(time, source.runfor):
+            checkpointer.save(output, {'time': time, 'admitted': admitted, 'next_boost': next_boost,
+                                       'queues': [list(queue) for queue in queues], 'used': dict(used),
+                                       'remaining_time': dict(remaining_time), 'start_time': dict(start_time),
+                                       'iterations': iterations, 'dispatches': dispatches, 'requeues': requeues,
+                                       'boosted': boosted})
+        iterations += 1
+        add_arrived_processes()
+
+        # Priority boost: the lower levels join the top one, in priority order, with fresh quanta
+        if next_boost is not None and time >= next_boost:
+            top = queues[0]
+            for queue in queues[1:]:
+                boosted += len(queue)
+                top.extend(queue)
+                queue.clear()
+            ready_levels = 1 if top else 0
+            used.clear()
+            next_boost = (time // boost + 1) * boost
+
+        if ready_levels:
+            # The lowest set bit is the highest priority level with a ready process
+            level = (ready_levels & -ready_levels).bit_length() - 1
+            queue = queues[level]
+            current = queue.popleft()
+            if not queue:
+                ready_levels &= ~(1 << level)
+            dispatches += 1
+            output.add_event(time, SELECTED, current, remaining_time[current])
+
+            # Record response time if it's the first time the process is running
+            if current not in start_time:
+                start_time[current] = time
+
+            # Run for what is left of the level's quantum or until completion, unless an arrival
+            # preempts a process below the top level first
+            quantum_left = quanta[level] - used.pop(current, 0)
+            slice_end = time + min(quantum_left, remaining_time[current])
+            if level > 0:
+                while not source.next_arrival_known(slice_end):
+                    yield
+                if pending:
+                    slice_end = min(slice_end, arrivals[pending[0]])
+            remaining_time[current] -= slice_end - time
+            quantum_left -= slice_end - time
+            time = slice_end
+
+            # After the process runs, check for new arrivals (they queue ahead of the current process)
+            while not source.known_through(time):
+                yield
+            add_arrived_processes()
+
+            if remaining_time[current] == 0:
+                turnaround_time = time - arrivals[current]
+                wait_time = turnaround_time - bursts[current]
+                response_time = start_time.pop(current) - arrivals[current]
+                output.add_process_stats(current, wait=wait_time, turnaround=turnaround_time, response=response_time)
+                output.add_event(time, FINISHED, current)
+                del remaining_time[current]
+            elif quantum_left > 0:
+                # Preempted: resume first on the same level with the rest of the quantum
+                used[current] = quanta[level] - quantum_left
+                queue.appendleft(current)
+                ready_levels |= 1 << level
+                requeues += 1
+            else:
+                # Used its whole quantum: move down a level (the lowest level is round robin)
+                level = min(level + 1, levels - 1)
+                queues[level].append(current)
+                ready_levels |= 1 << level
+                requeues += 1
+        else:
+            # If no process is ready, the CPU is idle until the next arrival (or the end of the run)
+            while not source.next_arrival_known(UNBOUNDED):
+                yield
+            next_time = source.runfor
+            if pending:
+                next_time = min(next_time, arrivals[pending[0]])
+            output.add_idle(time, next_time - time)
+            time = next_time
+
+        while not source.known_through(time):
+            yield
+        add_arrived_processes()
+
+    output.set_last_time_tick(time)
+    output.record_counters(iterations, dispatches, queue_operations=admitted + requeues + dispatches + boosted,
+                           arrivals=admitted)
@@ -0,0 +1,414 @@
+import heapq
+import random
+from collections import deque
+from typing import Optional
+from input import Scheduler
+from output import SchedulerOutput, EventSink, ARRIVED, SELECTED, FINISHED, LOTTERY_SELECTED, LOTTERY_COMPLETED
+from lottery import TicketTree
+from checkpoint import Checkpointer
+
+class FifoRunQueue:
+    def __init__(self, state: Optional[list] = None):
+        """
+        Run queue of one CPU for FCFS and round robin: processes run in the order they were queued.
+
+        :param state: A snapshot taken by `snapshot`, to continue from.
+        """
+        self.queue = deque(state or ())
+
+    def __len__(self):
+        return len(self.queue)
+
+    def push(self, process: int):
+        self.queue.append(process)
+
+    def pop_next(self) -> int:
+        return self.queue.popleft()
+
+    def steal(self) -> int:
+        # A thief takes the process that would have waited longest on this CPU
+        return self.queue.pop()
+
+    def snapshot(self) -> list:
+        return list(self.queue)
+
+class ShortestFirstRunQueue:
+    def __init__(self, remaining: list, state: Optional[tuple] = None):
+        """
+        Run queue of one CPU for shortest job first: a heap of (remaining time, sequence, index),
+        where the sequence number breaks ties first come, first served. Once a process has been
+        stolen from the queue, a max-heap of the same jobs finds the longest one in O(log n); a job
+        taken from one heap stays in the other until it reaches the top or the heaps are compacted.
+
+        :param remaining: Remaining time of each process, read when a process is queued.
+        :param state: A snapshot taken by `snapshot`, to continue from.
+        """
+        self.remaining = remaining
+        self.heap, self.sequence = (list(state[0]), state[1]) if state is not None else ([], 0)
+        heapq.heapify(self.heap)
+        self.longest = None  # Max-heap of (-remaining time, -sequence, index), built by the first steal
+        self.removed = set()  # Sequence numbers of the jobs taken from one heap and still in the other
+        self.size = len(self.heap)
+
+    def __len__(self):
+        return self.size
+
+    def push(self, process: int):
+        remaining = self.remaining[process]
+        heapq.heappush(self.heap, (remaining, self.sequence, process))
+        if self.longest is not None:
+            heapq.heappush(self.longest, (-remaining, -self.sequence, process))
+        self.sequence += 1
+        self.size += 1
+
+    def pop_next(self) -> int:
+        heap = self.heap
+        _, sequence, process = heapq.heappop(heap)
+        if self.longest is not None:
+            removed = self.removed
+            while sequence in removed:
+                removed.discard(sequence)
+                _, sequence, process = heapq.heappop(heap)
+            self.taken(sequence)
+        self.size -= 1
+        return process
+
+    def steal(self) -> int:
+        # A thief takes the longest job, the one that would have waited longest on this CPU (the
+        # latest queued among equals)
+        if self.longest is None:
+            self.longest = [(-remaining, -sequence, process) for remaining, sequence, process in self.heap]
+            heapq.heapify(self.longest)
+        longest, removed = self.longest, self.removed
+        _, sequence, process = heapq.heappop(longest)
+        while -sequence in removed:
+            removed.discard(-sequence)
+            _, sequence, process = heapq.heappop(longest)
+        self.taken(-sequence)
+        self.size -= 1
+        return process
+
+    def taken(self, sequence: int):
+        """Record that the job queued as `sequence` left one heap, compacting both once stale jobs outnumber the others."""
+        removed = self.removed
+        removed.add(sequence)
+        if len(removed) > self.size + 64:
+            self.heap = [entry for entry in self.heap if entry[1] not in removed]
+            self.longest = [entry for entry in self.longest if -entry[1] not in removed]
+            heapq.heapify(self.heap)
+            heapq.heapify(self.longest)
+            removed.clear()
+
+    def snapshot(self) -> tuple:
+        return [entry for entry in self.heap if entry[1] not in self.removed], self.sequence
+
+class TicketRunQueue:
+    def __init__(self, tickets, rng: random.Random, state: Optional[list] = None):
+        """
+        Run queue of one CPU for lottery scheduling. Queued processes occupy consecutive slots of a
+        ticket tree, which doubles in size when full; removing a process moves the last one into
+        its slot, so every operation is O(log n).
+
+        :param tickets: Tickets held by each process.
+        :param rng: The random number generator drawing the winners (shared by all CPUs).
+        :param state: A snapshot taken by `snapshot`, to continue from.
+        """
+        self.tickets = tickets
+        self.rng = rng
+        self.members = []  # Process in each slot
+        self.tree = TicketTree(0)
+        for process in state or ():
+            self.push(process)
+
+    def __len__(self):
+        return len(self.members)
+
+    def push(self, process: int):
+        slot = len(self.members)
+        if slot == self.tree.size:
+            tree = TicketTree(max(8, 2 * slot))
+            for other_slot, other in enumerate(self.members):
+                tree.add(other_slot, self.tickets[other])
+            self.tree = tree
+        self.members.append(process)
+        self.tree.add(slot, self.tickets[process])
+
+    def remove(self, slot: int) -> int:
+        """Take the process in `slot` out of the queue."""
+        members, tickets = self.members, self.tickets
+        process = members[slot]
+        self.tree.add(slot, -tickets[process])
+        last = members.pop()
+        if slot < len(members):
+            members[slot] = last
+            self.tree.add(len(members), -tickets[last])
+            self.tree.add(slot, tickets[last])
+        return process
+
+    def pop_next(self) -> int:
+        # Draw a winning ticket and take the process holding it
+        return self.remove(self.tree.find(self.rng.randint(1, self.tree.total)))
+
+    def steal(self) -> int:
+        return self.remove(len(self.members) - 1)
+
+    def snapshot(self) -> list:
+        return list(self.members)
+
+def multicore_scheduler(scheduler: Scheduler, sink: Optional[EventSink] = None,
+                        checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    """
+    FCFS, shortest job first, round robin or lottery on `scheduler.cpus` CPUs, each with its own
+    run queue. An arriving process goes to the lowest numbered idle CPU, or to the CPUs in turn
+    when none is idle. Shortest job first preempts the process running on that CPU if the new
+    one is strictly shorter. With `scheduler.steal`, a CPU whose run queue is empty takes the
+    last queued process of the CPU with the longest run queue instead of going idle.
+
+    Time advances from event to event: a heap holds the end of the slice running on each busy CPU,
+    and idle CPUs and steal victims are found through heaps as well, so no step scans the CPUs.
+    Slices are the whole burst (FCFS, SJF), the quantum (round robin) or one tick (lottery).
+    Everything stops at `runfor` (lottery stops earlier once every process is done): a slice
+    ending at `runfor` completes its process, processes still running then are cut off.
+    """
+    table = scheduler.table
+    arrivals, bursts = table.arrivals, table.bursts
+    algorithm = scheduler.use
+    cpus, steal, runfor = scheduler.cpus, scheduler.steal, scheduler.runfor
+    lottery = algorithm == 'lottery'
+    output = SchedulerOutput(process_count=scheduler.processcount, algorithm=algorithm, quantum=scheduler.quantum,
+                             process_names=table.names, sink=sink, cpus=cpus, steal=steal)
+    add_event = output.add_cpu_event
+    selected_kind, finished_kind = (LOTTERY_SELECTED, LOTTERY_COMPLETED) if lottery else (SELECTED, FINISHED)
+    # Length of a slice: the rest of the burst, or at most the quantum (one tick for lottery)
+    quantum = 1 if lottery else scheduler.quantum if algorithm == 'rr' else None
+    # A fixed seed makes the draws (and so the whole run) reproducible
+    rng = random.Random(scheduler.seed)
+
+    # Visit processes in arrival order and keep this run's state in index-addressed lists
+    order = table.arrival_order()
+    count = len(order)
+    remaining = list(bursts)  # Updated when a slice ends, so it includes the slice running
+    response = [None] * count
+
+    time = 0
+    next_arrival = 0  # Cursor over the arrival-sorted processes
+    cursor = 0  # Next CPU to place an arrival on when none is idle
+    completed = 0
+    queue_states = [None] * cpus
+    running = [-1] * cpus  # Process running on each CPU, or -1
+    slice_start = [0] * cpus
+    slice_end = [0] * cpus
+    busy = [0] * cpus  # Ticks each CPU spent running processes
+    idle = [True] * cpus
+    iterations = dispatches = requeues = steals = 0  # Instrumentation counters
+
+    # Continue from a snapshot of an earlier run if there is a valid one. The snapshot holds the
+    # state of the processes that had arrived, by process; the others, wherever they are in the
+    # table now, have not arrived yet and start from their initial state
+    state = checkpointer.resume_state(output) if checkpointer is not None else None
+    if state is not None:
+        time, next_arrival, cursor, completed = state['time'], state['next_arrival'], state['cursor'], state['completed']
+        queue_states, running, idle = state['queues'], state['running'], state['idle']
+        slice_start, slice_end, busy = state['slice_start'], state['slice_end'], state['busy']
+        for process in order[:next_arrival]:
+            remaining[process] = 0
+        for process, left in state['remaining'].items():
+            remaining[process] = left
+        for process, first_run in state['response'].items():
+            response[process] = first_run
+        rng.setstate(state['rng'])
+        iterations, dispatches, requeues, steals = \
+            state['iterations'], state['dispatches'], state['requeues'], state['steals']
+
+    if lottery:
+        queues = [TicketRunQueue(table.tickets, rng, queued) for queued in queue_states]
+    elif algorithm == 'sjf':
+        queues = [ShortestFirstRunQueue(remaining, queued) for queued in queue_states]
+    else:
+        queues = [FifoRunQueue(queued) for queued in queue_states]
+
+    # Ends of the running slices as (end, cpu, version); preempting a slice bumps the CPU's
+    # version, which makes its entry stale (stale entries are dropped when they reach the top)
+    version = [0] * cpus
+    slices = [(slice_end[cpu], cpu, 0) for cpu in range(cpus) if running[cpu] >= 0]
+    heapq.heapify(slices)
+    # Idle CPUs, lowest number first; a CPU has at most one entry, checked against `idle` when popped
+    idle_heap = [cpu for cpu in range(cpus) if idle[cpu]]
+    in_idle_heap = list(idle)
+    # Run queue lengths as (-length, cpu), to find steal victims; an entry is pushed whenever a
+    # queue grows, and an entry that no longer matches its queue is fixed when it reaches the top
+    victims = [(-len(queue), cpu) for cpu, queue in enumerate(queues) if queue] if steal else []
+    heapq.heapify(victims)
+
+    pending = []  # CPUs to dispatch at the current time
+    marked = [False] * cpus
+    requeue = []  # (CPU, process) whose slice ended without finishing, queued after the arrivals
+
+    def queued(cpu: int, process: int):
+        nonlocal victims
+        queues[cpu].push(process)
+        if steal:
+            heapq.heappush(victims, (-len(queues[cpu]), cpu))
+            # Rebuild once stale entries outnumber the CPUs, which keeps the heap O(cpus)
+            if len(victims) > 2 * cpus + 64:
+                victims = [(-len(queue), other) for other, queue in enumerate(queues) if queue]
+                heapq.heapify(victims)
+
+    def mark(cpu: int):
+        if not marked[cpu]:
+            marked[cpu] = True
+            pending.append(cpu)
+
+    def stop(cpu: int):
+        """End the slice running on `cpu` at the current time."""
+        process = running[cpu]
+        ran = time - slice_start[cpu]
+        remaining[process] -= ran
+        busy[cpu] += ran
+        running[cpu] = -1
+        return process
+
+    def find_victim() -> int:
+        """Return the CPU with the longest run queue, or -1 if every run queue is empty."""
+        while victims:
+            length, cpu = victims[0]
+            actual = len(queues[cpu])
+            if actual == 0:
+                heapq.heappop(victims)
+            elif -length != actual:
+                heapq.heapreplace(victims, (-actual, cpu))
+            else:
+                return cpu
+        return -1
+
+    while not (lottery and completed == count):
+        if checkpointer is not None and checkpointer.due(time, runfor):
+            checkpointer.save(output, {'time': time, 'next_arrival': next_arrival, 'cursor': cursor,
+                                       'completed': completed, 'queues': [queue.snapshot() for queue in queues],
+                                       'running': list(running), 'idle': list(idle),
+                                       'slice_start': list(slice_start), 'slice_end': list(slice_end),
+                                       'busy': list(busy),
+                                       'remaining': {process: remaining[process] for process in order[:next_arrival]
+                                                     if remaining[process] > 0},
+                                       'response': {process: response[process] for process in order[:next_arrival]
+                                                    if remaining[process] > 0 and response[process] is not None},
+                                       'rng': rng.getstate(), 'iterations': iterations, 'dispatches': dispatches,
+                                       'requeues': requeues, 'steals': steals})
+
+        # The next event is the end of the earliest slice or the next arrival
+        while slices and slices[0][2] != version[slices[0][1]]:
+            heapq.heappop(slices)
+        next_time = slices[0][0] if slices else runfor
+        if next_arrival < count:
+            next_time = min(next_time, arrivals[order[next_arrival]])
+        if next_time > runfor:
+            break
+        time = next_time
+        iterations += 1
+
+        # Slices ending now: the process finishes, or goes back to its CPU's queue after the arrivals
+        while slices and slices[0][0] == time:
+            _, cpu, slice_version = heapq.heappop(slices)
+            if slice_version != version[cpu]:
+                continue
+            process = stop(cpu)
+            if remaining[process] == 0:
+                completed += 1
+                turnaround_time = time - arrivals[process]
+                output.add_process_stats(process, wait=turnaround_time - bursts[process], turnaround=turnaround_time,
+                                         response=response[process])
+                add_event(time, finished_kind, process, 0, cpu)
+                if not queues[cpu]:
+                    # Free for the arrivals of this tick
+                    idle[cpu] = True
+                    if not in_idle_heap[cpu]:
+                        in_idle_heap[cpu] = True
+                        heapq.heappush(idle_heap, cpu)
+            else:
+                requeue.append((cpu, process))
+            mark(cpu)
+        # Slices ending exactly at runfor still complete their processes, but nothing else happens then
+        if time == runfor:
+            requeue.clear()
+            break
+
+        # Arrivals go to the lowest numbered idle CPU, or to the CPUs in turn
+        while next_arrival < count and arrivals[order[next_arrival]] <= time:
+            process = order[next_arrival]
+            next_arrival += 1
+            cpu = -1
+            while idle_heap:
+                candidate = heapq.heappop(idle_heap)
+                in_idle_heap[candidate] = False
+                if idle[candidate]:
+                    cpu = candidate
+                    break
+            if cpu < 0:
+                cpu = cursor
+                cursor = cursor + 1 if cursor + 1 < cpus else 0
+            idle[cpu] = False
+            add_event(arrivals[process], ARRIVED, process, 0, cpu)
+            # Shortest job first: a strictly shorter arrival takes the CPU from the running process
+            if algorithm == 'sjf' and running[cpu] >= 0 and bursts[process] < slice_end[cpu] - time:
+                version[cpu] += 1
+                queued(cpu, stop(cpu))
+                requeues += 1
+            queued(cpu, process)
+            if running[cpu] < 0:
+                mark(cpu)
+
+        for cpu, process in requeue:
+            queued(cpu, process)
+        requeues += len(requeue)
+        requeue.clear()
+
+        # Dispatch on the CPUs whose slice ended or that received a process, in CPU order
+        pending.sort()
+        for cpu in pending:
+            marked[cpu] = False
+            if running[cpu] >= 0:
+                continue
+            queue = queues[cpu]
+            if not queue and steal:
+                victim = find_victim()
+                if victim >= 0:
+                    queue.push(queues[victim].steal())
+                    steals += 1
+            if not queue:
+                idle[cpu] = True
+                if not in_idle_heap[cpu]:
+                    in_idle_heap[cpu] = True
+                    heapq.heappush(idle_heap, cpu)
+                continue
+            process = queue.pop_next()
+            dispatches += 1
+            idle[cpu] = False
+            if response[process] is None:
+                response[process] = time - arrivals[process]
+            length = remaining[process] if quantum is None else min(quantum, remaining[process])
+            running[cpu] = process
+            slice_start[cpu] = time
+            slice_end[cpu] = time + length
+            heapq.heappush(slices, (time + length, cpu, version[cpu]))
+            add_event(time, selected_kind, process, length if lottery else remaining[process], cpu)
+        pending.clear()
+
+    # Lottery ends when the last process completes; the others run until runfor, cutting off the slices still running
+    end = time if lottery and completed == count else runfor
+    for cpu in range(cpus):
+        if running[cpu] >= 0:
+            busy[cpu] += end - slice_start[cpu]
+    output.cpu_busy = busy
+    output.idle_time = cpus * end - sum(busy)
+    output.set_last_time_tick(end)
+    output.record_counters(iterations, dispatches, queue_operations=next_arrival + requeues + dispatches + steals,
+                           arrivals=next_arrival)
+    output.counters['steals'] = steals
+
+    # Like the single-CPU lottery, report the processes that did not complete
+    if lottery:
+        for process in order:
+            if remaining[process] > 0:
+                output.add_incomplete_process(table.names[process])
+
+    return output
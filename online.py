@@ -0,0 +1,309 @@
+import asyncio
+import os
+import stat
+import sys
+from collections import deque
+from typing import Callable, Dict, List, Optional, TextIO
+from input import Scheduler, ProcessTable, PROCESS_LINE, DIRECTIVE_LINE, scheduler_from_columns
+from output import SchedulerOutput, EventSink, TextSink, JsonlSink
+from policy import ArrivalSource, UNBOUNDED
+from registry import load_policy_function
+
+# Bytes read from an input at a time; the output is flushed after each read
+ONLINE_READ_SIZE = 1 << 16
+
+# Formats of the online output
+ONLINE_FORMATS = ['text', 'jsonl']
+
+# Background tasks of open inputs; the event loop only keeps weak references to tasks
+ONLINE_TASKS = set()
+
+class ArrivalFeed(ArrivalSource):
+    def __init__(self, runfor: Optional[int] = None):
+        """
+        The processes received by an online run and what is known about the ones still to come.
+        Records come in arrival order, so once a process arriving at `horizon` has been received,
+        every process arriving before `horizon` is known (more may still arrive at `horizon` itself).
+
+        The columns only hold the processes that have not finished (see `release`), so a long
+        run keeps the rows of the processes in the system, not of every process it has seen.
+
+        :param runfor: Ticks to run, or None to run until the input ends and every process is done.
+        """
+        # Process names by index, kept for the output; the other columns are by index too, without finished rows
+        self.names: List[str] = []
+        self.arrivals: Dict[int, int] = {}
+        self.bursts: Dict[int, int] = {}
+        self.tickets: Dict[int, int] = {}
+        self.priorities: Dict[int, int] = {}
+        self.pending = deque()  # Received processes the policy has not admitted yet, in arrival order
+        self.horizon: Optional[int] = None  # Arrival of the last process received
+        self.closed = False  # No more processes will come
+        self.fixed_runfor = runfor
+        self.runfor = runfor if runfor is not None else UNBOUNDED
+        # When a CPU that never idles with work queued would be done with every process received
+        self.busy_until = 0
+
+    def receive(self, name: str, arrival: int, burst: int, tickets: int = 1, priority: int = 0) -> int:
+        """
+        Add a process that has just been reported.
+
+        :return: The index of the process.
+        """
+        if self.closed:
+            raise ValueError(f"Process {name} received after the end of the input.")
+        if self.horizon is not None and arrival < self.horizon:
+            raise ValueError(f"Process {name} arrives at {arrival}, before the last process received "
+                             f"({self.horizon}); records must come in arrival order.")
+        if burst < 1:
+            raise ValueError(f"Process {name} must have a positive burst.")
+        if tickets < 1:
+            raise ValueError(f"Process {name} must hold at least one lottery ticket.")
+        index = len(self.names)
+        self.names.append(sys.intern(name))
+        self.arrivals[index] = arrival
+        self.bursts[index] = burst
+        self.tickets[index] = tickets
+        self.priorities[index] = priority
+        self.pending.append(index)
+        self.horizon = arrival
+        self.busy_until = max(self.busy_until, arrival) + burst
+        return index
+
+    def release(self, process: int):
+        """Drop the row of a finished process; only its name is kept, for the statistics of the output."""
+        del self.arrivals[process], self.bursts[process], self.tickets[process], self.priorities[process]
+
+    def close(self):
+        """The input has ended. An unbounded run now lasts until the last process finishes."""
+        self.closed = True
+        if self.fixed_runfor is None:
+            self.runfor = self.busy_until
+
+    def known_through(self, time_tick: int) -> bool:
+        return self.closed or (self.horizon is not None and self.horizon > time_tick)
+
+    def next_arrival_known(self, time_tick: float) -> bool:
+        return self.closed or bool(self.pending) or (self.horizon is not None and self.horizon >= time_tick)
+
+class OnlineRun:
+    def __init__(self, scheduler: Scheduler, sink: EventSink, runfor: Optional[int] = None):
+        """
+        A run fed one process at a time. The algorithm's policy (see policy.py), found through the
+        registry, is resumed after each record and makes every decision the records received so
+        far allow, so events go to `sink` as soon as they are certain, in time order, and the work
+        per record does not grow with the history.
+
+        :param scheduler: The algorithm settings (its processes and runfor are not used).
+        :param sink: Where the events go.
+        :param runfor: Ticks to run, or None to run until the input ends and every process is done.
+        """
+        policy = load_policy_function(scheduler.use)
+        self.feed = ArrivalFeed(runfor)
+        self.sink = sink
+        self.output = SchedulerOutput(process_count=scheduler.processcount, algorithm=scheduler.use,
+                                      quantum=scheduler.quantum, preemptive=scheduler.preemptive,
+                                      process_names=self.feed.names, sink=sink, quanta=scheduler.quanta,
+                                      boost=scheduler.boost, aging=scheduler.aging)
+        self.engine = policy(scheduler, self.feed, self.output)
+        self.released = 0  # Finished processes whose rows have been dropped from the feed
+        self.resume()
+
+    def resume(self):
+        """Let the policy make every decision the records received so far allow."""
+        if self.engine is None:
+            return
+        try:
+            next(self.engine)
+        except StopIteration:
+            self.engine = None
+        # The policy is done with the processes whose statistics it has recorded
+        finished = self.output.stat_processes
+        for process in finished[self.released:]:
+            self.feed.release(process)
+        self.released = len(finished)
+
+    def arrive(self, name: str, arrival: int, burst: int, tickets: int = 1, priority: int = 0):
+        self.feed.receive(name, arrival, burst, tickets, priority)
+        self.resume()
+
+    def finish(self) -> SchedulerOutput:
+        """The input has ended: run to the end and finish the output."""
+        self.feed.close()
+        self.resume()
+        self.sink.finish(self.output)
+        self.sink.flush()
+        return self.output
+
+class OnlineSession:
+    def __init__(self, file: TextIO, output_format: str = 'text', settings: Optional[Dict[str, str]] = None):
+        """
+        Turns input records into an OnlineRun. Records use the workload format: directives (use,
+        quantum, runfor, processcount, levels, boost, aging) before the first process line, then
+        one "process" line per arrival, and optionally "end". Settings given on the command line
+        override the directives.
+
+        :param file: Where the output is written.
+        :param output_format: 'text' (the .out format) or 'jsonl'.
+        :param settings: Directive name -> value from the command line.
+        """
+        self.file = file
+        self.output_format = output_format
+        self.settings = dict(settings or {})
+        self.directives: Dict[str, str] = {}
+        self.run: Optional[OnlineRun] = None
+        self.ended = False
+
+    def start(self):
+        """Start the run once the first process (or the end) is reached."""
+        directives = {**self.directives, **self.settings}
+        if not directives.get('use', '').split():
+            raise ValueError("Missing 'use': give it on the command line or as a directive before the first process.")
+        runfor = int(directives['runfor'].split()[0]) if 'runfor' in directives else None
+        # The processes come later, and an unbounded run has no runfor yet
+        scheduler = scheduler_from_columns({'processcount': '0', 'runfor': '0', **directives}, ProcessTable())
+        if scheduler.cpus > 1:
+            raise ValueError("Online runs use one CPU.")
+        sink = TextSink(self.file) if self.output_format == 'text' else JsonlSink(self.file)
+        self.run = OnlineRun(scheduler, sink, runfor)
+
+    def handle_line(self, line: str) -> Optional[str]:
+        """
+        Handle one input record.
+
+        :return: An error message if the record was rejected, None otherwise.
+        """
+        if self.ended:
+            return "The input has already ended."
+        try:
+            match = PROCESS_LINE.match(line)
+            if match:
+                name, arrival, burst, tickets, priority = match.groups()
+                if self.run is None:
+                    self.start()
+                self.run.arrive(sys.intern(name), int(arrival), int(burst), int(tickets) if tickets else 1,
+                                int(priority) if priority else 0)
+                return None
+            match = DIRECTIVE_LINE.match(line)
+            if match:
+                if match.group(1) == 'end':
+                    self.end()
+                elif self.run is not None:
+                    return f"Directive '{match.group(1)}' ignored: the run has started."
+                else:
+                    self.directives[match.group(1)] = match.group(2).strip()
+                return None
+        except ValueError as error:
+            return str(error)
+        if line.strip() and not line.lstrip().startswith('#'):
+            return f"Unrecognized record: {line.strip()}"
+        return None
+
+    def flush(self):
+        if self.run is not None:
+            self.run.sink.flush()
+
+    def end(self) -> Optional[SchedulerOutput]:
+        """End the input and finish the run."""
+        if self.ended:
+            return None
+        if self.run is None:
+            self.start()
+        self.ended = True
+        return self.run.finish()
+
+async def read_records(session: OnlineSession, reader: asyncio.StreamReader,
+                       report: Callable[[str], None]):
+    """
+    Feed the records of one input to the session until the input or the run ends, flushing the
+    output after each read so events are written as soon as they are known.
+
+    :param report: Called with the message of each rejected record.
+    """
+    leftover = b''
+    while not session.ended:
+        data = await reader.read(ONLINE_READ_SIZE)
+        lines = (leftover + data).split(b'\n')
+        leftover = lines.pop() if data else b''
+        for line in lines:
+            error = session.handle_line(line.decode('utf-8', errors='replace'))
+            if error is not None:
+                report(error)
+            if session.ended:
+                break
+        session.flush()
+        if not data:
+            break
+
+async def open_reader(file_path: Optional[str]) -> asyncio.StreamReader:
+    """
+    Open standard input, a named pipe or a file as a stream reader. Pipes, terminals and sockets are
+    watched by the event loop; regular files (which it cannot watch) are read in a worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    # Opening a named pipe blocks until a writer opens it too
+    file = sys.stdin.buffer if file_path is None else await loop.run_in_executor(None, open, file_path, 'rb')
+    reader = asyncio.StreamReader()
+    mode = os.fstat(file.fileno()).st_mode
+    if stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or stat.S_ISCHR(mode):
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), file)
+        return reader
+
+    async def feed_file():
+        while True:
+            data = await loop.run_in_executor(None, file.read, ONLINE_READ_SIZE)
+            if not data:
+                reader.feed_eof()
+                return
+            reader.feed_data(data)
+
+    task = asyncio.ensure_future(feed_file())
+    ONLINE_TASKS.add(task)
+    task.add_done_callback(ONLINE_TASKS.discard)
+    return reader
+
+def report_error(message: str):
+    sys.stderr.write(f"Rejected: {message}\n")
+
+async def serve_records(session: OnlineSession, socket_path: Optional[str] = None, port: Optional[int] = None):
+    """
+    Accept connections on a Unix socket or a TCP port of localhost and feed their records to the
+    session until one of them sends "end". Rejected records are reported back to their sender.
+    """
+    ended = asyncio.Event()
+
+    async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def report(message: str):
+            writer.write(f"error: {message}\n".encode('utf-8'))
+        try:
+            await read_records(session, reader, report)
+            await writer.drain()
+        finally:
+            writer.close()
+            if session.ended:
+                ended.set()
+
+    if socket_path is not None:
+        server = await asyncio.start_unix_server(handle_client, socket_path)
+    else:
+        server = await asyncio.start_server(handle_client, '127.0.0.1', port)
+    try:
+        async with server:
+            await ended.wait()
+    finally:
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+async def run_online(session: OnlineSession, input_path: Optional[str] = None, socket_path: Optional[str] = None,
+                     port: Optional[int] = None) -> SchedulerOutput:
+    """
+    Run the session on its input: standard input, a named pipe or file, or the clients of a socket.
+
+    :return: The SchedulerOutput of the run, without an event log.
+    """
+    if socket_path is not None or port is not None:
+        await serve_records(session, socket_path, port)
+    else:
+        await read_records(session, await open_reader(input_path), report_error)
+    output = session.end()
+    return output if output is not None else session.run.output
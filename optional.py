@@ -0,0 +1,21 @@
+import importlib
+from types import ModuleType
+from typing import Dict, Optional
+
+# Optional dependencies already looked up: module name -> module, or None if it is not installed
+OPTIONAL_MODULES: Dict[str, Optional[ModuleType]] = {}
+
+def optional_import(name: str) -> Optional[ModuleType]:
+    """
+    Import an optional dependency (e.g. NumPy) the first time it is needed, rather than when the
+    program starts: importing NumPy takes longer than scheduling a small workload.
+
+    :param name: Name of the module.
+    :return: The module, or None if it is not installed.
+    """
+    if name not in OPTIONAL_MODULES:
+        try:
+            OPTIONAL_MODULES[name] = importlib.import_module(name)
+        except ImportError:
+            OPTIONAL_MODULES[name] = None
+    return OPTIONAL_MODULES[name]
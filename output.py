@@ -1,19 +1,174 @@
-from typing import List, Optional, Dict
+import operator
+import sys
+from array import array
+from itertools import islice
+from typing import List, Optional, Dict, Sequence, TextIO
+from registry import SCHEDULERS
+
+# Event kinds stored in the event log. Text is only produced when the log is rendered.
+ARRIVED = 0
+SELECTED = 1
+FINISHED = 2
+IDLE = 3
+LOTTERY_SELECTED = 4
+LOTTERY_COMPLETED = 5
+
+# Text of each event kind, formatted with the process name and the event argument
+EVENT_FORMATS = {
+    ARRIVED: "{0} arrived",
+    SELECTED: "{0} selected (burst {1})",
+    FINISHED: "{0} finished",
+    IDLE: "Idle",
+    LOTTERY_SELECTED: "Process {0} selected (Lottery)",
+    LOTTERY_COMPLETED: "Process {0} completes",
+}
+
+# Text of the event kinds that span several ticks (the argument is the length) when they are
+# written on one line instead of one line per tick
+COMPACT_FORMATS = {
+    IDLE: "Idle ({1} ticks)",
+    LOTTERY_SELECTED: "Process {0} selected (Lottery, {1} ticks)",
+}
+
+# Ordering of each event kind within a time tick: arrivals first, idle last
+EVENT_RANKS = (0, 1, 1, 2, 1, 1)
+
+# Names of the event kinds in machine-readable output
+EVENT_NAMES = ('arrived', 'selected', 'finished', 'idle', 'selected', 'finished')
 
 class SchedulerOutput:
-    def __init__(self, process_count: int, algorithm: str, quantum: Optional[int] = None):
+    def __init__(self, process_count: int, algorithm: str, quantum: Optional[int] = None, preemptive: bool = False,
+                 process_names: Sequence[str] = (), sink: Optional['EventSink'] = None,
+                 quanta: Optional[Sequence[int]] = None, boost: Optional[int] = None, aging: Optional[int] = None,
+                 cpus: int = 1, steal: bool = False):
         self.process_count = process_count
         self.algorithm = algorithm
-        self.quantum = quantum if algorithm == 'rr' else None
-        self.events: Dict[int, List[str]] = {}  # Events by time tick
+        self.quantum = quantum if algorithm in SCHEDULERS and SCHEDULERS[algorithm].quantum else None
+        # Quantum of each level and priority boost period, for feedback algorithms ('mlfq')
+        feedback = algorithm in SCHEDULERS and SCHEDULERS[algorithm].feedback
+        self.quanta = list(quanta) if feedback and quanta is not None else None
+        self.boost = boost if feedback else None
+        # Aging period of priority scheduling
+        self.aging = aging if algorithm in SCHEDULERS and SCHEDULERS[algorithm].aging else None
+        self.preemptive = preemptive
+        # Number of simulated CPUs, and whether idle CPUs steal work from the others
+        self.cpus = cpus
+        self.steal = steal if cpus > 1 else False
+        self.process_names = process_names  # Events refer to processes by their index in this list
+        # Event log as parallel typed columns: time tick, event kind, process index, argument.
+        # The argument is the burst for SELECTED, the length of the stretch for IDLE and the
+        # length of the run of consecutive wins for LOTTERY_SELECTED.
+        self.event_ticks = array('q')
+        self.event_kinds = array('b')
+        self.event_processes = array('i')
+        self.event_args = array('q')
+        # CPU of each event, only filled by multi-CPU runs (empty otherwise)
+        self.event_cpus = array('h')
         self.last_time_tick: Optional[int] = None
         self.incomplete_processes: List[str] = []
-        self.process_stats: Dict[str, Dict[str, int]] = {}  # Store stats for each process
+        # Statistics of the completed processes as parallel columns: process index, wait, turnaround, response
+        self.stat_processes = array('i')
+        self.stat_waits = array('q')
+        self.stat_turnarounds = array('q')
+        self.stat_responses = array('q')
+        self.idle_time = 0  # Ticks during which no process ran (summed over the CPUs)
+        self.cpu_busy: List[int] = []  # Ticks during which each CPU ran a process, for multi-CPU runs
+        # Work done by the engine (main loop iterations, dispatches, queue operations, arrivals),
+        # recorded once at the end of a run so it costs nothing while simulating
+        self.counters: Dict[str, int] = {}
+
+        # In streaming mode events go straight to the sink (in time order) instead of the log
+        self.sink = sink
+        if sink is not None:
+            self.add_event = self.add_cpu_event = sink.event
+            sink.begin(self)
+
+    def add_event(self, time_tick: int, kind: int, process: int = -1, arg: int = 0):
+        """
+        Record an event in the log.
+
+        :param time_tick: Time tick at which the event happens.
+        :param kind: Event kind, one of the constants in this module (ARRIVED, SELECTED, ...).
+        :param process: Index of the process in `process_names`, or -1 if the event has none.
+        :param arg: Kind-specific argument, e.g. the burst shown by SELECTED.
+        """
+        self.event_ticks.append(time_tick)
+        self.event_kinds.append(kind)
+        self.event_processes.append(process)
+        self.event_args.append(arg)
+
+    def add_cpu_event(self, time_tick: int, kind: int, process: int, arg: int, cpu: int):
+        """Record an event of a multi-CPU run, tagged with the CPU it happens on."""
+        self.add_event(time_tick, kind, process, arg)
+        self.event_cpus.append(cpu)
+
+    def add_idle(self, start: int, length: int):
+        """Record an idle stretch of `length` ticks starting at `start`."""
+        if length <= 0:
+            return
+        self.idle_time += length
+        if self.sink is not None:
+            self.sink.event(start, IDLE, -1, length)
+            return
+        # Extend the previous stretch if this one continues it
+        if self.event_kinds and self.event_kinds[-1] == IDLE and self.event_ticks[-1] + self.event_args[-1] == start:
+            self.event_args[-1] += length
+            return
+        self.add_event(start, IDLE, -1, length)
+
+    def add_lottery_run(self, start: int, process: int, length: int):
+        """Record that `process` won the `length` consecutive draws from `start` on."""
+        self.add_event(start, LOTTERY_SELECTED, process, length)
+
+    def event_count(self) -> int:
+        return len(self.event_ticks)
+
+    def sorted_event_indices(self) -> List[int]:
+        """
+        Return the positions of the logged events in output order: by time tick, with arrivals
+        first and every other event in the order it was recorded. Idle comes last in its tick.
+        """
+        keys = [time_tick * 4 + EVENT_RANKS[kind] for time_tick, kind in zip(self.event_ticks, self.event_kinds)]
+        # Engines mostly record in time order already, in which case there is nothing to sort
+        if all(map(operator.le, keys, islice(keys, 1, None))):
+            return list(range(len(keys)))
+        return sorted(range(len(keys)), key=keys.__getitem__)
 
-    def add_event(self, time_tick: int, event: str):
-        if time_tick not in self.events:
-            self.events[time_tick] = []
-        self.events[time_tick].append(event)
+    def iter_events(self, expand: bool = True):
+        """
+        Yield (time tick, event) pairs in output order: by time tick, arrivals first.
+
+        Idle stretches and runs of lottery wins are expanded into one event per tick, or
+        reported as a single "Idle (N ticks)" or "Process X selected (Lottery, N ticks)" event
+        when `expand` is False (a single tick is always reported as usual).
+        """
+        ticks, kinds, processes, args = self.event_ticks, self.event_kinds, self.event_processes, self.event_args
+        names, cpus = self.process_names, self.event_cpus
+        for i in self.sorted_event_indices():
+            time_tick, kind, arg = ticks[i], kinds[i], args[i]
+            name = names[processes[i]] if processes[i] >= 0 else None
+            prefix = f"CPU {cpus[i]} : " if cpus else ""
+            length = event_length(kind, arg)
+            if length == 1:
+                yield time_tick, prefix + EVENT_FORMATS[kind].format(name, arg)
+            elif expand:
+                event = prefix + EVENT_FORMATS[kind].format(name, arg)
+                for run_tick in range(time_tick, time_tick + length):
+                    yield run_tick, event
+            else:
+                yield time_tick, prefix + COMPACT_FORMATS[kind].format(name, length)
+
+    def record_counters(self, iterations: int, dispatches: int, queue_operations: int, arrivals: int):
+        """
+        Record how much work the engine did, for instrumentation.
+
+        :param iterations: Passes through the main simulation loop.
+        :param dispatches: Times a process was picked to run (queue pops, lottery draws).
+        :param queue_operations: Insertions into and removals from the ready queue.
+        :param arrivals: Processes admitted from the arrival list.
+        """
+        self.counters = {'iterations': iterations, 'dispatches': dispatches,
+                         'queue_operations': queue_operations, 'arrivals': arrivals}
 
     def set_last_time_tick(self, time_tick: int):
         self.last_time_tick = time_tick
@@ -21,64 +176,267 @@ class SchedulerOutput:
     def add_incomplete_process(self, process_name: str):
         self.incomplete_processes.append(process_name)
 
-    def add_process_stats(self, process_name: str, wait: int, turnaround: int, response: int):
-        """Add statistics for a process."""
-        self.process_stats[process_name] = {
-            'wait': wait,
-            'turnaround': turnaround,
-            'response': response
-        }
-
-    def print_output(self):
-        """Print the scheduler output in the required format."""
-        # Print the number of processes and algorithm used
-        print(f"{self.process_count} processes")
-        match self.algorithm:
-            case 'rr':
-              algo_description = "round-robin" 
-            case 'sjf':
-                algo_description = 'shortest job first'
-            case 'fcfs':
-                algo_description = 'first-come first-served'
-            case 'lottery':
-                algo_description = 'lottery'
-            case 'ljf':
-                algo_description = 'longest job first'
-            case _:
-                print(f"Unknown algorithm {self.algorithm}!")
-                exit(1)
-
-        match self.algorithm:
-            case 'sjf':
-                is_preemptive = "preemptive "
-            case _:
-                is_preemptive = ""
-
-        print(f"Using {is_preemptive}{algo_description.title()}")
-
-        # Print quantum if the algorithm is round robin
-        if self.algorithm == 'rr':
-            print(f"Quantum {self.quantum}")
-
-        # Print events in order
-        for time_tick in sorted(self.events.keys()):
-            for event in sorted(self.events[time_tick], key = lambda event: 'arrived' in event, reverse = True):
-                print(f"Time {time_tick:3} : {event}")
-
-        # Print idle times if any
-        if self.last_time_tick is not None:
-            for time_tick in range(max(self.events.keys()) + 1, self.last_time_tick):
-                print(f"Time {time_tick:3} : Idle")
+    def add_process_stats(self, process: int, wait: int, turnaround: int, response: int):
+        """
+        Add statistics for a completed process.
 
-        # Print the final time
-        if self.last_time_tick is not None:
-            print(f"Finished at time {self.last_time_tick:3}\n")
+        :param process: Index of the process in `process_names`.
+        :param wait: Time spent waiting in the ready queue.
+        :param turnaround: Time from arrival to completion.
+        :param response: Time from arrival to the first run.
+        """
+        self.stat_processes.append(process)
+        self.stat_waits.append(wait)
+        self.stat_turnarounds.append(turnaround)
+        self.stat_responses.append(response)
 
-        # Print process statistics, now sorted
-        for process_name, stats in sorted(self.process_stats.items(), key=lambda a: a[0]):
-            print(f"{process_name} wait {stats['wait']:3} turnaround {stats['turnaround']:3} response {stats['response']}")
+    @property
+    def process_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Statistics for each completed process by name, built from the statistics columns on access.
+        Use the columns (or the metrics module) directly for large runs.
+        """
+        names = self.process_names
+        return {names[process]: {'wait': wait, 'turnaround': turnaround, 'response': response}
+                for process, wait, turnaround, response in zip(self.stat_processes, self.stat_waits,
+                                                               self.stat_turnarounds, self.stat_responses)}
+
+    def setting_lines(self) -> List[str]:
+        """Return the lines giving the algorithm's settings under its title, e.g. ["Quantum 4"]."""
+        lines = []
+        if self.quanta is not None:
+            lines.append("Quanta " + " ".join(map(str, self.quanta)))
+            if self.boost is not None:
+                lines.append(f"Boost {self.boost}")
+        # Print quantum if the algorithm uses one (round robin)
+        elif self.quantum is not None:
+            lines.append(f"Quantum {self.quantum}")
+        elif self.aging is not None:
+            lines.append(f"Aging {self.aging}")
+        if self.cpus > 1:
+            lines.append(f"CPUs {self.cpus}" + (" with work stealing" if self.steal else ""))
+        return lines
+
+    def algorithm_title(self) -> str:
+        """Return the line naming the algorithm, e.g. "Using preemptive Shortest Job First"."""
+        spec = SCHEDULERS.get(self.algorithm)
+        if spec is None:
+            print(f"Unknown algorithm {self.algorithm}!")
+            exit(1)
+
+        # Algorithms that are preemptive by nature always say so
+        is_preemptive = "preemptive " if spec.preemptive == 'always' or self.preemptive else ""
+        return f"Using {is_preemptive}{spec.description.title()}"
+
+    def replay(self, sink: 'EventSink', order: Optional[List[int]] = None):
+        """
+        Send the recorded events to `sink` in output order, as a streaming run would have.
+
+        :param sink: The sink receiving the events.
+        :param order: The result of sorted_event_indices, if already computed.
+        """
+        sink.begin(self)
+        ticks, kinds, processes, args = self.event_ticks, self.event_kinds, self.event_processes, self.event_args
+        if order is None:
+            order = self.sorted_event_indices()
+        if self.event_cpus:
+            cpus = self.event_cpus
+            for i in order:
+                sink.event(ticks[i], kinds[i], processes[i], args[i], cpus[i])
+        else:
+            for i in order:
+                sink.event(ticks[i], kinds[i], processes[i], args[i])
+        sink.finish(self)
+
+    def print_output(self, file: Optional[TextIO] = None, expand: bool = True):
+        """
+        Print the scheduler output in the required format (to stdout unless `file` is given).
+        With `expand` False, idle stretches and lottery runs take one line each.
+        """
+        self.replay(TextSink(file if file is not None else sys.stdout, expand=expand))
 
     def __repr__(self):
         return (f"SchedulerOutput(process_count={self.process_count}, algorithm='{self.algorithm}', "
-                f"quantum={self.quantum}, events={self.events}, "
+                f"quantum={self.quantum}, events={self.event_count()}, "
                 f"last_time_tick={self.last_time_tick}, incomplete_processes={self.incomplete_processes})")
+
+
+def event_length(kind: int, arg: int) -> int:
+    """Number of ticks covered by an event: the length of an idle stretch or lottery run, else 1."""
+    if kind in COMPACT_FORMATS:
+        # Lottery logs written before runs were coalesced hold one event per tick and no length
+        return max(arg, 1)
+    return 1
+
+class EventSink:
+    """
+    Receives the events of a run as they happen. Engines send events in time order, so a sink
+    can write them out immediately instead of keeping the whole log in memory.
+    """
+    def begin(self, output: SchedulerOutput):
+        """Called once before the first event."""
+
+    def event(self, time_tick: int, kind: int, process: int = -1, arg: int = 0, cpu: int = -1):
+        """
+        Called for every event, with the same arguments as SchedulerOutput.add_event, plus the CPU
+        the event happens on in multi-CPU runs (-1 otherwise).
+        """
+
+    def finish(self, output: SchedulerOutput):
+        """Called once the run is over and the final time and statistics are known."""
+
+    def flush(self):
+        """Write out what is buffered so far; online runs call this after each batch of input."""
+
+class NullSink(EventSink):
+    """Discards every event; only counts them. Useful for benchmarking the engines alone."""
+    def __init__(self):
+        self.event_count = 0
+
+    def event(self, time_tick: int, kind: int, process: int = -1, arg: int = 0, cpu: int = -1):
+        self.event_count += 1
+
+class TextSink(EventSink):
+    """
+    Writes the text output format (the .out files), arrivals first within each time tick.
+    Idle stretches and runs of lottery wins take one line per tick, as in the .out files, or
+    one line each when `expand` is False.
+    """
+    def __init__(self, file: TextIO, buffer_lines: int = 8192, expand: bool = True):
+        self.file = file
+        self.expand = expand
+        self.buffer_lines = buffer_lines
+        self.lines: List[str] = []
+        self.process_names: Sequence[str] = ()
+        self.time_tick: Optional[int] = None  # Time tick whose events are being collected
+        self.arrivals = []
+        self.others = []
+        self.last_event_tick = -1
+
+    def begin(self, output: SchedulerOutput):
+        self.process_names = output.process_names
+        self.lines.append(f"{output.process_count} processes\n")
+        self.lines.append(f"{output.algorithm_title()}\n")
+        self.lines.extend(f"{line}\n" for line in output.setting_lines())
+
+    def event(self, time_tick: int, kind: int, process: int = -1, arg: int = 0, cpu: int = -1):
+        if time_tick != self.time_tick:
+            if self.time_tick is not None and time_tick < self.time_tick:
+                raise ValueError(f"Event at time {time_tick} received after time {self.time_tick}")
+            self.flush_time_tick()
+            self.time_tick = time_tick
+        if kind == ARRIVED:
+            self.arrivals.append((kind, process, arg, cpu))
+        else:
+            self.others.append((kind, process, arg, cpu))
+
+    def flush_time_tick(self):
+        """Format the events collected for the current time tick, arrivals first."""
+        time_tick = self.time_tick
+        lines = self.lines
+        for kind, process, arg, cpu in self.arrivals + self.others:
+            name = self.process_names[process] if process >= 0 else None
+            # Events of multi-CPU runs name their CPU: "Time   3 : CPU 1 : B selected (burst 5)"
+            prefix = f"CPU {cpu} : " if cpu >= 0 else ""
+            length = event_length(kind, arg)
+            if length == 1:
+                lines.append(f"Time {time_tick:3} : {prefix}{EVENT_FORMATS[kind].format(name, arg)}\n")
+            elif self.expand:
+                event = EVENT_FORMATS[kind].format(name, arg)
+                for run_tick in range(time_tick, time_tick + length):
+                    lines.append(f"Time {run_tick:3} : {prefix}{event}\n")
+            else:
+                lines.append(f"Time {time_tick:3} : {prefix}{COMPACT_FORMATS[kind].format(name, length)}\n")
+            self.last_event_tick = max(self.last_event_tick, time_tick + length - 1)
+        self.arrivals.clear()
+        self.others.clear()
+        if len(lines) >= self.buffer_lines:
+            self.write_lines()
+
+    def write_lines(self):
+        self.file.write("".join(self.lines))
+        self.lines.clear()
+
+    def flush(self):
+        # Events of the current time tick are held back until the tick is complete
+        self.write_lines()
+        self.file.flush()
+
+    def finish(self, output: SchedulerOutput):
+        self.flush_time_tick()
+        lines = self.lines
+
+        # Print idle times if any; multi-CPU runs report the idle time of each CPU after the final time instead
+        if output.last_time_tick is not None and output.cpus == 1:
+            for time_tick in range(self.last_event_tick + 1, output.last_time_tick):
+                lines.append(f"Time {time_tick:3} : Idle\n")
+
+        # Print the final time
+        if output.last_time_tick is not None:
+            lines.append(f"Finished at time {output.last_time_tick:3}\n")
+            for cpu, busy in enumerate(output.cpu_busy):
+                lines.append(f"CPU {cpu} busy {busy:3} idle {output.last_time_tick - busy:3}\n")
+            lines.append("\n")
+
+        # Print process statistics, now sorted
+        for process_name, stats in sorted(output.process_stats.items(), key=lambda a: a[0]):
+            lines.append(f"{process_name} wait {stats['wait']:3} turnaround {stats['turnaround']:3} response {stats['response']}\n")
+        self.write_lines()
+
+class JsonlSink(EventSink):
+    """Writes one JSON object per line: every event, then the end of the run and the process statistics."""
+    def __init__(self, file: TextIO, buffer_lines: int = 8192):
+        # Imported here so that runs writing the text format do not pay for it at startup
+        import json
+        self.encode = json.dumps
+        self.file = file
+        self.buffer_lines = buffer_lines
+        self.lines: List[str] = []
+        self.process_names: Sequence[str] = ()
+
+    def begin(self, output: SchedulerOutput):
+        self.process_names = output.process_names
+        record = {'processes': output.process_count, 'algorithm': output.algorithm,
+                  'preemptive': output.preemptive, 'quantum': output.quantum}
+        if output.quanta is not None:
+            record.update(quanta=output.quanta, boost=output.boost)
+        if output.aging is not None:
+            record['aging'] = output.aging
+        if output.cpus > 1:
+            record.update(cpus=output.cpus, steal=output.steal)
+        self.write_record(record)
+
+    def event(self, time_tick: int, kind: int, process: int = -1, arg: int = 0, cpu: int = -1):
+        record = {'time': time_tick, 'event': EVENT_NAMES[kind]}
+        if cpu >= 0:
+            record['cpu'] = cpu
+        if process >= 0:
+            record['process'] = self.process_names[process]
+        if kind == SELECTED:
+            record['burst'] = arg
+        elif kind in COMPACT_FORMATS:
+            record['length'] = event_length(kind, arg)
+        self.write_record(record)
+
+    def write_record(self, record: dict):
+        self.lines.append(self.encode(record) + "\n")
+        if len(self.lines) >= self.buffer_lines:
+            self.file.write("".join(self.lines))
+            self.lines.clear()
+
+    def flush(self):
+        self.file.write("".join(self.lines))
+        self.lines.clear()
+        self.file.flush()
+
+    def finish(self, output: SchedulerOutput):
+        record = {'time': output.last_time_tick, 'event': 'end'}
+        if output.cpu_busy:
+            record['busy'] = output.cpu_busy
+        self.write_record(record)
+        for process_name in output.incomplete_processes:
+            self.write_record({'process': process_name, 'incomplete': True})
+        for process_name, stats in sorted(output.process_stats.items(), key=lambda a: a[0]):
+            self.write_record({'process': process_name, **stats})
+        self.file.write("".join(self.lines))
+        self.lines.clear()
@@ -0,0 +1,58 @@
+from collections import deque
+from typing import Callable, Generator, Optional
+from input import Scheduler, ProcessTable
+from output import SchedulerOutput, EventSink
+from checkpoint import Checkpointer
+
+# Engines are written once, as policies: generators that schedule the processes of an arrival
+# source, called as policy(scheduler, source, output, checkpointer). The source gives the columns
+# of the processes (arrivals, bursts, tickets, priorities), `pending` (the processes not admitted
+# yet, in arrival order), `runfor`, and known_through / next_arrival_known. Wherever a policy
+# looks at arrivals it first yields until the source knows enough of them: a batch run knows
+# every process from the start and never yields, an online run (online.py) resumes the policy
+# as records come in. Per-process state is kept in dictionaries and dropped when a process finishes.
+Policy = Callable[..., Generator[None, None, None]]
+
+# runfor of an online run that was not given one: the run lasts until its input ends and every process is done
+UNBOUNDED = float('inf')
+
+class ArrivalSource:
+    def __init__(self, table: ProcessTable, runfor: int):
+        """
+        The processes a policy schedules. This class serves batch runs, where every process of the
+        table is known from the start; online.ArrivalFeed receives them one record at a time.
+
+        :param table: The processes.
+        :param runfor: Ticks to run.
+        """
+        self.arrivals, self.bursts = table.arrivals, table.bursts
+        self.tickets, self.priorities = table.tickets, table.priorities
+        self.pending = deque(table.arrival_order())
+        self.runfor = runfor
+
+    def skip(self, count: int):
+        """Drop the first `count` pending processes, admitted before the snapshot a run continues from."""
+        for _ in range(count):
+            self.pending.popleft()
+
+    def known_through(self, time_tick: int) -> bool:
+        """Every process arriving at or before `time_tick` is known."""
+        return True
+
+    def next_arrival_known(self, time_tick: float) -> bool:
+        """The next arrival is known, or is known not to come before `time_tick`."""
+        return True
+
+def run_policy(policy: Policy, scheduler: Scheduler, sink: Optional[EventSink] = None,
+               checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    """
+    Run a policy over the processes of `scheduler`, as the engine functions of the registry do.
+
+    :return: The SchedulerOutput of the run.
+    """
+    output = SchedulerOutput(process_count=scheduler.processcount, algorithm=scheduler.use, quantum=scheduler.quantum,
+                             preemptive=scheduler.preemptive, process_names=scheduler.table.names, sink=sink,
+                             quanta=scheduler.quanta, boost=scheduler.boost, aging=scheduler.aging)
+    for _ in policy(scheduler, ArrivalSource(scheduler.table, scheduler.runfor), output, checkpointer):
+        raise RuntimeError(f"The '{scheduler.use}' policy waited for arrivals in a batch run.")
+    return output
@@ -0,0 +1,274 @@
+import heapq
+from typing import Dict, Generator, List, Optional, Sequence, Tuple
+from input import Scheduler
+from output import SchedulerOutput, EventSink, ARRIVED, SELECTED, FINISHED
+from checkpoint import Checkpointer
+from policy import ArrivalSource, UNBOUNDED, run_policy
+
+# Key of an empty slot of the ready set, larger than any key
+INFINITE_KEY = float('inf')
+
+class AgedReadySet:
+    def __init__(self, scale: int, entries: Sequence[Tuple[int, int]] = ()):
+        """
+        Ready set of priority scheduling. A process is keyed by priority * scale + the time it
+        became ready, and its effective priority at time `now` is the whole number
+        ceil((key - now) / scale): one level better for every `scale` ticks it has waited. The
+        best process has the lowest effective priority, ties going to the one that became ready
+        first.
+
+        Processes take consecutive slots in the order they became ready, and a tree of minimum
+        keys over the slots finds the first slot holding a key up to a bound, so every operation
+        is O(log n). The processes of the best effective priority are exactly those whose key is
+        at most now + scale * (best priority), so the best process is the first such slot.
+
+        :param scale: Ticks of waiting per level of priority (1 without aging).
+        :param entries: (key, process) of the ready processes in the order they became ready,
+                        as returned by `snapshot`, to continue from.
+        """
+        self.scale = scale
+        self.keys: List[float] = []  # Key in each slot, infinite once the process has left
+        self.members: List[int] = []  # Process in each slot
+        self.live = 0
+        self.size = 1
+        self.tree = [INFINITE_KEY] * 2
+        for key, process in entries:
+            self.push(key, process)
+
+    def __len__(self):
+        return self.live
+
+    def set_key(self, slot: int, key: float):
+        tree = self.tree
+        node = slot + self.size
+        tree[node] = key
+        node >>= 1
+        while node:
+            left, right = tree[2 * node], tree[2 * node + 1]
+            smallest = left if left < right else right
+            if tree[node] == smallest:
+                break
+            tree[node] = smallest
+            node >>= 1
+
+    def rebuild(self):
+        """Drop the slots of processes that left and make room for as many new ones as there are live."""
+        live = [(key, process) for key, process in zip(self.keys, self.members) if key != INFINITE_KEY]
+        self.keys = [key for key, _ in live]
+        self.members = [process for _, process in live]
+        size = 1
+        while size < 2 * max(len(live), 1):
+            size *= 2
+        tree = [INFINITE_KEY] * (2 * size)
+        tree[size:size + len(live)] = self.keys
+        for node in range(size - 1, 0, -1):
+            left, right = tree[2 * node], tree[2 * node + 1]
+            tree[node] = left if left < right else right
+        self.size, self.tree = size, tree
+
+    def push(self, key: int, process: int):
+        if len(self.keys) == self.size:
+            self.rebuild()
+        self.keys.append(key)
+        self.members.append(process)
+        self.live += 1
+        self.set_key(len(self.keys) - 1, key)
+
+    def best_priority(self, now: int) -> int:
+        """Effective priority of the best ready process at time `now` (the set must not be empty)."""
+        return -((now - self.tree[1]) // self.scale)
+
+    def smallest_key(self) -> int:
+        return self.tree[1]
+
+    def pop_best(self, now: int) -> Tuple[int, int]:
+        """Take the best process at time `now` out of the set and return its (key, process)."""
+        bound = now + self.scale * self.best_priority(now)
+        tree, size = self.tree, self.size
+        node = 1
+        while node < size:
+            node = 2 * node if tree[2 * node] <= bound else 2 * node + 1
+        slot = node - size
+        key = self.keys[slot]
+        self.keys[slot] = INFINITE_KEY
+        self.live -= 1
+        self.set_key(slot, INFINITE_KEY)
+        return key, self.members[slot]
+
+    def snapshot(self) -> List[Tuple[int, int]]:
+        return [(key, process) for key, process in zip(self.keys, self.members) if key != INFINITE_KEY]
+
+class PriorityHeap:
+    def __init__(self, entries: Sequence[Tuple[int, int]] = ()):
+        """
+        Ready set of priority scheduling without aging, where priorities never change: a heap of
+        (priority, sequence, process), the sequence number breaking ties first come, first served.
+        It answers the same calls as AgedReadySet.
+
+        :param entries: (priority, process) of the ready processes in the order they became ready,
+                        as returned by `snapshot`, to continue from.
+        """
+        self.heap = [(key, sequence, process) for sequence, (key, process) in enumerate(entries)]
+        heapq.heapify(self.heap)
+        self.sequence = len(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, key: int, process: int):
+        heapq.heappush(self.heap, (key, self.sequence, process))
+        self.sequence += 1
+
+    def best_priority(self, now: int) -> int:
+        return self.heap[0][0]
+
+    def smallest_key(self) -> int:
+        return self.heap[0][0]
+
+    def pop_best(self, now: int) -> Tuple[int, int]:
+        key, _, process = heapq.heappop(self.heap)
+        return key, process
+
+    def snapshot(self) -> List[Tuple[int, int]]:
+        return [(key, process) for key, _, process in sorted(self.heap, key=lambda entry: entry[1])]
+
+def priority_scheduler(scheduler: Scheduler, sink: Optional[EventSink] = None,
+                       checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    return run_policy(priority_policy, scheduler, sink, checkpointer)
+
+def priority_policy(scheduler: Scheduler, source: ArrivalSource, output: SchedulerOutput,
+                    checkpointer: Optional[Checkpointer] = None) -> Generator[None, None, None]:
+    """
+    Priority scheduling: the ready process with the lowest priority value runs, ties going to the
+    one that became ready first. The preemptive variant switches as soon as a waiting process has a
+    strictly better priority than the running one; the other runs each process to completion.
+
+    With aging, a process's priority improves by one whole level for every `scheduler.aging` ticks
+    it waits in the ready set. Aging is lazy: a ready process is keyed by priority * aging + the
+    time it became ready, from which its priority at any time follows without updating the key, and
+    each decision is an O(log n) operation of the ready set (see AgedReadySet). See policy.py for
+    how the policy is run.
+    """
+    arrivals, bursts, priorities, pending = source.arrivals, source.bursts, source.priorities, source.pending
+    preemptive = scheduler.preemptive
+
+    # Keys are priority * scale + ready time * age: without aging they are just the priorities,
+    # and the clock the ready set compares them against stays at 0
+    scale = scheduler.aging or 1
+    age = 1 if scheduler.aging else 0
+
+    # Remaining time and response time of the processes admitted and not finished
+    remaining: Dict[int, int] = {}
+    response: Dict[int, int] = {}
+
+    ready = AgedReadySet(scale) if age else PriorityHeap()
+    sequence = 0  # Pushes into the ready set
+
+    current_time = 0
+    admitted = 0  # Processes taken from the pending ones, in arrival order
+    running = None  # Index of the process currently holding the CPU
+    # The running process does not age: its key is run_key at run_start, plus the time it has run
+    # since, so its effective priority stays the same while it runs
+    run_key = run_start = 0
+    iterations = dispatches = 0  # Instrumentation counters
+
+    # Continue from a snapshot of an earlier run if there is a valid one
+    state = checkpointer.resume_state(output) if checkpointer is not None else None
+    if state is not None:
+        current_time, admitted, running = state['time'], state['admitted'], state['running']
+        source.skip(admitted)
+        run_key, run_start = state['run_key'], state['run_start']
+        ready = AgedReadySet(scale, state['ready']) if age else PriorityHeap(state['ready'])
+        sequence = state['sequence']
+        remaining, response = state['remaining'], state['response']
+        iterations, dispatches = state['iterations'], state['dispatches']
+
+    # Add processes to the ready set once they have arrived; they have waited since their arrival.
+    # The caller first waits until the source knows the arrivals up to `current_time`.
+    def add_arrived_processes():
+        nonlocal admitted, sequence
+        while pending and arrivals[pending[0]] <= current_time:
+            process = pending.popleft()
+            remaining[process] = bursts[process]
+            ready.push(priorities[process] * scale + arrivals[process] * age, process)
+            sequence += 1
+            output.add_event(arrivals[process], ARRIVED, process)
+            admitted += 1
+
+    # Jump from event to event (arrival, completion, a waiting process overtaking the running one,
+    # or end of run) instead of tick by tick
+    while True:
+        while not source.known_through(current_time):
+            yield
+        if not current_time < source.runfor:
+            break
+        if checkpointer is not None and checkpointer.due(current_time, source.runfor):
+            checkpointer.save(output, {'time': current_time, 'admitted': admitted, 'running': running,
+                                       'run_key': run_key, 'run_start': run_start,
+                                       'ready': ready.snapshot(), 'sequence': sequence,
+                                       'remaining': dict(remaining), 'response': dict(response),
+                                       'iterations': iterations, 'dispatches': dispatches})
+        iterations += 1
+        add_arrived_processes()
+
+        clock = current_time * age
+        # Only the preemptive variant comes back here with a process still running: it keeps the
+        # CPU unless a waiting process now has a strictly better priority
+        if running is not None:
+            run_key += (current_time - run_start) * age
+            run_start = current_time
+            if ready and ready.best_priority(clock) < -((clock - run_key) // scale):
+                ready.push(run_key, running)
+                sequence += 1
+                running = None
+
+        if running is None:
+            if not ready:
+                # Nothing is ready until the next arrival (or the end of the run)
+                while not source.next_arrival_known(UNBOUNDED):
+                    yield
+                next_time = source.runfor
+                if pending:
+                    next_time = min(next_time, arrivals[pending[0]])
+                output.add_idle(current_time, next_time - current_time)
+                current_time = next_time
+                continue
+            run_key, running = ready.pop_best(clock)
+            run_start = current_time
+            dispatches += 1
+            if running not in response:
+                response[running] = current_time - arrivals[running]
+            output.add_event(current_time, SELECTED, running, remaining[running])
+
+        # Run until the process finishes or the end of the run; the preemptive variant also stops
+        # at the next arrival and when the best waiting process's priority becomes strictly better
+        # than the running one's: with a key k, that happens once k - now <= scale * (running priority - 1)
+        next_time = current_time + remaining[running]
+        if preemptive:
+            if age and ready:
+                next_time = min(next_time, ready.smallest_key() - scale * (-((clock - run_key) // scale) - 1))
+            while not source.next_arrival_known(next_time):
+                yield
+            if pending:
+                next_time = min(next_time, arrivals[pending[0]])
+        next_time = min(next_time, source.runfor)
+        remaining[running] -= next_time - current_time
+        current_time = next_time
+
+        # Admit the processes that arrived while it ran first, so events are recorded in time order
+        while not source.known_through(current_time):
+            yield
+        add_arrived_processes()
+
+        if remaining[running] == 0:
+            turnaround_time = current_time - arrivals[running]
+            waiting_time = turnaround_time - bursts[running]
+            output.add_process_stats(running, wait=waiting_time, turnaround=turnaround_time,
+                                     response=response.pop(running))
+            output.add_event(current_time, FINISHED, running)
+            del remaining[running]
+            running = None
+
+    output.set_last_time_tick(current_time)
+    # Every push takes a sequence number
+    output.record_counters(iterations, dispatches, queue_operations=sequence + dispatches, arrivals=admitted)
@@ -0,0 +1,124 @@
+import importlib
+from typing import Callable, Dict, List, Optional
+
+class SchedulerSpec:
+    def __init__(self, name: str, module: str, function: str, description: str, preemptive: str = 'never',
+                 quantum: bool = False, feedback: bool = False, aging: bool = False, multicore: bool = False,
+                 policy: Optional[str] = None, loaded: Optional[Callable] = None):
+        """
+        Describes an algorithm that can be selected with `use`. Its module is only imported when
+        the algorithm is run, so starting up does not pay for the engines that are not used.
+
+        :param name: Name given to `use`, e.g. 'fcfs'.
+        :param module: Module defining the engine, e.g. 'FCFS'.
+        :param function: Name of the engine function in that module; it is called as
+                         function(scheduler, sink, checkpointer) and returns a SchedulerOutput.
+        :param description: Name of the algorithm in the output, e.g. 'first-come first-served'.
+        :param preemptive: 'never', 'always' (the algorithm is preemptive by nature), or 'optional'
+                           (a preemptive variant is selected with "use <name> preemptive").
+        :param quantum: The algorithm needs a quantum.
+        :param feedback: The algorithm has several priority levels, each with its own quantum
+                         ("levels", "quantum" with one value per level) and an optional priority "boost".
+        :param aging: The algorithm schedules by process priority and accepts an "aging" period.
+        :param multicore: The multi-CPU engine (MULTICORE_MODULE) can run the algorithm on more than one CPU ("cpus").
+        :param policy: Name of the policy in the module, the generator the engine function runs (see policy.py),
+                       or None if the algorithm has none. Online runs drive the policy as records arrive.
+        :param loaded: The engine function, if it is already available.
+        """
+        self.name = name
+        self.module = module
+        self.function = function
+        self.description = description
+        self.preemptive = preemptive
+        self.quantum = quantum
+        self.feedback = feedback
+        self.aging = aging
+        self.multicore = multicore
+        self.policy = policy
+        self.loaded = loaded
+
+    def __repr__(self):
+        return (f"SchedulerSpec(name='{self.name}', module='{self.module}', function='{self.function}', "
+                f"preemptive='{self.preemptive}', quantum={self.quantum}, feedback={self.feedback}, aging={self.aging}, "
+                f"multicore={self.multicore}, policy={self.policy!r})")
+
+# Algorithms by name, in the order they are listed in messages
+SCHEDULERS: Dict[str, SchedulerSpec] = {}
+
+# Engine running the multicore algorithms when a workload has more than one CPU
+MULTICORE_MODULE = 'multicore'
+MULTICORE_FUNCTION = 'multicore_scheduler'
+
+def register_scheduler(name: str, module: str, function: str, description: str, preemptive: str = 'never',
+                       quantum: bool = False, feedback: bool = False, aging: bool = False, multicore: bool = False,
+                       policy: Optional[str] = None, loaded: Optional[Callable] = None) -> SchedulerSpec:
+    """
+    Make an algorithm available to `use`, the command line and every tool running schedulers.
+    Adding an algorithm takes its engine module and one call to this function.
+
+    :return: The SchedulerSpec registered (see SchedulerSpec for the parameters).
+    """
+    if preemptive not in ['never', 'always', 'optional']:
+        raise ValueError(f"Invalid preemptive value '{preemptive}' for algorithm '{name}'.")
+    spec = SchedulerSpec(name, module, function, description, preemptive, quantum, feedback, aging, multicore, policy,
+                         loaded)
+    SCHEDULERS[name] = spec
+    return spec
+
+def scheduler_names() -> List[str]:
+    return list(SCHEDULERS)
+
+def get_scheduler_spec(name: str) -> SchedulerSpec:
+    """Look up a registered algorithm; raises ValueError listing the valid names if there is none."""
+    spec = SCHEDULERS.get(name)
+    if spec is None:
+        valid = ", ".join(f"'{valid_name}'" for valid_name in SCHEDULERS)
+        raise ValueError(f"Invalid algorithm specified. Valid values: {valid}")
+    return spec
+
+def engine_modules() -> List[str]:
+    """Modules of every engine the registry may load, for build.py."""
+    return list(dict.fromkeys([spec.module for spec in SCHEDULERS.values()] + [MULTICORE_MODULE]))
+
+def load_engine(module: str, function: str) -> Callable:
+    """Return the engine function `function` of `module`, importing the module if needed."""
+    # In the single-file bundle built by build.py every engine is already defined in this namespace
+    loaded = globals().get(function)
+    if loaded is None:
+        loaded = getattr(importlib.import_module(module), function)
+    return loaded
+
+def load_scheduler_function(name: str, cpus: int = 1) -> Callable:
+    """
+    Return the engine function of a registered algorithm, importing its module on first use.
+    With more than one CPU, this is the multi-CPU engine, which runs every multicore algorithm.
+    """
+    spec = get_scheduler_spec(name)
+    if cpus > 1:
+        return load_engine(MULTICORE_MODULE, MULTICORE_FUNCTION)
+    if spec.loaded is None:
+        spec.loaded = load_engine(spec.module, spec.function)
+    return spec.loaded
+
+def load_policy_function(name: str) -> Callable:
+    """
+    Return the policy of a registered algorithm (see policy.py), importing its module on first use.
+    Raises ValueError if the algorithm has none, so it cannot run online.
+    """
+    spec = get_scheduler_spec(name)
+    if spec.policy is None:
+        valid = ", ".join(f"'{other.name}'" for other in SCHEDULERS.values() if other.policy is not None)
+        raise ValueError(f"Algorithm '{name}' has no online mode. Valid values: {valid}")
+    return load_engine(spec.module, spec.policy)
+
+register_scheduler('fcfs', 'FCFS', 'fcfs_scheduler', 'first-come first-served', multicore=True, policy='fcfs_policy')
+register_scheduler('sjf', 'SJF', 'sjf_scheduler', 'shortest job first', preemptive='always', multicore=True,
+                   policy='sjf_policy')
+register_scheduler('rr', 'roundrobin', 'round_robin_scheduler', 'round-robin', quantum=True, multicore=True,
+                   policy='round_robin_policy')
+register_scheduler('lottery', 'lottery', 'lottery_scheduler', 'lottery', multicore=True)
+register_scheduler('ljf', 'LJF', 'ljf_scheduler', 'longest job first', preemptive='optional', policy='ljf_policy')
+register_scheduler('mlfq', 'mlfq', 'mlfq_scheduler', 'multi-level feedback queue', preemptive='always', quantum=True,
+                   feedback=True, policy='mlfq_policy')
+register_scheduler('priority', 'priority', 'priority_scheduler', 'priority', preemptive='optional', aging=True,
+                   policy='priority_policy')
@@ -7,18 +7,24 @@ def print_scheduler_output(output: SchedulerOutput):
     print(f"Processes: {output.process_count}")
     print(f"Scheduling Method: {output.algorithm}")
     
-    if output.quantum:
+    if output.quanta is not None:
+        print(f"Quanta: {' '.join(map(str, output.quanta))}")
+        if output.boost is not None:
+            print(f"Boost: {output.boost}")
+    elif output.quantum:
         print(f"Quantum: {output.quantum}")
+    elif output.aging is not None:
+        print(f"Aging: {output.aging}")
+    if output.cpus > 1:
+        print(f"CPUs: {output.cpus}" + (" (work stealing)" if output.steal else ""))
     
     print("\n" + "=" * 40)
     print(f"{'Event Log':^40}")
     print("=" * 40)
     
-    # Printing events by time tick
-    for time_tick in sorted(output.events.keys()):
-        events = output.events[time_tick]
-        for event in events:
-            print(f"Time {time_tick:<2}: {event}")
+    # Printing events by time tick, with each idle stretch and lottery run on a single line
+    for time_tick, event in output.iter_events(expand=False):
+        print(f"Time {time_tick:<2}: {event}")
     
     print("=" * 40)
     
@@ -32,7 +38,10 @@ def print_scheduler_output(output: SchedulerOutput):
     
     # Printing last time tick
     if output.last_time_tick is not None:
-        print(f"Finished at time {output.last_time_tick}\n")
+        print(f"Finished at time {output.last_time_tick}")
+        for cpu, busy in enumerate(output.cpu_busy):
+            print(f"CPU {cpu}: busy {busy}, idle {output.last_time_tick - busy}")
+        print()
     
     print(f"{'Performance Metrics':^40}")
     print("=" * 40)
@@ -1,76 +1,109 @@
+from typing import Dict, Generator, Optional
 from input import Scheduler
-from output import SchedulerOutput
+from output import SchedulerOutput, EventSink, ARRIVED, SELECTED, FINISHED
 from collections import deque
+from checkpoint import Checkpointer
+from policy import ArrivalSource, UNBOUNDED, run_policy
 
-def round_robin_scheduler(scheduler: Scheduler) -> SchedulerOutput:
-    # Initialize SchedulerOutput
-    output = SchedulerOutput(process_count=scheduler.processcount, algorithm='rr', quantum=scheduler.quantum)
-    
-    # Sort processes by arrival time
-    processes = sorted(scheduler.processes, key=lambda p: p.arrival)
-    
-    # Use a queue to manage the ready processes
+def round_robin_scheduler(scheduler: Scheduler, sink: Optional[EventSink] = None,
+                          checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    return run_policy(round_robin_policy, scheduler, sink, checkpointer)
+
+def round_robin_policy(scheduler: Scheduler, source: ArrivalSource, output: SchedulerOutput,
+                       checkpointer: Optional[Checkpointer] = None) -> Generator[None, None, None]:
+    """Round robin: ready processes take turns of at most `scheduler.quantum` ticks (see policy.py)."""
+    arrivals, bursts, pending = source.arrivals, source.bursts, source.pending
+    quantum = scheduler.quantum
+
+    # Use a queue of process indices to manage the ready processes
     ready_queue = deque()
     time = 0  # Global time tracker
-    process_dict = {p.name: {'remaining_time': p.burst, 'start_time': None, 'response_recorded': False} for p in processes}
-    completed_processes = set()
-    
-    # Function to check if all processes are completed
-    def all_processes_completed():
-        return all(process_dict[p.name]['remaining_time'] == 0 for p in processes)
-    
-    # Add processes that have arrived to the ready queue
-    def add_arrived_processes(exclude_process=None):
-        for p in processes:
-            if p.arrival <= time and p.name not in completed_processes and p not in ready_queue:
-                if exclude_process is None or p.name != exclude_process.name:
-                    output.add_event(p.arrival, f"{p.name} arrived")
-                    ready_queue.append(p)
+    # Per-process state of this run, for the processes admitted and not finished
+    remaining_time: Dict[int, int] = {}
+    start_time: Dict[int, int] = {}
+    admitted = 0  # Processes taken from the pending ones, in arrival order
+    iterations = dispatches = requeues = 0  # Instrumentation counters
+
+    # Continue from a snapshot of an earlier run if there is a valid one
+    state = checkpointer.resume_state(output) if checkpointer is not None else None
+    if state is not None:
+        time, admitted = state['time'], state['admitted']
+        source.skip(admitted)
+        ready_queue.extend(state['ready_queue'])
+        remaining_time, start_time = state['remaining_time'], state['start_time']
+        iterations, dispatches, requeues = state['iterations'], state['dispatches'], state['requeues']
+
+    # Add processes that have arrived to the ready queue. Every process is admitted exactly
+    # once, in arrival order, so taking them off the pending ones replaces scanning the queue
+    # for membership. The caller first waits until the source knows the arrivals up to `time`.
+    def add_arrived_processes():
+        nonlocal admitted
+        while pending and arrivals[pending[0]] <= time:
+            process = pending.popleft()
+            remaining_time[process] = bursts[process]
+            output.add_event(arrivals[process], ARRIVED, process)
+            ready_queue.append(process)
+            admitted += 1
 
     # Keep running until all processes are completed or time exceeds runfor
-    while time < scheduler.runfor:
+    while True:
+        while not source.known_through(time):
+            yield
+        if not time < source.runfor:
+            break
+        if checkpointer is not None and checkpointer.due(time, source.runfor):
+            checkpointer.save(output, {'time': time, 'admitted': admitted, 'ready_queue': list(ready_queue),
+                                       'remaining_time': dict(remaining_time), 'start_time': dict(start_time),
+                                       'iterations': iterations, 'dispatches': dispatches, 'requeues': requeues})
+        iterations += 1
         add_arrived_processes()
 
         if ready_queue:
             # Get the next process in the queue
-            current_process = ready_queue.popleft()
-            output.add_event(time, f"{current_process.name} selected (burst {process_dict[current_process.name]['remaining_time']})")
-            
+            current = ready_queue.popleft()
+            dispatches += 1
+            output.add_event(time, SELECTED, current, remaining_time[current])
 
             # Record response time if it's the first time the process is running
-            if not process_dict[current_process.name]['response_recorded']:
-                process_dict[current_process.name]['response_recorded'] = True
-                process_dict[current_process.name]['start_time'] = time
+            if current not in start_time:
+                start_time[current] = time
 
             # Run the process for the quantum or until completion
-            execution_time = min(scheduler.quantum, process_dict[current_process.name]['remaining_time'])
-            process_dict[current_process.name]['remaining_time'] -= execution_time
-            # for t in range(time, time + execution_time):
-            #     output.add_event(t, f"{current_process.name} running")
-
+            execution_time = min(quantum, remaining_time[current])
+            remaining_time[current] -= execution_time
             time += execution_time
 
-            # After the process runs, check for new arrivals
-            add_arrived_processes(exclude_process=current_process)
+            # After the process runs, check for new arrivals (they queue ahead of the current process)
+            while not source.known_through(time):
+                yield
+            add_arrived_processes()
 
             # Check if the process is completed
-            if process_dict[current_process.name]['remaining_time'] == 0:
-                completed_processes.add(current_process.name)
-                turnaround_time = time - current_process.arrival
-                wait_time = turnaround_time - current_process.burst
-                response_time = process_dict[current_process.name]['start_time'] - current_process.arrival  # Correct response time
-                output.add_process_stats(current_process.name, wait=wait_time, turnaround=turnaround_time, response=response_time)
-                output.add_event(time, f"{current_process.name} finished")
+            if remaining_time[current] == 0:
+                turnaround_time = time - arrivals[current]
+                wait_time = turnaround_time - bursts[current]
+                response_time = start_time.pop(current) - arrivals[current]
+                output.add_process_stats(current, wait=wait_time, turnaround=turnaround_time, response=response_time)
+                output.add_event(time, FINISHED, current)
+                del remaining_time[current]
             else:
                 # Re-add the process to the queue if it's not finished
-                ready_queue.append(current_process)
+                ready_queue.append(current)
+                requeues += 1
         else:
-            # If no process is ready, the CPU is idle
-            output.add_event(time, "Idle")
-            time += 1
+            # If no process is ready, the CPU is idle until the next arrival (or the end of the run)
+            while not source.next_arrival_known(UNBOUNDED):
+                yield
+            next_time = source.runfor
+            if pending:
+                next_time = min(next_time, arrivals[pending[0]])
+            output.add_idle(time, next_time - time)
+            time = next_time
 
+        while not source.known_through(time):
+            yield
         add_arrived_processes()
 
     output.set_last_time_tick(time)
-    
-    return output
+    output.record_counters(iterations, dispatches, queue_operations=admitted + requeues + dispatches,
+                           arrivals=admitted)
@@ -0,0 +1,159 @@
+import filecmp
+import glob
+import io
+import os
+import sys
+import time
+from typing import List, Optional, Tuple, TextIO
+from input import Scheduler
+from tracefile import load_scheduler
+from output import SchedulerOutput, EventSink, TextSink
+from instrumentation import RunProfile, profile_phase
+from checkpoint import Checkpointer
+from registry import SCHEDULERS, load_scheduler_function
+
+# Extensions of the workloads picked up when a directory is given to a batch run
+BATCH_EXTENSIONS = ('.in', '.trace')
+
+def run_scheduler(scheduler: Scheduler, sink: Optional[EventSink] = None,
+                  checkpointer: Optional[Checkpointer] = None) -> SchedulerOutput:
+    """
+    Run the algorithm selected by `scheduler.use` (on `scheduler.cpus` CPUs); only its module is imported.
+
+    :param scheduler: The Scheduler describing the workload and the algorithm.
+    :param sink: Optional sink receiving the events as they happen instead of the in-memory log.
+    :param checkpointer: Optional Checkpointer taking snapshots of the run, and possibly resuming it from one.
+    :return: The SchedulerOutput of the run.
+    """
+    if scheduler.use not in SCHEDULERS:
+        print("Unknown algorithm!")
+        exit(1)
+    return load_scheduler_function(scheduler.use, scheduler.cpus)(scheduler, sink, checkpointer)
+
+def write_scheduler_output_to_file(scheduler_output: SchedulerOutput, file_path: str, profile: Optional[RunProfile] = None,
+                                   expand: bool = True):
+    """
+    Write the SchedulerOutput details to a specified file by redirecting print_output method output to a file.
+
+    :param scheduler_output: The SchedulerOutput object to be written to the file.
+    :param file_path: The path to the file where the output should be written.
+    :param profile: If given, sorting the events, formatting and writing are timed as separate phases.
+    :param expand: Write idle stretches and lottery runs one line per tick (False: one line each).
+    """
+    if profile is None:
+        with open(file_path, 'w') as file:
+            scheduler_output.print_output(file, expand)
+        return
+
+    # Format into memory first so the file write can be timed on its own
+    with profile_phase(profile, 'sort'):
+        order = scheduler_output.sorted_event_indices()
+    with profile_phase(profile, 'format'):
+        buffer = io.StringIO()
+        scheduler_output.replay(TextSink(buffer, expand=expand), order)
+    with profile_phase(profile, 'write'):
+        with open(file_path, 'w') as file:
+            file.write(buffer.getvalue())
+
+def remove_file_extension(file_path: str) -> str:
+    """
+    Remove the file extension from a file path, if present.
+
+    :param file_path: The path of the file from which the extension should be removed.
+    :return: The file path without the extension.
+    """
+    # Split the file path into root and extension
+    root, _ = os.path.splitext(file_path)
+    return root
+
+def find_workload_files(patterns: List[str]) -> List[str]:
+    """
+    Expand the files, directories and glob patterns given to a batch run into a list of workloads.
+    Directories contribute their '.in' and '.trace' files; each workload is listed once.
+
+    :param patterns: File paths, directory paths or glob patterns.
+    :return: The workload paths, in the order given (directories and globs sorted by name).
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                             if name.endswith(BATCH_EXTENSIONS))
+        elif os.path.exists(pattern):
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise ValueError(f"No workload matches '{pattern}'.")
+        files.extend(matches)
+    return list(dict.fromkeys(files))
+
+def run_workload(file_path: str) -> Tuple[str, float, str]:
+    """
+    Schedule one workload and write its output next to it as '<name>.out.test'. This is the
+    worker of a batch run, so errors are reported in the result instead of raised.
+
+    :param file_path: Path of the workload (text or binary trace).
+    :return: The workload path, the wall time in seconds, and how the output compares to '<name>.out':
+             'same', 'differs', 'no .out', or 'error: <message>'.
+    """
+    start = time.perf_counter()
+    try:
+        scheduler = load_scheduler(file_path)
+        if scheduler is None:
+            raise ValueError("missing 'end'")
+        root = remove_file_extension(file_path)
+        write_scheduler_output_to_file(run_scheduler(scheduler), root + ".out.test")
+    except Exception as error:
+        return file_path, time.perf_counter() - start, f"error: {error}"
+
+    expected = root + ".out"
+    if not os.path.exists(expected):
+        status = "no .out"
+    elif filecmp.cmp(expected, root + ".out.test", shallow=False):
+        status = "same"
+    else:
+        status = "differs"
+    return file_path, time.perf_counter() - start, status
+
+def run_batch(files: List[str], workers: Optional[int] = None) -> List[Tuple[str, float, str]]:
+    """
+    Run many workloads across a pool of worker processes, so the interpreter and modules are
+    loaded once per worker rather than once per file.
+
+    :param files: The workload paths.
+    :param workers: Number of worker processes (None for one per CPU, 1 to run in this process).
+    :return: The result of run_workload for each file, in the order of `files`.
+    """
+    workers = min(workers or os.cpu_count() or 1, max(len(files), 1))
+    if workers == 1:
+        return [run_workload(file_path) for file_path in files]
+
+    # Imported here: most runs schedule a single file and never start a pool
+    import multiprocessing
+
+    # Hand out files in small batches: most workloads take milliseconds, so per-task overhead matters
+    chunk_size = max(1, min(16, len(files) // (workers * 4)))
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(run_workload, files, chunk_size)
+
+def print_batch_summary(results: List[Tuple[str, float, str]], elapsed: float, file: Optional[TextIO] = None):
+    """
+    Print a table of the batch results (one row per workload) followed by the totals.
+
+    :param results: The results returned by run_batch.
+    :param elapsed: Wall time of the whole batch, in seconds.
+    :param file: Where to print the table (standard output by default).
+    """
+    file = file or sys.stdout
+    width = max([len("Workload")] + [len(file_path) for file_path, _, _ in results])
+    file.write(f"{'Workload':<{width}}  {'Time (s)':>9}  Status\n")
+    for file_path, seconds, status in results:
+        file.write(f"{file_path:<{width}}  {seconds:9.3f}  {status}\n")
+
+    counts = {}
+    for _, _, status in results:
+        key = 'error' if status.startswith('error') else status
+        counts[key] = counts.get(key, 0) + 1
+    totals = ", ".join(f"{counts[key]} {key}" for key in ['same', 'differs', 'no .out', 'error'] if key in counts)
+    file.write(f"{len(results)} workloads in {elapsed:.3f}s" + (f": {totals}" if totals else "") + "\n")
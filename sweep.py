@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import sys
+from typing import Dict, List, Optional, Tuple, TextIO
+from input import Scheduler
+from output import SchedulerOutput, NullSink
+from registry import load_scheduler_function
+from metrics import percentile
+
+# Workload shared by the runs of a sweep; worker processes receive it once, when the pool starts
+SWEEP_WORKLOAD: Optional[Scheduler] = None
+
+# Columns of the sweep table: each metric is reported as its average and these percentiles
+SWEEP_METRICS = ['wait', 'turnaround', 'response']
+SWEEP_PERCENTILES = [50, 95]
+
+def parse_quanta(spec: str) -> List[int]:
+    """
+    Parse the quanta of a sweep: a comma-separated list of values and ranges, where a range
+    is 'first-last' or 'first-last:step' (inclusive), e.g. '1-10' or '1,2,4,8' or '2-20:2'.
+
+    :param spec: The quanta as given on the command line.
+    :return: The quanta, in the order given, each listed once.
+    """
+    quanta = []
+    for part in spec.split(','):
+        part = part.strip()
+        try:
+            if '-' in part:
+                bounds, _, step = part.partition(':')
+                first, last = (int(bound) for bound in bounds.split('-', 1))
+                quanta.extend(range(first, last + 1, int(step) if step else 1))
+            else:
+                quanta.append(int(part))
+        except ValueError:
+            raise ValueError(f"Invalid quantum or range '{part}'.")
+    if not quanta or min(quanta) < 1:
+        raise ValueError("Quanta must be positive integers.")
+    return list(dict.fromkeys(quanta))
+
+def summarize_process_stats(output: SchedulerOutput) -> Dict[str, Tuple[float, ...]]:
+    """
+    Summarize the per-process statistics of a run.
+
+    :param output: The SchedulerOutput of the run.
+    :return: For each metric, its average followed by the SWEEP_PERCENTILES.
+    """
+    columns = {'wait': output.stat_waits, 'turnaround': output.stat_turnarounds, 'response': output.stat_responses}
+    summary = {}
+    for metric in SWEEP_METRICS:
+        values = sorted(columns[metric])
+        average = sum(values) / len(values) if values else 0.0
+        summary[metric] = (average,) + tuple(percentile(values, percent) for percent in SWEEP_PERCENTILES)
+    return summary
+
+def set_sweep_workload(scheduler: Scheduler):
+    """Pool initializer: keep the workload of the sweep in the worker process."""
+    global SWEEP_WORKLOAD
+    SWEEP_WORKLOAD = scheduler
+
+def run_sweep_quantum(quantum: int, events_path: Optional[str] = None) -> Tuple[int, int, Dict[str, Tuple[float, ...]]]:
+    """
+    Run round robin with one quantum over the sweep workload.
+
+    :param quantum: The quantum to evaluate.
+    :param events_path: If given, the full text output of the run is written to this file.
+    :return: The quantum, the number of completed processes and the summary of their statistics.
+    """
+    workload = SWEEP_WORKLOAD
+    # The processes and CPUs are shared; only the quantum differs between runs
+    scheduler = Scheduler(processcount=workload.processcount, runfor=workload.runfor, use='rr', quantum=quantum,
+                          table=workload.table, cpus=workload.cpus, steal=workload.steal)
+    engine = load_scheduler_function(scheduler.use, scheduler.cpus)
+    if events_path is None:
+        output = engine(scheduler, NullSink())
+    else:
+        output = engine(scheduler)
+        with open(events_path, 'w') as file:
+            output.print_output(file)
+    return quantum, len(output.stat_processes), summarize_process_stats(output)
+
+def run_sweep_task(task: Tuple[int, Optional[str]]):
+    """Pool entry point: run_sweep_quantum with its arguments packed in a tuple."""
+    return run_sweep_quantum(*task)
+
+def sweep_quanta(scheduler: Scheduler, quanta: List[int], workers: Optional[int] = None,
+                 events_root: Optional[str] = None) -> List[Tuple[int, int, Dict[str, Tuple[float, ...]]]]:
+    """
+    Evaluate round robin over several quanta, one run per quantum, in parallel. The workload is
+    parsed once by the caller and handed to each worker process once, whatever its algorithm.
+
+    :param scheduler: The workload.
+    :param quanta: The quanta to evaluate.
+    :param workers: Number of worker processes (None for one per CPU, 1 to run in this process).
+    :param events_root: If given, the text output of each run is written to '<events_root>.q<quantum>.out.test'.
+    :return: The result of run_sweep_quantum for each quantum, in the order of `quanta`.
+    """
+    tasks = [(quantum, f"{events_root}.q{quantum}.out.test" if events_root else None) for quantum in quanta]
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    if workers == 1:
+        set_sweep_workload(scheduler)
+        return [run_sweep_task(task) for task in tasks]
+
+    with multiprocessing.Pool(workers, initializer=set_sweep_workload, initargs=(scheduler,)) as pool:
+        return pool.map(run_sweep_task, tasks, 1)
+
+def print_sweep_table(results: List[Tuple[int, int, Dict[str, Tuple[float, ...]]]], process_count: int,
+                      file: Optional[TextIO] = None):
+    """
+    Print one row per quantum with the average and percentiles of each metric.
+
+    :param results: The results returned by sweep_quanta.
+    :param process_count: Number of processes in the workload.
+    :param file: Where to print the table (standard output by default).
+    """
+    file = file or sys.stdout
+    columns = [f"{metric[:4]} {label}" for metric in SWEEP_METRICS
+               for label in ['avg'] + [f"p{percent}" for percent in SWEEP_PERCENTILES]]
+    width = max(9, max(len(column) for column in columns))
+    file.write(f"{'Quantum':>7}  {'Done':>9}" + "".join(f"  {column:>{width}}" for column in columns) + "\n")
+    for quantum, completed, summary in results:
+        cells = []
+        for metric in SWEEP_METRICS:
+            average, *percentiles = summary[metric]
+            cells.append(f"{average:{width}.2f}")
+            cells.extend(f"{value:{width}d}" for value in percentiles)
+        file.write(f"{quantum:>7}  {f'{completed}/{process_count}':>9}" + "".join(f"  {cell}" for cell in cells) + "\n")
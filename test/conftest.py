@@ -0,0 +1,46 @@
+import io
+import os
+import sys
+import pytest
+
+# The modules live at the root of the repository, next to exec.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from output import TextSink
+from runner import run_scheduler
+from tracefile import load_scheduler
+
+@pytest.fixture
+def make_scheduler(tmp_path):
+    """Parse a workload given as the text of an input file."""
+    def make(text: str, name: str = 'workload.in'):
+        path = tmp_path / name
+        path.write_text(text)
+        return load_scheduler(str(path))
+    return make
+
+@pytest.fixture
+def render():
+    """Render a run as the text of its output file."""
+    def render(output, expand: bool = True) -> str:
+        buffer = io.StringIO()
+        output.print_output(buffer, expand=expand)
+        return buffer.getvalue()
+    return render
+
+@pytest.fixture
+def streamed():
+    """Run a workload with its output written by a TextSink, as with --stream text."""
+    def streamed(scheduler) -> str:
+        buffer = io.StringIO()
+        sink = TextSink(buffer)
+        sink.finish(run_scheduler(scheduler, sink))
+        return buffer.getvalue()
+    return streamed
+
+@pytest.fixture
+def schedule_lines(render):
+    """The selected and finished lines of a run's output."""
+    def schedule_lines(output):
+        return [line for line in render(output).splitlines() if 'selected' in line or 'finished' in line]
+    return schedule_lines
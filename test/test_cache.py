@@ -0,0 +1,43 @@
+import os
+from cache import ResultCache, scheduler_cache_key, serialize_output
+from generator import generate_workload
+from runner import run_scheduler
+
+def workload(quantum: int):
+    return generate_workload(60, seed=1, use='rr', quantum=quantum)
+
+def cached_run(cache: ResultCache, scheduler, runs: list):
+    """Run through the cache, recording in `runs` the quantum of every run that was not cached."""
+    def run():
+        runs.append(scheduler.quantum)
+        return run_scheduler(scheduler)
+    return cache.run(scheduler, run)
+
+def test_hit_returns_the_stored_run(tmp_path, render):
+    cache = ResultCache(str(tmp_path))
+    runs = []
+    first = cached_run(cache, workload(2), runs)
+    again = cached_run(cache, workload(2), runs)
+    assert runs == [2]
+    assert render(again) == render(first)
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    schedulers = {quantum: workload(quantum) for quantum in [2, 3, 4]}
+    sizes = {quantum: len(serialize_output(run_scheduler(scheduler))) for quantum, scheduler in schedulers.items()}
+    paths = {quantum: os.path.join(str(tmp_path), scheduler_cache_key(scheduler) + '.result')
+             for quantum, scheduler in schedulers.items()}
+    # Room for any two of the results, but not for all three
+    cache = ResultCache(str(tmp_path), max_bytes=sum(sizes.values()) - min(sizes.values()))
+    runs = []
+    cached_run(cache, schedulers[2], runs)
+    cached_run(cache, schedulers[3], runs)
+    # 2 was stored first, but a hit makes it the most recently used
+    os.utime(paths[2], (1000, 1000))
+    os.utime(paths[3], (2000, 2000))
+    cached_run(cache, schedulers[2], runs)
+    cached_run(cache, schedulers[4], runs)
+    assert runs == [2, 3, 4]
+    assert [os.path.exists(paths[quantum]) for quantum in [2, 3, 4]] == [True, False, True]
+    # The evicted run is run again
+    cached_run(cache, schedulers[3], runs)
+    assert runs == [2, 3, 4, 3]
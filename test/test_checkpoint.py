@@ -0,0 +1,92 @@
+import pytest
+from exec import run_checkpointed
+from generator import generate_workload
+from checkpoint import load_checkpoint, write_checkpoint
+from runner import run_scheduler
+from tracefile import write_text_trace
+
+def workloads():
+    """One workload per engine, with a seed for lottery, and the multi-CPU engine with round robin and SJF."""
+    yield generate_workload(40, seed=1, use='fcfs')
+    yield generate_workload(40, seed=2, use='sjf')
+    yield generate_workload(40, seed=3, use='rr', quantum=3)
+    yield generate_workload(40, seed=4, use='ljf', preemptive=True)
+    yield generate_workload(40, seed=5, use='mlfq', quantum=2)
+    aging = generate_workload(40, seed=6, use='priority', max_priority=4)
+    aging.aging = 5
+    yield aging
+    lottery = generate_workload(30, seed=7, use='lottery', max_tickets=5)
+    lottery.seed = 3
+    yield lottery
+    yield generate_workload(40, seed=8, use='rr', quantum=2, cpus=2, steal=True)
+    yield generate_workload(40, seed=9, use='sjf', cpus=2)
+
+def workload_text(tmp_path, scheduler) -> str:
+    path = tmp_path / "generated.in"
+    write_text_trace(scheduler, str(path))
+    return path.read_text()
+
+def earlier_text(text: str, cutoff: int, keep_later: bool) -> str:
+    """
+    The workload as it was at time `cutoff`, with runfor `cutoff`: the processes arrived by then and,
+    with `keep_later`, every other process arriving later, so that the others are inserted between them.
+    """
+    lines = text.splitlines()
+    arrived = [line for line in lines if line.startswith("process ") and int(line.split()[4]) <= cutoff]
+    later = [line for line in lines if line.startswith("process ") and int(line.split()[4]) > cutoff]
+    processes = arrived + (later[1::2] if keep_later else [])
+    settings = [line for line in lines if not line.startswith(("process ", "processcount", "runfor", "end"))]
+    return "\n".join([f"processcount {len(processes)}", f"runfor {cutoff}"] + settings + processes + ["end"]) + "\n"
+
+def snapshot_of(output):
+    return (output.event_count(), list(output.event_ticks), list(output.event_kinds), list(output.event_processes),
+            list(output.event_args), list(output.stat_processes), list(output.stat_waits), output.idle_time,
+            output.last_time_tick, output.incomplete_processes, output.counters)
+
+@pytest.mark.parametrize('scheduler', list(workloads()), ids=lambda scheduler: f"{scheduler.use}-{scheduler.cpus}")
+@pytest.mark.parametrize('keep_later', [False, True], ids=['appended', 'inserted'])
+def test_resumed_run_equals_a_fresh_run(tmp_path, make_scheduler, render, capsys, scheduler, keep_later):
+    text = workload_text(tmp_path, scheduler)
+    path = str(tmp_path / "workload.checkpoint")
+    # Run the workload as it was halfway through, then the whole of it: the processes that arrived
+    # since come after the others in the file, or between those that had not arrived yet
+    run_checkpointed(make_scheduler(earlier_text(text, scheduler.runfor // 2, keep_later)), path, every=5)
+    assert "Resuming" not in capsys.readouterr().out
+    full = make_scheduler(text)
+    resumed = run_checkpointed(full, path, every=5)
+    assert "Resuming from the checkpoint at time" in capsys.readouterr().out
+    fresh = run_scheduler(make_scheduler(text))
+    assert snapshot_of(resumed) == snapshot_of(fresh)
+    assert render(resumed) == render(fresh)
+
+def checkpointed(path: str, scheduler):
+    checkpointer = load_checkpoint(path, scheduler, 4)
+    output = run_scheduler(scheduler, checkpointer=checkpointer)
+    write_checkpoint(path, scheduler, output, checkpointer)
+
+WORKLOAD = ("processcount 4\nrunfor 40\nuse rr\nquantum 2\n"
+            "process name A arrival 0 burst 6\n"
+            "process name B arrival 2 burst 5\n"
+            "process name C arrival 5 burst 9\n"
+            "process name D arrival 30 burst 3\n"
+            "end\n")
+
+def test_checkpoint_is_rejected_after_the_arrival_prefix_changes(tmp_path, make_scheduler):
+    path = str(tmp_path / "workload.checkpoint")
+    checkpointed(path, make_scheduler(WORKLOAD))
+    # Processes arriving later than a snapshot do not invalidate it
+    later = make_scheduler(WORKLOAD.replace("arrival 30 burst 3", "arrival 31 burst 7"))
+    assert load_checkpoint(path, later, 4).resume['state']['time'] <= 30
+    # A change to any process arrived by every snapshot does
+    for old, new in [("A arrival 0 burst 6", "A arrival 0 burst 7"), ("A arrival 0", "A arrival 1"),
+                     ("name A", "name Z"), ("processcount 4", "processcount 5\nprocess name E arrival 0 burst 1")]:
+        changed = make_scheduler(WORKLOAD.replace(old, new))
+        assert load_checkpoint(path, changed, 4).resume is None, new
+    # So do other settings, and a run ending before every snapshot
+    assert load_checkpoint(path, make_scheduler(WORKLOAD.replace("quantum 2", "quantum 3")), 4).resume is None
+    assert load_checkpoint(path, make_scheduler(WORKLOAD.replace("runfor 40", "runfor 4")), 4).resume is None
+
+def test_a_damaged_checkpoint_starts_from_scratch(tmp_path, make_scheduler):
+    path = tmp_path / "workload.checkpoint"
+    path.write_bytes(b"not a checkpoint")
+    assert load_checkpoint(str(path), make_scheduler(WORKLOAD), 4).resume is None
@@ -0,0 +1,55 @@
+import pytest
+from runner import run_scheduler
+
+def test_demotion_and_preemption_below_the_top_level(make_scheduler, schedule_lines):
+    # A uses up its quantum of 2 on level 0 and moves to level 1 (quantum 4). B's arrival at 3
+    # preempts it after 1 tick there; A resumes first on level 1 with the 3 ticks left of its
+    # quantum, uses them up and moves to level 2, where C's arrival at 10 does not preempt it
+    # because it finishes at that tick
+    scheduler = make_scheduler("processcount 3\nrunfor 15\nuse mlfq\nquantum 2 4 8\n"
+                               "process name A arrival 0 burst 7\n"
+                               "process name B arrival 3 burst 3\n"
+                               "process name C arrival 10 burst 1\nend\n")
+    output = run_scheduler(scheduler)
+    assert schedule_lines(output) == [
+        "Time   0 : A selected (burst 7)",
+        "Time   2 : A selected (burst 5)",
+        "Time   3 : B selected (burst 3)",
+        "Time   5 : A selected (burst 4)",
+        "Time   8 : B selected (burst 1)",
+        "Time   9 : B finished",
+        "Time   9 : A selected (burst 1)",
+        "Time  10 : A finished",
+        "Time  10 : C selected (burst 1)",
+        "Time  11 : C finished",
+    ]
+    assert output.process_stats['A'] == {'wait': 3, 'turnaround': 10, 'response': 0}
+    assert output.process_stats['B'] == {'wait': 3, 'turnaround': 6, 'response': 0}
+    assert output.idle_time == 4
+
+def test_boost_after_a_slice_overruns_it(make_scheduler, schedule_lines):
+    # A's slice on level 1 runs from 2 to 4, past the boost at 3: the boost happens at the next
+    # decision, at 4, and the next one at 6. Each boost moves B and A back to level 0 in level order
+    scheduler = make_scheduler("processcount 2\nrunfor 12\nuse mlfq\nquantum 1 2\nboost 3\n"
+                               "process name A arrival 0 burst 5\n"
+                               "process name B arrival 0 burst 5\nend\n")
+    output = run_scheduler(scheduler)
+    assert schedule_lines(output) == [
+        "Time   0 : A selected (burst 5)",
+        "Time   1 : B selected (burst 5)",
+        "Time   2 : A selected (burst 4)",
+        "Time   4 : B selected (burst 4)",
+        "Time   5 : A selected (burst 2)",
+        "Time   6 : B selected (burst 3)",
+        "Time   7 : A selected (burst 1)",
+        "Time   8 : A finished",
+        "Time   8 : B selected (burst 2)",
+        "Time  10 : B finished",
+    ]
+    assert output.process_stats['B'] == {'wait': 5, 'turnaround': 10, 'response': 1}
+
+def test_quantum_is_only_accepted_by_algorithms_using_one(make_scheduler):
+    process = "process name A arrival 0 burst 1\nend\n"
+    assert make_scheduler(f"processcount 1\nrunfor 5\nuse mlfq\nquantum 3\n{process}").quanta == [3, 6, 12]
+    with pytest.raises(ValueError, match="algorithms that use one: 'rr', 'mlfq'"):
+        make_scheduler(f"processcount 1\nrunfor 5\nuse fcfs\nquantum 3\n{process}")
@@ -0,0 +1,66 @@
+import random
+from runner import run_scheduler
+from multicore import ShortestFirstRunQueue
+from sweep import summarize_process_stats, sweep_quanta
+
+def test_slice_ending_at_runfor_completes(make_scheduler, render):
+    # Like the single-CPU engines, a process whose burst ends exactly at runfor finishes
+    for use in ['fcfs', 'sjf', 'rr']:
+        quantum = "quantum 5\n" if use == 'rr' else ""
+        scheduler = make_scheduler(f"processcount 1\nrunfor 5\nuse {use}\n{quantum}cpus 2\n"
+                                   "process name A arrival 0 burst 5\nend\n")
+        output = run_scheduler(scheduler)
+        assert output.process_stats['A'] == {'wait': 0, 'turnaround': 5, 'response': 0}
+        assert "Time   5 : CPU 0 : A finished\n" in render(output)
+        assert output.cpu_busy == [5, 0]
+
+def test_slices_ending_at_runfor_on_several_cpus(make_scheduler):
+    scheduler = make_scheduler("processcount 3\nrunfor 6\nuse fcfs\ncpus 2\nprocess name A arrival 0 burst 4\n"
+                               "process name B arrival 1 burst 5\nprocess name C arrival 2 burst 3\nend\n")
+    output = run_scheduler(scheduler)
+    # A ends at 4 and C runs from there; B ends exactly at runfor on the other CPU
+    assert output.process_stats['B'] == {'wait': 0, 'turnaround': 5, 'response': 0}
+    assert 'C' not in output.process_stats
+    assert output.cpu_busy == [6, 5]
+
+def test_shortest_first_steal_takes_longest_job():
+    remaining = [3, 9, 1, 9, 4]
+    queue = ShortestFirstRunQueue(remaining)
+    for process in range(5):
+        queue.push(process)
+    # The longest job, the latest queued of the two of length 9
+    assert queue.steal() == 3
+    assert queue.steal() == 1
+    assert [queue.pop_next() for _ in range(len(queue))] == [2, 0, 4]
+
+def test_shortest_first_run_queue_matches_a_sorted_list():
+    rnd = random.Random(1)
+    remaining = [rnd.randint(1, 6) for _ in range(3000)]
+    queue = ShortestFirstRunQueue(remaining)
+    model = []  # (remaining time, queue order, process) of the queued processes
+    for process in range(3000):
+        queue.push(process)
+        model.append((remaining[process], process, process))
+        # Take the shortest job, steal the longest one, or continue from a snapshot, now and then
+        action = rnd.random()
+        if action < 0.3:
+            shortest = min(model)
+            model.remove(shortest)
+            assert queue.pop_next() == shortest[2]
+        elif action < 0.6:
+            longest = max(model)
+            model.remove(longest)
+            assert queue.steal() == longest[2]
+        elif action < 0.62:
+            queue = ShortestFirstRunQueue(remaining, queue.snapshot())
+        assert len(queue) == len(model)
+    # Jobs taken from one heap do not pile up in the other
+    assert len(queue.heap) + len(queue.longest or ()) <= 4 * len(model) + 130
+
+def test_sweep_runs_on_the_workload_cpus(make_scheduler):
+    processes = "".join(f"process name {name} arrival 0 burst 10\n" for name in "ABCD")
+    workload = make_scheduler(f"processcount 4\nrunfor 40\nuse fcfs\ncpus 2\nsteal\n{processes}end\n")
+    for quantum, completed, summary in sweep_quanta(workload, [2, 3], workers=1):
+        scheduler = make_scheduler(f"processcount 4\nrunfor 40\nuse rr\nquantum {quantum}\ncpus 2\nsteal\n"
+                                   f"{processes}end\n", name='rr.in')
+        assert (completed, summary) == (4, summarize_process_stats(run_scheduler(scheduler)))
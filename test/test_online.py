@@ -0,0 +1,37 @@
+import io
+import pytest
+from online import OnlineSession
+
+WORKLOAD = ("process name A arrival 0 burst 5 priority 2\n"
+            "process name B arrival 1 burst 3 priority 1\n"
+            "process name C arrival 1 burst 8 priority 0\n"
+            "process name D arrival 9 burst 2 priority 1\n"
+            "process name E arrival 30 burst 4 priority 0\n")
+
+@pytest.mark.parametrize('directives', ["use fcfs\n", "use sjf\n", "use rr\nquantum 2\n", "use ljf\n",
+                                        "use ljf preemptive\n", "use mlfq\nquantum 1\nlevels 2\nboost 7\n",
+                                        "use priority\naging 3\n", "use priority preemptive\n"])
+@pytest.mark.parametrize('runfor', [None, 12])
+def test_online_output_matches_the_batch_stream(make_scheduler, streamed, directives, runfor):
+    settings = f"runfor {runfor}\n" if runfor is not None else ""
+    output = io.StringIO()
+    session = OnlineSession(output, settings={'processcount': '5'})
+    for line in (directives + settings + WORKLOAD + "end\n").splitlines():
+        assert session.handle_line(line) is None
+    # Without runfor, the run lasts until every process is done: E finishes at 34 whatever the algorithm
+    batch = make_scheduler(f"processcount 5\nrunfor {runfor if runfor is not None else 34}\n{directives}{WORKLOAD}end\n")
+    assert output.getvalue() == streamed(batch)
+
+def test_online_run_drops_the_rows_of_finished_processes():
+    session = OnlineSession(io.StringIO(), settings={'use': 'fcfs'})
+    for line in WORKLOAD.splitlines()[:4]:
+        session.handle_line(line)
+    # When D arrives at 9, A and B have finished and C runs to completion from 8 to 16 (FCFS records
+    # its statistics when it is selected): only D's row is left, while every name stays for the output
+    feed = session.run.feed
+    assert sorted(feed.arrivals) == [3]
+    assert feed.names == ['A', 'B', 'C', 'D']
+
+def test_online_rejects_an_algorithm_without_a_policy():
+    session = OnlineSession(io.StringIO(), settings={'use': 'lottery'})
+    assert "no online mode" in session.handle_line("process name A arrival 0 burst 1")
@@ -0,0 +1,50 @@
+from runner import run_scheduler
+
+def test_aging_ties_go_to_the_process_ready_first(make_scheduler, schedule_lines):
+    # At time 10, A (priority 0, waited 1 tick) and B (priority 1, waited 10 ticks) both have
+    # priority 0: B became ready first, so it runs first
+    scheduler = make_scheduler("processcount 3\nrunfor 20\nuse priority\naging 10\n"
+                               "process name X arrival 0 burst 10 priority 0\n"
+                               "process name B arrival 0 burst 2 priority 1\n"
+                               "process name A arrival 9 burst 2 priority 0\nend\n")
+    assert schedule_lines(run_scheduler(scheduler)) == [
+        "Time   0 : X selected (burst 10)",
+        "Time  10 : X finished",
+        "Time  10 : B selected (burst 2)",
+        "Time  12 : B finished",
+        "Time  12 : A selected (burst 2)",
+        "Time  14 : A finished",
+    ]
+
+def test_aging_preempts_only_on_a_strictly_better_whole_priority(make_scheduler, schedule_lines):
+    # B (priority 2) reaches priority -1, strictly better than X's 0, after waiting 15 ticks;
+    # from then on a waiting process gets ahead of the running one only every 10 ticks
+    scheduler = make_scheduler("processcount 2\nrunfor 60\nuse priority preemptive\naging 5\n"
+                               "process name X arrival 0 burst 30 priority 0\n"
+                               "process name B arrival 0 burst 20 priority 2\nend\n")
+    output = run_scheduler(scheduler)
+    assert schedule_lines(output) == [
+        "Time   0 : X selected (burst 30)",
+        "Time  15 : B selected (burst 20)",
+        "Time  25 : X selected (burst 15)",
+        "Time  35 : B selected (burst 10)",
+        "Time  45 : B finished",
+        "Time  45 : X selected (burst 5)",
+        "Time  50 : X finished",
+    ]
+    assert output.process_stats['B'] == {'wait': 25, 'turnaround': 45, 'response': 15}
+
+def test_without_aging_ties_go_to_the_process_ready_first(make_scheduler, schedule_lines):
+    scheduler = make_scheduler("processcount 3\nrunfor 20\nuse priority preemptive\n"
+                               "process name A arrival 0 burst 4 priority 1\n"
+                               "process name B arrival 1 burst 2 priority 1\n"
+                               "process name C arrival 2 burst 2 priority 0\nend\n")
+    assert schedule_lines(run_scheduler(scheduler)) == [
+        "Time   0 : A selected (burst 4)",
+        "Time   2 : C selected (burst 2)",
+        "Time   4 : C finished",
+        "Time   4 : B selected (burst 2)",
+        "Time   6 : B finished",
+        "Time   6 : A selected (burst 2)",
+        "Time   8 : A finished",
+    ]
@@ -0,0 +1,154 @@
+import random
+import pytest
+from exec import main
+from generator import generate_workload
+from output import ARRIVED, SELECTED, FINISHED, IDLE, LOTTERY_SELECTED, LOTTERY_COMPLETED, event_length
+from runner import run_scheduler
+from timeline import Timeline, answer_query
+
+# Small leaves so that the workloads below build trees several levels deep
+pytestmark = pytest.mark.usefixtures('small_leaves')
+
+@pytest.fixture
+def small_leaves(monkeypatch):
+    monkeypatch.setattr('timeline.TIMELINE_LEAF_SIZE', 2)
+
+def logged_events(output):
+    """The events of a run in output order as (time tick, kind, process, arg, cpu)."""
+    cpus = output.event_cpus
+    return [(output.event_ticks[i], output.event_kinds[i], output.event_processes[i], output.event_args[i],
+             cpus[i] if cpus else -1) for i in output.sorted_event_indices()]
+
+def scan_running(output, time_tick):
+    """(process name, CPU) of the processes running at a time tick, by replaying the log up to it."""
+    running = {}  # CPU -> process
+    for event_tick, kind, process, arg, cpu in logged_events(output):
+        if event_tick > time_tick:
+            break
+        if kind == SELECTED or kind == LOTTERY_SELECTED:
+            running = {other: held for other, held in running.items() if held != process}
+            running[cpu] = process
+            if kind == LOTTERY_SELECTED and event_tick + event_length(kind, arg) <= time_tick:
+                del running[cpu]
+        elif kind == FINISHED or kind == LOTTERY_COMPLETED:
+            running = {other: held for other, held in running.items() if held != process}
+        elif kind == IDLE:
+            running.pop(cpu, None)
+    return sorted((output.process_names[process], cpu) for cpu, process in running.items())
+
+def scan_waiting(output, arrivals, time_tick):
+    """Processes arrived and neither running nor finished at a time tick, counted over the whole log."""
+    events = logged_events(output)
+    if any(kind == ARRIVED for _, kind, _, _, _ in events):
+        arrived = sum(1 for event_tick, kind, _, _, _ in events if kind == ARRIVED and event_tick <= time_tick)
+    else:
+        arrived = sum(1 for arrival in arrivals if arrival <= time_tick and arrival < output.last_time_tick)
+    finished = sum(1 for event_tick, kind, _, _, _ in events
+                   if (kind == FINISHED or kind == LOTTERY_COMPLETED) and event_tick <= time_tick)
+    return arrived - finished - len(scan_running(output, time_tick))
+
+def scan_events(timeline, output, start, end):
+    """The events from `start` to `end` (excluded), with a span going on at `start` reported there."""
+    found = []
+    for i in output.sorted_event_indices():
+        event_tick, kind, arg = output.event_ticks[i], output.event_kinds[i], output.event_args[i]
+        if event_tick < start < event_tick + event_length(kind, arg) and kind in (IDLE, LOTTERY_SELECTED):
+            found = [(start, timeline.event_text(i))]
+        elif start <= event_tick < end:
+            found.append((event_tick, timeline.event_text(i)))
+    return found
+
+def workloads():
+    """Runs with idle stretches, preemption, several CPUs and lottery spans."""
+    yield generate_workload(30, seed=1, rate=0.05, use='fcfs')
+    yield generate_workload(40, seed=2, arrivals='bursty', rate=0.3, use='rr', quantum=3)
+    yield generate_workload(40, seed=3, rate=0.2, use='sjf', mean_burst=4)
+    yield generate_workload(30, seed=4, rate=0.1, use='priority', preemptive=True, max_priority=4)
+    yield generate_workload(40, seed=5, rate=0.4, use='rr', quantum=2, cpus=2)
+    lottery = generate_workload(20, seed=6, rate=0.2, use='lottery', max_tickets=5)
+    lottery.seed = 7
+    yield lottery
+
+@pytest.mark.parametrize('scheduler', list(workloads()), ids=lambda scheduler: f"{scheduler.use}-{scheduler.cpus}")
+def test_point_queries_match_a_scan_of_the_log(scheduler):
+    output = run_scheduler(scheduler)
+    timeline = Timeline(output, scheduler.table.arrivals)
+    for time_tick in range(output.last_time_tick):
+        assert sorted((name, cpu) for name, cpu, _, _ in timeline.running_at(time_tick)) == \
+               scan_running(output, time_tick)
+        assert timeline.queue_length_at(time_tick) == scan_waiting(output, scheduler.table.arrivals, time_tick)
+
+@pytest.mark.parametrize('scheduler', list(workloads()), ids=lambda scheduler: f"{scheduler.use}-{scheduler.cpus}")
+def test_range_queries_match_a_scan_of_the_log(scheduler):
+    output = run_scheduler(scheduler)
+    timeline = Timeline(output, scheduler.table.arrivals)
+    rnd = random.Random(scheduler.use)
+    for _ in range(50):
+        start = rnd.randrange(output.last_time_tick)
+        end = start + rnd.randint(1, 30)
+        slices = timeline.slices_between(start, end)
+        assert all(slice_start < end and slice_end > start for _, _, slice_start, slice_end in slices)
+        assert {(name, cpu) for name, cpu, _, _ in slices} == \
+               {running for time_tick in range(start, min(end, output.last_time_tick))
+                for running in scan_running(output, time_tick)}
+        assert timeline.events_between(start, end) == scan_events(timeline, output, start, end)
+        assert timeline.queue_lengths_between(start, end)[0] == (start, timeline.queue_length_at(start))
+
+def test_slice_ending_at_the_query_tick(make_scheduler):
+    scheduler = make_scheduler("processcount 2\nrunfor 10\nuse fcfs\nprocess name A arrival 0 burst 3\n"
+                               "process name B arrival 1 burst 4\nend\n")
+    timeline = Timeline(run_scheduler(scheduler))
+    # A runs from 0 to 3, its end excluded: at 3 only B runs
+    assert timeline.running_at(2) == [('A', -1, 0, 3)]
+    assert timeline.running_at(3) == [('B', -1, 3, 7)]
+    assert timeline.slices_between(3, 5) == [('B', -1, 3, 7)]
+    assert timeline.slices_between(0, 3) == [('A', -1, 0, 3)]
+    assert timeline.queue_length_at(2) == 1
+    assert timeline.queue_length_at(3) == 0
+
+def test_idle_stretches(make_scheduler):
+    scheduler = make_scheduler("processcount 2\nrunfor 12\nuse fcfs\nprocess name A arrival 0 burst 2\n"
+                               "process name B arrival 5 burst 3\nend\n")
+    timeline = Timeline(run_scheduler(scheduler))
+    assert timeline.running_at(3) == []
+    assert answer_query(timeline, "at 3") == ["Time   3 : 0 waiting", "Time   3 : Idle"]
+    # Idle stretches starting before a range are reported at its start
+    assert timeline.events_between(3, 6) == [(3, "Idle (3 ticks)"), (5, "B arrived"), (5, "B selected (burst 3)")]
+    assert timeline.events_between(9, 12) == [(9, "Idle (4 ticks)")]
+    assert timeline.slices_between(2, 5) == []
+
+def test_empty_tree(make_scheduler):
+    timeline = Timeline(run_scheduler(make_scheduler("processcount 0\nrunfor 5\nuse rr\nquantum 2\nend\n")))
+    assert timeline.root == -1
+    assert timeline.running_at(2) == []
+    assert timeline.slices_between(0, 5) == []
+    assert timeline.queue_lengths_between(0, 5) == [(0, 0)]
+    assert answer_query(timeline, "at 4") == ["Time   4 : 0 waiting", "Time   4 : Idle"]
+
+def test_query_command(tmp_path, capsys):
+    path = tmp_path / "workload.in"
+    path.write_text("processcount 3\nrunfor 20\nuse rr\nquantum 2\nprocess name A arrival 0 burst 3\n"
+                    "process name B arrival 1 burst 2\nprocess name C arrival 10 burst 1\nend\n")
+    main(['query', str(path), '-q', 'at 2', '-q', 'slices 0 5', '-q', 'arrivals 0 11'])
+    assert capsys.readouterr().out.splitlines() == [
+        "Time   2 : 1 waiting",
+        "Time   2 : B running (2 to 4)",
+        "A running (0 to 2)",
+        "B running (2 to 4)",
+        "A running (4 to 5)",
+        "Time   0 : A arrived",
+        "Time   1 : B arrived",
+        "Time  10 : C arrived",
+    ]
+
+def test_query_command_rejects_a_bad_query(tmp_path, capsys):
+    path = tmp_path / "workload.in"
+    path.write_text("processcount 1\nrunfor 5\nuse fcfs\nprocess name A arrival 0 burst 3\nend\n")
+    with pytest.raises(SystemExit) as error:
+        main(['query', str(path), '-q', 'at', '-q', 'at 1'])
+    assert error.value.code == 2
+    assert capsys.readouterr().out.splitlines() == [
+        "Error: 'at' takes 1 time",
+        "Time   1 : 0 waiting",
+        "Time   1 : A running (0 to 3)",
+    ]
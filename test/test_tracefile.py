@@ -0,0 +1,95 @@
+import os
+import pytest
+from exec import main
+from generator import generate_workload
+from tracefile import TRACE_HEADER, decode_trace, load_scheduler, read_trace, trace_chunks, write_trace, write_text_trace
+
+TEST_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+SETTINGS = ['processcount', 'runfor', 'use', 'preemptive', 'quantum', 'quanta', 'boost', 'aging', 'cpus', 'steal', 'seed']
+
+def workloads():
+    """Workloads using every field of the trace: priorities, tickets, per-level quanta, boost, aging, CPUs, seed."""
+    yield generate_workload(50, seed=1, use='fcfs')
+    yield generate_workload(50, seed=2, use='priority', preemptive=True, max_priority=5)
+    lottery = generate_workload(30, seed=3, use='lottery', max_tickets=9)
+    lottery.seed = 11
+    yield lottery
+    mlfq = generate_workload(40, seed=4, use='mlfq', quantum=2)
+    mlfq.quanta, mlfq.boost = [2, 5, 9], 40
+    yield mlfq
+    aging = generate_workload(40, seed=5, use='priority', max_priority=3)
+    aging.aging = 7
+    yield aging
+    yield generate_workload(40, seed=6, use='rr', quantum=3, cpus=3, steal=True)
+    yield generate_workload(0, seed=7, use='sjf')
+
+def assert_same_workload(loaded, scheduler):
+    for setting in SETTINGS:
+        assert getattr(loaded, setting) == getattr(scheduler, setting), setting
+    for column in ['names', 'arrivals', 'bursts', 'tickets', 'priorities']:
+        assert list(getattr(loaded.table, column)) == list(getattr(scheduler.table, column)), column
+
+def trace_bytes(scheduler) -> bytes:
+    return b''.join(trace_chunks(scheduler))
+
+@pytest.mark.parametrize('scheduler', list(workloads()), ids=lambda scheduler: scheduler.use)
+def test_binary_trace_round_trip(tmp_path, scheduler):
+    path = str(tmp_path / "workload.trace")
+    write_trace(scheduler, path)
+    assert_same_workload(read_trace(path), scheduler)
+    # And through the text format
+    text_path = str(tmp_path / "workload.in")
+    write_text_trace(read_trace(path), text_path)
+    assert_same_workload(load_scheduler(text_path), scheduler)
+
+def test_truncated_traces_are_rejected():
+    data = trace_bytes(generate_workload(10, seed=1, use='priority'))
+    # Inside the header, the arrivals, the bursts, the names and the options
+    for length in [8, TRACE_HEADER.size - 1, TRACE_HEADER.size, TRACE_HEADER.size + 8 * 10 - 3,
+                   TRACE_HEADER.size + 8 * 20 - 1, len(data) - 20, len(data) - 1]:
+        with pytest.raises(ValueError, match="truncated"):
+            decode_trace(memoryview(data[:length]), "workload.trace")
+    decode_trace(memoryview(data), "workload.trace")
+
+def corrupt(data: bytes, offset: int, value: bytes) -> memoryview:
+    return memoryview(data[:offset] + value + data[offset + len(value):])
+
+def test_corrupt_headers_are_rejected():
+    data = trace_bytes(generate_workload(10, seed=1, use='rr', quantum=2))
+    cases = [
+        (corrupt(data, 0, b'SCHEDTRX'), "not a binary scheduler trace"),
+        (corrupt(data, 8, (7).to_bytes(4, 'little')), "Unsupported binary trace version 7"),
+        (corrupt(data, 12, (2 | 64).to_bytes(4, 'little')), "Corrupt binary trace header"),
+        # A count larger than the file holds
+        (corrupt(data, 48, (1 << 40).to_bytes(8, 'little')), "truncated"),
+        (corrupt(data, 56, (0).to_bytes(4, 'little')), "Corrupt binary trace header"),
+        (corrupt(data, 60, b'\xff\xfe'), "Corrupt binary trace header"),
+        (corrupt(data, 60, b'nope\0\0'), "Invalid algorithm"),
+    ]
+    for buffer, message in cases:
+        with pytest.raises(ValueError, match=message):
+            decode_trace(buffer, "workload.trace")
+
+def fixture_copies(tmp_path):
+    """The text fixtures of this directory, and workloads using the other settings, as text input files."""
+    for name in ['c5-fcfs.in', 'c5-rr.in', 'c10-sjf.in', 'ljf_input.txt']:
+        with open(os.path.join(TEST_DIRECTORY, name)) as source:
+            (tmp_path / name).write_text(source.read())
+        yield str(tmp_path / name)
+    for number, scheduler in enumerate(workloads()):
+        path = str(tmp_path / f"generated{number}.in")
+        write_text_trace(scheduler, path)
+        yield path
+
+def test_trace_input_gives_the_output_of_the_text_input(tmp_path, capsys):
+    for text_path in fixture_copies(tmp_path):
+        base = os.path.splitext(text_path)[0]
+        trace_path = f"{base}-binary.trace"
+        main(['convert', text_path, trace_path])
+        for options in [[], ['--stream', 'text']]:
+            main(options + [text_path])
+            main(options + [trace_path])
+            with open(f"{base}.out.test") as text_output, open(f"{base}-binary.out.test") as trace_output:
+                assert trace_output.read() == text_output.read(), (text_path, options)
+    capsys.readouterr()
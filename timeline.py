@@ -0,0 +1,362 @@
+import operator
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Iterable, List, Optional, Sequence, TextIO, Tuple
+from output import SchedulerOutput, ARRIVED, SELECTED, FINISHED, IDLE, LOTTERY_SELECTED, LOTTERY_COMPLETED, EVENT_FORMATS, COMPACT_FORMATS, event_length
+
+# Most slices a leaf of the interval tree holds; leaves are scanned whole, so small ones keep
+# queries fast while saving the nodes of the smallest subtrees
+TIMELINE_LEAF_SIZE = 16
+
+# Queries understood by answer_query, with their arguments
+QUERY_HELP = [
+    "at T            processes running and number of processes waiting at time T",
+    "slices A B      execution slices overlapping times A to B (B excluded)",
+    "queue A B       number of processes waiting at A and at every change until B",
+    "arrivals A B    processes arriving from A to B",
+    "events A B      events from A to B, idle stretches and lottery runs on one line",
+    "help            this list",
+]
+
+class Timeline:
+    """
+    Time index of a finished run, built once from its event log so that questions about any
+    point or stretch of time are answered without replaying the log.
+
+    Execution slices (a process running on a CPU from a start to an end tick) are held in a
+    centered interval tree, and arrivals, queue lengths and events in arrays sorted by time: a
+    query takes O(log n) to find its place plus O(k) for the k answers it returns.
+    """
+    def __init__(self, output: SchedulerOutput, arrivals: Optional[Sequence[int]] = None):
+        """
+        :param output: A finished run with its event log (not a streaming run).
+        :param arrivals: Arrival time of each process, for logs that record no arrivals (lottery).
+        """
+        if output.sink is not None:
+            raise ValueError("A streamed run keeps no event log to index")
+        self.output = output
+        self.end = output.last_time_tick or 0
+        ticks, kinds, processes, args, cpus = (output.event_ticks, output.event_kinds, output.event_processes,
+                                               output.event_args, output.event_cpus)
+
+        # Events in output order, with their time ticks for bisection
+        self.event_order = array('q', output.sorted_event_indices())
+        self.event_times = array('q', (ticks[i] for i in self.event_order))
+
+        # A slice starts when a process is selected and lasts until it finishes, another process is
+        # selected on its CPU or it is selected elsewhere; lottery runs give their length
+        starts, ends, slice_processes, slice_cpus = [], [], [], []
+        running = {}  # CPU -> (process, start) of the slice open on it
+        running_on = {}  # Process -> CPU of its open slice
+        # Arrivals in time order: time tick, process and position of the event (-1 if it is not logged)
+        self.arrival_times, self.arrival_processes, self.arrival_positions = array('q'), array('i'), array('q')
+        finish_times = array('q')
+        # Idle stretches and lottery runs longer than a tick, which can cover times after their start
+        self.span_positions = array('q')
+
+        def close(cpu: int, time_tick: int):
+            process, start = running.pop(cpu)
+            del running_on[process]
+            if time_tick > start:
+                starts.append(start)
+                ends.append(time_tick)
+                slice_processes.append(process)
+                slice_cpus.append(cpu)
+
+        for position, i in enumerate(self.event_order):
+            time_tick, kind, process = ticks[i], kinds[i], processes[i]
+            cpu = cpus[i] if cpus else -1
+            if kind == ARRIVED:
+                self.arrival_times.append(time_tick)
+                self.arrival_processes.append(process)
+                self.arrival_positions.append(position)
+            elif kind == SELECTED or kind == LOTTERY_SELECTED:
+                if cpu in running:
+                    close(cpu, time_tick)
+                if process in running_on:
+                    close(running_on[process], time_tick)
+                if kind == SELECTED:
+                    running[cpu] = (process, time_tick)
+                    running_on[process] = cpu
+                else:
+                    starts.append(time_tick)
+                    ends.append(time_tick + event_length(kind, args[i]))
+                    slice_processes.append(process)
+                    slice_cpus.append(cpu)
+            elif kind == FINISHED or kind == LOTTERY_COMPLETED:
+                finish_times.append(time_tick)
+                if process in running_on:
+                    close(running_on[process], time_tick)
+            elif kind == IDLE and cpu in running:
+                close(cpu, time_tick)
+            if (kind == IDLE or kind == LOTTERY_SELECTED) and args[i] > 1:
+                self.span_positions.append(position)
+        # Slices still open at the end of the run are cut there
+        for cpu in list(running):
+            close(cpu, max(self.end, running[cpu][1]))
+
+        # Without arrivals in the log, every process arriving before the end of the run took part in it
+        if not self.arrival_times and arrivals is not None:
+            for process in sorted(range(len(arrivals)), key=arrivals.__getitem__):
+                if arrivals[process] < self.end:
+                    self.arrival_times.append(arrivals[process])
+                    self.arrival_processes.append(process)
+                    self.arrival_positions.append(-1)
+
+        # Slices sorted by start tick (then CPU), addressed by their position in this order
+        keys = [start * 65536 + cpu for start, cpu in zip(starts, slice_cpus)]
+        # Slices mostly close in the order they start, in which case there is nothing to sort
+        if not all(map(operator.le, keys, islice(keys, 1, None))):
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            starts, ends = [starts[s] for s in order], [ends[s] for s in order]
+            slice_processes, slice_cpus = [slice_processes[s] for s in order], [slice_cpus[s] for s in order]
+        self.slice_starts, self.slice_ends = array('q', starts), array('q', ends)
+        self.slice_processes, self.slice_cpus = array('i', slice_processes), array('h', slice_cpus)
+        self.build_slice_tree()
+
+        # Number of waiting processes as a step function: it goes up when a process arrives or a
+        # slice ends, and down when a process finishes or a slice starts
+        changes = {}
+        for time_tick in self.arrival_times:
+            changes[time_tick] = changes.get(time_tick, 0) + 1
+        for time_tick in finish_times:
+            changes[time_tick] = changes.get(time_tick, 0) - 1
+        for time_tick in self.slice_starts:
+            changes[time_tick] = changes.get(time_tick, 0) - 1
+        for time_tick in self.slice_ends:
+            changes[time_tick] = changes.get(time_tick, 0) + 1
+        self.queue_times, self.queue_lengths = array('q'), array('q')
+        waiting = 0
+        for time_tick in sorted(changes):
+            if changes[time_tick]:
+                waiting += changes[time_tick]
+                self.queue_times.append(time_tick)
+                self.queue_lengths.append(waiting)
+
+
+    def build_slice_tree(self):
+        """
+        Build the centered interval tree of the slices. Each node holds the slices containing its
+        center tick, sorted by start and by end (descending); the slices ending at or before the
+        center go to its left subtree, those starting after it to its right subtree. Up to
+        TIMELINE_LEAF_SIZE slices are kept in a leaf instead, which is scanned whole.
+        """
+        starts, ends = self.slice_starts, self.slice_ends
+        self.node_centers: List[Optional[int]] = []
+        self.node_lefts: List[int] = []
+        self.node_rights: List[int] = []
+        self.node_by_start: List[List[int]] = []
+        self.node_by_end: List[List[int]] = []
+
+        # Slices are addressed by their position in start order, so a list of positions in
+        # ascending order is sorted by start, and so is every list taken from it
+        def build(slices: List[int]) -> int:
+            node = len(self.node_centers)
+            self.node_lefts.append(-1)
+            self.node_rights.append(-1)
+            if len(slices) <= TIMELINE_LEAF_SIZE:
+                self.node_centers.append(None)
+                self.node_by_start.append(slices)
+                self.node_by_end.append(slices)
+                return node
+            center = starts[slices[len(slices) // 2]]
+            # The slices starting after the center are the positions after the last start at the center
+            split = bisect_left(slices, bisect_right(starts, center))
+            here = [s for s in slices[:split] if ends[s] > center]
+            self.node_centers.append(center)
+            self.node_by_start.append(here)
+            self.node_by_end.append(sorted(here, key=ends.__getitem__, reverse=True))
+            # The median slice contains the center, so both halves are smaller than `slices`
+            left = [s for s in slices[:split] if ends[s] <= center]
+            if left:
+                self.node_lefts[node] = build(left)
+            if split < len(slices):
+                self.node_rights[node] = build(slices[split:])
+            return node
+
+        self.root = build(list(range(len(starts)))) if len(starts) else -1
+
+    def stab(self, time_tick: int) -> List[int]:
+        """Positions of the slices running at `time_tick`, in start order."""
+        starts, ends = self.slice_starts, self.slice_ends
+        found = []
+        node = self.root
+        while node >= 0:
+            center = self.node_centers[node]
+            if center is None:
+                found.extend(s for s in self.node_by_start[node] if starts[s] <= time_tick < ends[s])
+                break
+            if time_tick < center:
+                # Every slice of the node ends after the center, so it contains the time if it has started
+                for s in self.node_by_start[node]:
+                    if starts[s] > time_tick:
+                        break
+                    found.append(s)
+                node = self.node_lefts[node]
+            else:
+                # Every slice of the node starts at or before the center, so it contains the time if it has not ended
+                for s in self.node_by_end[node]:
+                    if ends[s] <= time_tick:
+                        break
+                    found.append(s)
+                node = self.node_rights[node]
+        found.sort()
+        return found
+
+    def slice_tuple(self, s: int) -> Tuple[str, int, int, int]:
+        """The slice at position `s` as (process name, CPU, start, end)."""
+        return (self.output.process_names[self.slice_processes[s]], self.slice_cpus[s],
+                self.slice_starts[s], self.slice_ends[s])
+
+    def running_at(self, time_tick: int) -> List[Tuple[str, int, int, int]]:
+        """
+        Processes running at a time tick.
+
+        :param time_tick: The time tick.
+        :return: (process name, CPU, start, end) of each slice running at the time, in start order;
+                 the CPU is -1 in single-CPU runs and the end is excluded.
+        """
+        return [self.slice_tuple(s) for s in self.stab(time_tick)]
+
+    def slices_between(self, start: int, end: int) -> List[Tuple[str, int, int, int]]:
+        """
+        Execution slices overlapping the times from `start` to `end` (excluded), in start order, as
+        returned by running_at.
+        """
+        if end <= start:
+            return []
+        # The slices running at the start, then those starting later in the range
+        first = bisect_right(self.slice_starts, start)
+        positions = self.stab(start) + list(range(first, bisect_left(self.slice_starts, end, first)))
+        return [self.slice_tuple(s) for s in positions]
+
+    def queue_length_at(self, time_tick: int) -> int:
+        """Number of processes that have arrived and are neither running nor finished at a time tick."""
+        position = bisect_right(self.queue_times, time_tick) - 1
+        return self.queue_lengths[position] if position >= 0 else 0
+
+    def queue_lengths_between(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        The number of waiting processes as (time tick, length) pairs: at `start`, then at each
+        tick before `end` where it changes.
+        """
+        first = bisect_right(self.queue_times, start)
+        last = bisect_left(self.queue_times, end, first)
+        return [(start, self.queue_length_at(start))] + list(zip(self.queue_times[first:last], self.queue_lengths[first:last]))
+
+    def event_text(self, i: int) -> str:
+        """An event of the log as written by --compact, with its CPU in multi-CPU runs."""
+        output = self.output
+        kind, process, arg = output.event_kinds[i], output.event_processes[i], output.event_args[i]
+        name = output.process_names[process] if process >= 0 else None
+        prefix = f"CPU {output.event_cpus[i]} : " if output.event_cpus else ""
+        length = event_length(kind, arg)
+        if length == 1:
+            return prefix + EVENT_FORMATS[kind].format(name, arg)
+        return prefix + COMPACT_FORMATS[kind].format(name, length)
+
+    def events_between(self, start: int, end: int) -> List[Tuple[int, str]]:
+        """
+        Events from `start` to `end` (excluded) as (time tick, text) pairs in output order. Idle
+        stretches and lottery runs are reported once, at their start, or at `start` if they began
+        before it.
+        """
+        if end <= start:
+            return []
+        order, times = self.event_order, self.event_times
+        events = []
+        # Spans do not overlap on a CPU, and the spans of multi-CPU runs last a tick, so only the
+        # last one starting before the range can still be going on at its start
+        span = bisect_left(self.span_positions, bisect_left(times, start)) - 1
+        if span >= 0:
+            i = order[self.span_positions[span]]
+            if times[self.span_positions[span]] + event_length(self.output.event_kinds[i], self.output.event_args[i]) > start:
+                events.append((start, self.event_text(i)))
+        for position in range(bisect_left(times, start), bisect_left(times, end)):
+            events.append((times[position], self.event_text(order[position])))
+        return events
+
+    def arrivals_between(self, start: int, end: int) -> List[Tuple[int, str]]:
+        """Arrivals from `start` to `end` (excluded) as (time tick, text) pairs."""
+        arrivals = []
+        for a in range(bisect_left(self.arrival_times, start), bisect_left(self.arrival_times, end)):
+            position = self.arrival_positions[a]
+            if position >= 0:
+                arrivals.append((self.arrival_times[a], self.event_text(self.event_order[position])))
+            else:
+                arrivals.append((self.arrival_times[a], EVENT_FORMATS[ARRIVED].format(self.output.process_names[self.arrival_processes[a]])))
+        return arrivals
+
+def slice_text(name: str, cpu: int, start: int, end: int) -> str:
+    prefix = f"CPU {cpu} : " if cpu >= 0 else ""
+    return f"{prefix}{name} running ({start} to {end})"
+
+def parse_query_times(words: List[str], count: int) -> List[int]:
+    if len(words) != count + 1:
+        raise ValueError(f"Error: '{words[0]}' takes {count} time{'s' if count > 1 else ''}")
+    try:
+        return [int(word) for word in words[1:]]
+    except ValueError:
+        raise ValueError(f"Error: Times must be integers, not '{' '.join(words[1:])}'")
+
+def answer_query(timeline: Timeline, query: str) -> List[str]:
+    """
+    Answer one query (see QUERY_HELP) about a run, e.g. 'at 120' or 'slices 100 200'.
+
+    :param timeline: The index of the run.
+    :param query: The query.
+    :return: The lines of the answer, without line ends.
+    """
+    words = query.split()
+    if not words:
+        return []
+    command = words[0]
+    if command == 'help':
+        return list(QUERY_HELP)
+    if command == 'at':
+        time_tick, = parse_query_times(words, 1)
+        lines = [f"Time {time_tick:3} : {timeline.queue_length_at(time_tick)} waiting"]
+        running = timeline.running_at(time_tick)
+        lines += [f"Time {time_tick:3} : {slice_text(*slice)}" for slice in running] or [f"Time {time_tick:3} : Idle"]
+        return lines
+    if command == 'slices':
+        start, end = parse_query_times(words, 2)
+        return [slice_text(*slice) for slice in timeline.slices_between(start, end)]
+    if command == 'queue':
+        start, end = parse_query_times(words, 2)
+        return [f"Time {time_tick:3} : {length} waiting" for time_tick, length in timeline.queue_lengths_between(start, end)]
+    if command == 'arrivals':
+        start, end = parse_query_times(words, 2)
+        return [f"Time {time_tick:3} : {text}" for time_tick, text in timeline.arrivals_between(start, end)]
+    if command == 'events':
+        start, end = parse_query_times(words, 2)
+        return [f"Time {time_tick:3} : {text}" for time_tick, text in timeline.events_between(start, end)]
+    raise ValueError(f"Error: Unknown query '{command}'; 'help' lists the queries")
+
+def run_queries(timeline: Timeline, queries: Iterable[str], file: Optional[TextIO] = None, prompt: str = "") -> int:
+    """
+    Answer queries one after the other, e.g. as they are typed on standard input.
+
+    :param timeline: The index of the run.
+    :param queries: The queries, one per item.
+    :param file: Where to print the answers (standard output by default).
+    :param prompt: Printed before reading each query, for interactive use.
+    :return: The number of queries that could not be answered.
+    """
+    file = file or sys.stdout
+    failed = 0
+    file.write(prompt)
+    file.flush()
+    for query in queries:
+        if query.strip() in ['quit', 'exit']:
+            break
+        try:
+            lines = answer_query(timeline, query)
+        except ValueError as error:
+            lines = [str(error)]
+            failed += 1
+        file.write("".join(line + "\n" for line in lines) + prompt)
+        file.flush()
+    return failed
@@ -0,0 +1,248 @@
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Sequence
+from typing import List
+from input import Scheduler, ProcessTable, parse_scheduler_file, scheduler_from_columns
+
+# Binary trace layout (little-endian):
+#   header   TRACE_HEADER, padded to 80 bytes
+#   arrival  int64[count]
+#   burst    int64[count]
+#   tickets  int64[count]
+#   priority int64[count], only if flags has TRACE_HAS_PRIORITIES
+#   name     char[count][name width], UTF-8, NUL padded
+#   options  further directives in the text format (e.g. "boost 100\n"), UTF-8
+# Every column has a fixed width, so a memory-mapped trace can be read in place.
+TRACE_MAGIC = b'SCHEDTRC'
+TRACE_VERSION = 2
+# magic, version, flags, processcount, runfor, quantum, seed, count, name width, algorithm, options length.
+# Version 1 traces have no options; their options length is the zero padding that ends the header.
+TRACE_HEADER = struct.Struct('<8sIIqqqqQI16sI')
+
+TRACE_PREEMPTIVE = 1
+TRACE_HAS_QUANTUM = 2
+TRACE_HAS_SEED = 4
+TRACE_HAS_PRIORITIES = 8
+TRACE_FLAGS = TRACE_PREEMPTIVE | TRACE_HAS_QUANTUM | TRACE_HAS_SEED | TRACE_HAS_PRIORITIES
+
+class NameColumn(Sequence):
+    def __init__(self, buffer: memoryview, width: int, count: int):
+        """
+        Fixed-width name column of a binary trace. Names are decoded on access, not when the trace is opened.
+
+        :param buffer: The bytes of the column (count * width).
+        :param width: Width of each name in bytes.
+        :param count: Number of names.
+        """
+        self.buffer = buffer
+        self.width = width
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("name index out of range")
+        start = index * self.width
+        return bytes(self.buffer[start:start + self.width]).rstrip(b'\0').decode('utf-8')
+
+def is_binary_trace(file_path: str) -> bool:
+    """Tell whether a file is a binary trace (rather than the text input format)."""
+    with open(file_path, 'rb') as file:
+        return file.read(len(TRACE_MAGIC)) == TRACE_MAGIC
+
+def int64_column(values: Iterable[int]) -> bytes:
+    """Encode a column of integers as little-endian int64."""
+    column = array('q', values)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column.tobytes()
+
+def option_directives(scheduler: Scheduler) -> str:
+    """
+    The directives, in the text format, of the settings that have no field of their own in the
+    binary trace header: the quantum of each level and the boost of a feedback algorithm, the aging
+    period, and the number of CPUs.
+    """
+    lines = []
+    if scheduler.quanta is not None:
+        lines.append(f"quantum {' '.join(map(str, scheduler.quanta))}\n")
+    if scheduler.boost is not None:
+        lines.append(f"boost {scheduler.boost}\n")
+    if scheduler.aging is not None:
+        lines.append(f"aging {scheduler.aging}\n")
+    if scheduler.cpus > 1:
+        lines.append(f"cpus {scheduler.cpus}" + (" steal" if scheduler.steal else "") + "\n")
+    return "".join(lines)
+
+def trace_chunks(scheduler: Scheduler) -> List[bytes]:
+    """
+    Encode a Scheduler and its processes in the binary trace format.
+
+    :param scheduler: The Scheduler to encode.
+    :return: The pieces of the trace (header, columns, names, options), to be written one after the other.
+    """
+    table = scheduler.table
+    names = [name.encode('utf-8') for name in table.names]
+    width = max((len(name) for name in names), default=1)
+    algorithm = scheduler.use.encode('ascii')
+    if len(algorithm) > 16:
+        raise ValueError(f"Algorithm name '{scheduler.use}' does not fit in a binary trace.")
+
+    # Workloads without priorities leave the column out
+    has_priorities = any(table.priorities)
+    flags = (TRACE_PREEMPTIVE if scheduler.preemptive else 0) | \
+            (TRACE_HAS_QUANTUM if scheduler.quantum is not None else 0) | \
+            (TRACE_HAS_SEED if scheduler.seed is not None else 0) | \
+            (TRACE_HAS_PRIORITIES if has_priorities else 0)
+    options = option_directives(scheduler).encode('utf-8')
+    header = TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, flags, scheduler.processcount, scheduler.runfor,
+                               scheduler.quantum or 0, scheduler.seed or 0, len(table), width, algorithm, len(options))
+
+    chunks = [header, int64_column(table.arrivals), int64_column(table.bursts), int64_column(table.tickets)]
+    if has_priorities:
+        chunks.append(int64_column(table.priorities))
+    chunks.append(b''.join(name.ljust(width, b'\0') for name in names))
+    chunks.append(options)
+    return chunks
+
+def write_trace(scheduler: Scheduler, file_path: str):
+    """
+    Write a Scheduler and its processes as a binary trace.
+
+    :param scheduler: The Scheduler to write.
+    :param file_path: Path of the binary trace.
+    """
+    with open(file_path, 'wb') as file:
+        file.writelines(trace_chunks(scheduler))
+
+def read_trace(file_path: str) -> Scheduler:
+    """
+    Load a binary trace by memory-mapping it. The process columns are views over the mapped file, not copies.
+
+    :param file_path: Path of the binary trace.
+    :return: A Scheduler object populated with the processes of the trace.
+    """
+    with open(file_path, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return decode_trace(memoryview(mapped), file_path)
+
+def decode_trace(buffer: memoryview, source: str) -> Scheduler:
+    """
+    Load a binary trace from memory (a mapped file, shared memory, ...). The process columns are
+    views over `buffer`, not copies, so they are read-only if `buffer` is.
+
+    :param buffer: The bytes of the trace.
+    :param source: Where the trace comes from, for error messages.
+    :return: A Scheduler object populated with the processes of the trace.
+    """
+    if len(buffer) < TRACE_HEADER.size:
+        raise ValueError(f"{source} is truncated: it is too short for a binary trace header.")
+    magic, version, flags, processcount, runfor, quantum, seed, count, width, algorithm, options_length = \
+        TRACE_HEADER.unpack_from(buffer)
+    if magic != TRACE_MAGIC:
+        raise ValueError(f"{source} is not a binary scheduler trace.")
+    if version not in (1, TRACE_VERSION):
+        raise ValueError(f"Unsupported binary trace version {version} in {source}.")
+    if flags & ~TRACE_FLAGS or (count and width < 1):
+        raise ValueError(f"Corrupt binary trace header in {source}.")
+    # The header gives the size of every part, which must all be there
+    columns = 4 if flags & TRACE_HAS_PRIORITIES else 3
+    size = TRACE_HEADER.size + (8 * columns + width) * count + options_length
+    if len(buffer) < size:
+        raise ValueError(f"{source} is truncated: its header describes {size} bytes, but it has {len(buffer)}.")
+    try:
+        use = algorithm.rstrip(b'\0').decode('ascii')
+    except UnicodeDecodeError:
+        raise ValueError(f"Corrupt binary trace header in {source}.")
+
+    def int64_view(offset: int):
+        column = buffer[offset:offset + 8 * count]
+        if sys.byteorder != 'little':
+            # Big-endian hosts cannot read the columns in place
+            column = array('q', column.tobytes())
+            column.byteswap()
+            return column
+        return column.cast('q')
+
+    offset = TRACE_HEADER.size
+    names_offset = offset + 8 * columns * count
+    table = ProcessTable(arrivals=int64_view(offset), bursts=int64_view(offset + 8 * count),
+                         tickets=int64_view(offset + 16 * count),
+                         priorities=int64_view(offset + 24 * count) if flags & TRACE_HAS_PRIORITIES else None,
+                         names=NameColumn(buffer[names_offset:names_offset + width * count], width, count))
+
+    directives = {'processcount': str(processcount), 'runfor': str(runfor),
+                  'use': use + (' preemptive' if flags & TRACE_PREEMPTIVE else '')}
+    if flags & TRACE_HAS_QUANTUM:
+        directives['quantum'] = str(quantum)
+    if flags & TRACE_HAS_SEED:
+        directives['seed'] = str(seed)
+    options_offset = names_offset + width * count
+    options = bytes(buffer[options_offset:options_offset + options_length]).decode('utf-8')
+    for line in options.splitlines():
+        name, _, value = line.partition(' ')
+        directives[name] = value
+    return scheduler_from_columns(directives, table)
+
+def write_text_trace(scheduler: Scheduler, file_path: str):
+    """
+    Write a Scheduler and its processes in the text input format.
+
+    :param scheduler: The Scheduler to write.
+    :param file_path: Path of the text file.
+    """
+    with open(file_path, 'w', buffering=1 << 20) as file:
+        file.write(f"processcount {scheduler.processcount}\n")
+        file.write(f"runfor {scheduler.runfor}\n")
+        file.write(f"use {scheduler.use}{' preemptive' if scheduler.preemptive else ''}\n")
+        options = option_directives(scheduler)
+        if scheduler.quantum is not None and not options.startswith("quantum"):
+            file.write(f"quantum {scheduler.quantum}\n")
+        file.write(options)
+        if scheduler.seed is not None:
+            file.write(f"seed {scheduler.seed}\n")
+        table = scheduler.table
+        lines = []
+        for name, arrival, burst, tickets, priority in zip(table.names, table.arrivals, table.bursts, table.tickets,
+                                                           table.priorities):
+            tickets = f" tickets {tickets}" if tickets != 1 else ""
+            priority = f" priority {priority}" if priority != 0 else ""
+            lines.append(f"process name {name} arrival {arrival} burst {burst}{tickets}{priority}\n")
+            if len(lines) >= 8192:
+                file.write("".join(lines))
+                lines.clear()
+        file.write("".join(lines))
+        file.write("end\n")
+
+def load_scheduler(file_path: str) -> Scheduler:
+    """
+    Load a workload from either a binary trace or the text input format.
+
+    :param file_path: Path of the workload.
+    :return: A Scheduler object populated with the processes of the workload.
+    """
+    if is_binary_trace(file_path):
+        return read_trace(file_path)
+    return parse_scheduler_file(file_path)
+
+def convert_trace(source: str, destination: str):
+    """
+    Convert a workload between the text input format and the binary trace format.
+    The destination is binary if its name ends in '.trace', text otherwise.
+
+    :param source: Path of the workload to convert (either format).
+    :param destination: Path of the converted workload.
+    """
+    scheduler = load_scheduler(source)
+    if destination.endswith('.trace'):
+        write_trace(scheduler, destination)
+    else:
+        write_text_trace(scheduler, destination)